@@ -0,0 +1,312 @@
+"""
+主要流程的端到端基準測試：以 ffmpeg lavfi（testsrc / sine）產生合成影片
+
+產生 N 個指定長度的測試影片（可混合多種規格），分別量測
+  video_info       get_video_info
+  compatibility    check_video_compatibility
+  merge_copy       merge_videos（規格相同，copy 模式）
+  merge_reencode   merge_videos（規格不同，重新編碼）
+  merge_subtitles  merge_subtitles
+  mp3              batch_convert_to_mp3
+的牆鐘時間、CPU 時間（本程序與子程序）、峰值 RSS 以及啟動的子程序數量，
+結果寫入 JSON 以便比較不同版本。
+
+每個項目都在獨立的 Python 程序中執行（峰值 RSS 不互相影響），
+並使用以硬連結複製的素材目錄，輸出不會殘留到下一輪。ffprobe 探測快取與輸出快取在量測時停用，
+快取目錄指向項目專用的暫存目錄。
+
+用法:
+    python benchmarks/bench_pipeline.py --count 8 --duration 5 --output bench.json
+    python benchmarks/bench_pipeline.py --specs 1280x720@30/48000 640x360@25/44100 --cases merge_copy mp3
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import contextlib
+import subprocess
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from vidtoolbox.probe import set_cache_enabled  # noqa: E402
+from vidtoolbox.output_cache import set_output_cache_enabled  # noqa: E402
+from vidtoolbox.timeline import list_media_files  # noqa: E402
+from vidtoolbox.video_info import get_video_info  # noqa: E402
+from vidtoolbox.video_specs import check_video_compatibility  # noqa: E402
+from vidtoolbox.merge_videos import merge_videos  # noqa: E402
+from vidtoolbox.add_subtitles import merge_subtitles  # noqa: E402
+from vidtoolbox.convert_to_mp3 import batch_convert_to_mp3  # noqa: E402
+
+CASES = ("video_info", "compatibility", "merge_copy", "merge_reencode", "merge_subtitles", "mp3")
+DEFAULT_SPECS = ("1280x720@30/48000", "640x360@25/44100")
+FIXTURE_INFO = "fixture.json"
+
+def parse_spec(text):
+    """解析 WxH@FPS/SAMPLE_RATE 格式的規格（例如 1280x720@30/48000）"""
+    try:
+        size, rest = text.split("@")
+        rate, sample_rate = rest.split("/")
+        width, height = size.split("x")
+        return {'width': int(width), 'height': int(height), 'rate': int(rate), 'sample_rate': int(sample_rate)}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"規格格式應為 WxH@FPS/SAMPLE_RATE: {text}")
+
+def generate_clip(path, spec, duration, frequency):
+    """以 lavfi testsrc / sine 產生一個 H.264 + AAC 測試影片"""
+    size = f"{spec['width']}x{spec['height']}"
+    subprocess.run([
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc=size={size}:rate={spec['rate']}:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency={frequency}:sample_rate={spec['sample_rate']}:duration={duration}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest", "-y", str(path)
+    ], check=True, stdin=subprocess.DEVNULL)
+
+def write_subtitles(path, duration):
+    """產生與影片等長、每 2 秒一條的字幕檔"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(max(1, int(duration // 2))):
+            start, end = i * 2, i * 2 + 1
+            f.write(f"{i + 1}\n00:00:{start:02},000 --> 00:00:{end:02},500\nline {i}\n\n")
+
+def prepare_fixtures(directory, count, duration, specs):
+    """
+    產生素材目錄（參數相同時沿用既有素材）
+
+    uniform/ 全部使用第一種規格並附上字幕，mixed/ 依序輪流使用所有規格。
+
+    Returns:
+        dict: 素材參數
+    """
+    info = {'count': count, 'duration': duration, 'specs': specs}
+    info_path = os.path.join(directory, FIXTURE_INFO)
+    try:
+        with open(info_path, "r", encoding="utf-8") as f:
+            if json.load(f) == info:
+                print(f"♻️  沿用既有素材: {directory}")
+                return info
+    except (OSError, ValueError):
+        pass
+
+    for name in ("uniform", "mixed"):
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        os.makedirs(os.path.join(directory, name))
+    print(f"🎬 產生 {count} 個 {duration} 秒的測試影片 ({', '.join(specs)})...")
+    parsed = [parse_spec(spec) for spec in specs]
+    for i in range(count):
+        uniform = os.path.join(directory, "uniform", f"ep{i:03d}.mp4")
+        generate_clip(uniform, parsed[0], duration, 440 + i * 10)
+        write_subtitles(os.path.join(directory, "uniform", f"ep{i:03d}.srt"), duration)
+        spec = parsed[i % len(parsed)]
+        mixed = os.path.join(directory, "mixed", f"ep{i:03d}.mp4")
+        if spec is parsed[0]:
+            os.link(uniform, mixed)
+        else:
+            generate_clip(mixed, spec, duration, 440 + i * 10)
+
+    with open(info_path, "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    return info
+
+def link_tree(source, destination):
+    """以硬連結複製素材目錄（不支援時改為複製）"""
+    def link_or_copy(src, dst):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+    shutil.copytree(source, destination, copy_function=link_or_copy)
+
+def run_case(case, directory, jobs):
+    """在目前的程序中執行一個項目（directory 為該項目專用的素材副本）"""
+    uniform = os.path.join(directory, "uniform")
+    if case == "video_info":
+        get_video_info(uniform, jobs=jobs)
+    elif case == "compatibility":
+        files = [path.name for path in list_media_files(uniform)]
+        check_video_compatibility(files, uniform, jobs, verbose=False)
+    elif case == "merge_copy":
+        return merge_videos(uniform, jobs=jobs, assume_yes=True) is not None
+    elif case == "merge_reencode":
+        return merge_videos(os.path.join(directory, "mixed"), jobs=jobs, assume_yes=True,
+                            on_incompatible="reencode") is not None
+    elif case == "merge_subtitles":
+        return merge_subtitles(list_media_files(uniform, "*.srt"), list_media_files(uniform),
+                               output_file=os.path.join(directory, "merged.srt"), jobs=jobs) is not False
+    elif case == "mp3":
+        batch_convert_to_mp3(uniform, output_directory=os.path.join(directory, "mp3"), jobs=jobs or 1,
+                             overwrite=True, assume_yes=True)
+    return True
+
+def measure_case(case, directory, jobs):
+    """
+    執行並量測一個項目
+
+    Returns:
+        dict: wall/cpu 時間（秒）、峰值 RSS（KB）與各程式的子程序啟動次數
+    """
+    spawns = {}
+    original_popen = subprocess.Popen
+
+    class CountingPopen(original_popen):
+        def __init__(self, args, *rest, **kwargs):
+            program = args if isinstance(args, (str, bytes)) else args[0]
+            program = os.path.basename(os.fsdecode(program))
+            spawns[program] = spawns.get(program, 0) + 1
+            super().__init__(args, *rest, **kwargs)
+
+    # 快取命中會讓重複執行只量測到連結或複製，而不是探測與編碼
+    set_cache_enabled(False)
+    set_output_cache_enabled(False)
+    subprocess.Popen = CountingPopen
+    before_self = resource.getrusage(resource.RUSAGE_SELF)
+    before_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    try:
+        # 被量測的函式輸出的訊息不計入結果
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            ok = run_case(case, directory, jobs)
+    finally:
+        subprocess.Popen = original_popen
+    wall = time.perf_counter() - start
+    after_self = resource.getrusage(resource.RUSAGE_SELF)
+    after_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    return {
+        'ok': bool(ok),
+        'wall_s': round(wall, 4),
+        'cpu_user_s': round(after_self.ru_utime - before_self.ru_utime, 4),
+        'cpu_sys_s': round(after_self.ru_stime - before_self.ru_stime, 4),
+        'children_cpu_user_s': round(after_children.ru_utime - before_children.ru_utime, 4),
+        'children_cpu_sys_s': round(after_children.ru_stime - before_children.ru_stime, 4),
+        # Linux 上 ru_maxrss 的單位為 KB；子程序為其中最大者
+        'peak_rss_kb': after_self.ru_maxrss,
+        'children_peak_rss_kb': after_children.ru_maxrss,
+        'spawns': spawns,
+        'spawn_total': sum(spawns.values()),
+    }
+
+def run_isolated(case, fixture_directory, work_directory, jobs):
+    """在新的 Python 程序與新的素材副本中執行一個項目"""
+    case_directory = tempfile.mkdtemp(prefix=f"{case}-", dir=work_directory)
+    result_path = os.path.join(case_directory, "result.json")
+    try:
+        for name in ("uniform", "mixed"):
+            link_tree(os.path.join(fixture_directory, name), os.path.join(case_directory, name))
+        cmd = [sys.executable, os.path.abspath(__file__), "--run-case", case,
+               "--case-directory", case_directory, "--result-file", result_path]
+        if jobs:
+            cmd += ["--jobs", str(jobs)]
+        # 快取目錄也放在項目專用的副本中，不寫入使用者的 ~/.cache/vidtoolbox
+        env = dict(os.environ, VIDTOOLBOX_CACHE_DIR=os.path.join(case_directory, "cache"))
+        completed = subprocess.run(cmd, stdin=subprocess.DEVNULL, env=env)
+        if completed.returncode != 0:
+            return {'ok': False, 'error': f"exit status {completed.returncode}"}
+        with open(result_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(case_directory, ignore_errors=True)
+
+def ffmpeg_version():
+    try:
+        output = subprocess.check_output(["ffmpeg", "-version"], stdin=subprocess.DEVNULL)
+        return output.decode("utf-8", errors="replace").splitlines()[0]
+    except (OSError, subprocess.CalledProcessError, IndexError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="vidtoolbox 主要流程基準測試（合成影片）")
+    parser.add_argument("--count", type=int, default=8, help="影片數量 (預設: 8)")
+    parser.add_argument("--duration", type=float, default=5, help="每個影片長度（秒，預設: 5）")
+    parser.add_argument("--specs", nargs="+", default=list(DEFAULT_SPECS),
+                        help="規格組合 WxH@FPS/SAMPLE_RATE，mixed 素材依序輪流使用 (預設: %(default)s)")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES), help="要執行的項目 (預設: 全部)")
+    parser.add_argument("--repeat", type=int, default=3, help="每個項目的執行次數 (預設: 3)")
+    parser.add_argument("-j", "--jobs", type=int, help="傳給各函式的並行工作數 (預設: 各函式的預設值)")
+    parser.add_argument("--fixtures", help="素材目錄（保留並在參數相同時沿用，預設為暫存目錄）")
+    parser.add_argument("-o", "--output", default="bench_pipeline.json", help="結果 JSON 檔案 (預設: bench_pipeline.json)")
+    # 內部使用：在子程序中執行單一項目
+    parser.add_argument("--run-case", choices=CASES, help=argparse.SUPPRESS)
+    parser.add_argument("--case-directory", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        result = measure_case(args.run_case, args.case_directory, args.jobs)
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+
+    for spec in args.specs:
+        parse_spec(spec)
+    cases = list(args.cases)
+    if len(set(args.specs)) < 2 and "merge_reencode" in cases:
+        print("⚠️  只有一種規格，略過 merge_reencode")
+        cases.remove("merge_reencode")
+
+    temporary = None
+    fixture_directory = args.fixtures
+    if fixture_directory is None:
+        temporary = fixture_directory = tempfile.mkdtemp(prefix="vidtoolbox-bench-")
+    os.makedirs(fixture_directory, exist_ok=True)
+    try:
+        fixture = prepare_fixtures(fixture_directory, args.count, args.duration, args.specs)
+        runs = []
+        summary = {}
+        for case in cases:
+            case_runs = []
+            for repeat in range(args.repeat):
+                result = run_isolated(case, fixture_directory, fixture_directory, args.jobs)
+                result.update(case=case, repeat=repeat)
+                case_runs.append(result)
+            runs.extend(case_runs)
+
+            measured = [run for run in case_runs if 'wall_s' in run]
+            if not measured:
+                print(f"  {case:<16} ❌ {case_runs[0].get('error')}")
+                continue
+            summary[case] = {
+                'ok': all(run['ok'] for run in case_runs),
+                'wall_s_median': round(statistics.median(run['wall_s'] for run in measured), 4),
+                'cpu_s_median': round(statistics.median(
+                    run['cpu_user_s'] + run['cpu_sys_s'] + run['children_cpu_user_s'] + run['children_cpu_sys_s']
+                    for run in measured), 4),
+                'peak_rss_kb_max': max(run['peak_rss_kb'] for run in measured),
+                'children_peak_rss_kb_max': max(run['children_peak_rss_kb'] for run in measured),
+                'spawns': measured[-1]['spawns'],
+            }
+            item = summary[case]
+            status = "✅" if item['ok'] else "❌"
+            print(f"  {case:<16} {status} wall {item['wall_s_median']:8.3f}s  cpu {item['cpu_s_median']:8.3f}s  "
+                  f"rss {item['peak_rss_kb_max'] / 1024:6.1f}MB (子程序 {item['children_peak_rss_kb_max'] / 1024:6.1f}MB)  "
+                  f"spawns {measured[-1]['spawn_total']} {measured[-1]['spawns']}")
+    finally:
+        if temporary:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    report = {
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'ffmpeg': ffmpeg_version(),
+        },
+        'fixture': fixture,
+        'jobs': args.jobs,
+        'repeat': args.repeat,
+        'summary': summary,
+        'runs': runs,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📄 結果已寫入: {args.output}")
+
+if __name__ == "__main__":
+    main()
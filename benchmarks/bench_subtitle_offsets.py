@@ -0,0 +1,97 @@
+"""
+merge_subtitles 時間偏移計算的擴展性基準測試
+
+產生 N 個合成字幕檔（與對應的假影片時長），量測合併時間以及
+ffprobe / 字幕檔讀取（shift_subtitle_file）的呼叫次數，確認兩者都隨檔案數線性成長。
+
+用法:
+    python benchmarks/bench_subtitle_offsets.py --sizes 50 100 200 400
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fractions import Fraction  # noqa: E402
+from vidtoolbox import add_subtitles, timeline  # noqa: E402
+
+CUES_PER_FILE = 20
+VIDEO_DURATION = 125.0
+
+def write_subtitle_files(directory, count):
+    """產生 count 個字幕檔案，每個包含 CUES_PER_FILE 條字幕"""
+    files = []
+    for n in range(count):
+        path = Path(directory) / f"ep{n:05d}.srt"
+        blocks = []
+        for i in range(CUES_PER_FILE):
+            start, end = i * 5, i * 5 + 4
+            blocks.append(f"{i + 1}\n00:{start // 60:02}:{start % 60:02},000 --> 00:{end // 60:02}:{end % 60:02},500\nline {i}\n")
+        path.write_text("\n".join(blocks), encoding="utf-8")
+        files.append(path)
+    return files
+
+class FakeProbe:
+    duration = VIDEO_DURATION
+    exact_duration = Fraction(VIDEO_DURATION)
+
+def run_case(count, mode):
+    counters = {'probe': 0, 'parse': 0}
+    original_probe_files = timeline.probe_files
+    original_shift = add_subtitles.shift_subtitle_file
+
+    def counting_probe_files(paths, jobs=None):
+        paths = list(paths)
+        counters['probe'] += len(paths)
+        return [(FakeProbe(), None) for _ in paths]
+
+    def counting_shift(path, *args, **kwargs):
+        counters['parse'] += 1
+        return original_shift(path, *args, **kwargs)
+
+    timeline.probe_files = counting_probe_files
+    # merge_subtitles 使用 add_subtitles 模組中匯入的名稱
+    add_subtitles.shift_subtitle_file = counting_shift
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            subtitle_files = write_subtitle_files(directory, count)
+            video_files = [Path(directory) / f"ep{n:05d}.mp4" for n in range(count)] if mode == "video" else None
+            output_file = Path(directory) / "merged.srt"
+            devnull = open(os.devnull, "w")
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                start = time.perf_counter()
+                add_subtitles.merge_subtitles(subtitle_files, video_files, None, output_file)
+                elapsed = time.perf_counter() - start
+            finally:
+                sys.stdout = stdout
+                devnull.close()
+    finally:
+        timeline.probe_files = original_probe_files
+        add_subtitles.shift_subtitle_file = original_shift
+    return elapsed, counters
+
+def main():
+    parser = argparse.ArgumentParser(description="merge_subtitles 偏移計算基準測試")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200, 400], help="字幕檔案數量")
+    args = parser.parse_args()
+
+    for mode in ("video", "subtitle"):
+        print(f"\n📊 偏移來源: {mode}")
+        print(f"  {'檔案數':>8} {'耗時(秒)':>10} {'每檔(毫秒)':>12} {'ffprobe':>8} {'讀取':>8}")
+        for count in args.sizes:
+            elapsed, counters = run_case(count, mode)
+            print(f"  {count:>8} {elapsed:>10.3f} {elapsed / count * 1000:>12.3f} {counters['probe']:>8} {counters['parse']:>8}")
+            if counters['parse'] != count:
+                print(f"  ❌ 字幕檔讀取次數 ({counters['parse']}) 與檔案數不符，基準測試沒有量測到合併路徑")
+                sys.exit(1)
+            if counters['probe'] > count:
+                print("  ❌ 呼叫次數超過檔案數，偏移計算不是線性的")
+                sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+字幕時間平移的微基準測試：srt 函式庫路徑 vs. 整數毫秒快速路徑
+
+產生一個包含 N 條字幕的 SRT 檔案，分別以
+  1. srt 函式庫（逐條建立 srt.Subtitle 與 timedelta 後輸出）
+  2. vidtoolbox.subtitle_shift.shift_subtitle_file（直接改寫時間軸行）
+平移並寫出，比較耗時與輸出是否一致。
+
+用法:
+    python benchmarks/bench_subtitle_shift.py --cues 1000000
+"""
+import os
+import sys
+import time
+import filecmp
+import argparse
+import tempfile
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from vidtoolbox.add_subtitles import iter_srt_file  # noqa: E402
+from vidtoolbox.subtitle_shift import format_timestamp, shift_subtitle_file  # noqa: E402
+
+OFFSET_MS = 3723456
+
+def write_input(path, cues):
+    """產生包含 cues 條字幕的 SRT 檔案"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(cues):
+            start = i * 2000
+            f.write(f"{i + 1}\n{format_timestamp(start)} --> {format_timestamp(start + 1500)}\n字幕 {i}\n\n")
+
+def shift_with_srt_library(input_path, output_path):
+    offset = timedelta(milliseconds=OFFSET_MS)
+    with open(output_path, "w", encoding="utf-8") as output:
+        for index, subtitle in enumerate(iter_srt_file(input_path), 1):
+            subtitle.start += offset
+            subtitle.end += offset
+            subtitle.index = index
+            output.write(subtitle.to_srt())
+
+def shift_with_fast_path(input_path, output_path):
+    with open(output_path, "w", encoding="utf-8") as output:
+        shift_subtitle_file(input_path, OFFSET_MS, 1, output)
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕時間平移微基準測試")
+    parser.add_argument("--cues", type=int, default=1000000, help="字幕條目數 (預設: 1000000)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "input.srt")
+        write_input(input_path, args.cues)
+        print(f"📄 輸入: {args.cues} 條字幕, {os.path.getsize(input_path) / (1024 * 1024):.1f} MB")
+
+        results = {}
+        for name, func in (("srt", shift_with_srt_library), ("fast", shift_with_fast_path)):
+            output_path = os.path.join(directory, f"{name}.srt")
+            start = time.perf_counter()
+            func(input_path, output_path)
+            results[name] = (time.perf_counter() - start, output_path)
+            elapsed = results[name][0]
+            print(f"  {name:>5}: {elapsed:8.2f} 秒  ({args.cues / elapsed:,.0f} 條/秒)")
+
+        print(f"  ⚡ 加速: {results['srt'][0] / results['fast'][0]:.1f}x")
+        if filecmp.cmp(results['srt'][1], results['fast'][1], shallow=False):
+            print("  ✅ 兩種路徑輸出一致")
+        else:
+            print("  ❌ 兩種路徑輸出不一致")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
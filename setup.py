@@ -29,12 +29,15 @@ setup(
     entry_points={
         "console_scripts": [
             "vid-info=vidtoolbox.video_info:main",
+            "vid-specs=vidtoolbox.video_specs:main",
             "vid-merge=vidtoolbox.merge_videos:main",
             "vid-timestamps=vidtoolbox.generate_timestamps:main",
             "vid-filelist=vidtoolbox.generate_file_list:main",
             "vid-quick-merge=vidtoolbox.quick_merge:main",
             "vid-mp3=vidtoolbox.convert_to_mp3:main",
             "vid-subtitles=vidtoolbox.add_subtitles:main",
+            "vid-cache=vidtoolbox.probe_cache:main",
+            "vid-watch=vidtoolbox.watch:main",
         ],
     },
 )
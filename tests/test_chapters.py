@@ -0,0 +1,55 @@
+from fractions import Fraction
+
+from vidtoolbox.chapters import build_chapters, load_chapter_starts, write_chapter_index, write_ffmetadata
+
+def test_build_chapters_accumulates_exact_durations():
+    chapters = build_chapters([
+        ("a", "a.mp4", Fraction(1001, 30000)),
+        ("b", "b.mp4", Fraction(1001, 30000)),
+        ("c", "c.mp4", Fraction(1, 3)),
+    ])
+    assert [chapter['start'] for chapter in chapters] == ["0", "1001/30000", "1001/15000"]
+    assert chapters[-1]['end'] == str(Fraction(1001, 15000) + Fraction(1, 3))
+    assert [chapter['start_ms'] for chapter in chapters] == [0, 33, 67]
+    assert chapters[-1]['end_ms'] == 400
+
+def test_build_chapters_milliseconds_are_contiguous():
+    chapters = build_chapters([(str(i), f"{i}.mp4", Fraction(1, 3)) for i in range(10)])
+    for previous, chapter in zip(chapters, chapters[1:]):
+        assert chapter['start_ms'] == previous['end_ms']
+    assert chapters[-1]['end_ms'] == 3333
+
+def test_build_chapters_zero_duration():
+    chapters = build_chapters([("a", "a.mp4", 2), ("empty", "empty.mp4", 0), ("b", "b.mp4", Fraction(3, 2))])
+    assert chapters[1]['start'] == chapters[1]['end'] == "2"
+    assert chapters[1]['start_ms'] == chapters[1]['end_ms'] == 2000
+    assert chapters[2]['start_ms'] == 2000
+    assert chapters[2]['end_ms'] == 3500
+
+def test_build_chapters_empty():
+    assert build_chapters([]) == []
+
+def test_chapter_index_round_trip(tmp_path):
+    chapters = build_chapters([("a", "a.mp4", Fraction(1, 3)), ("b", "b.mp4", 1)])
+    path = tmp_path / "chapters.json"
+    write_chapter_index(str(path), chapters)
+    assert load_chapter_starts(str(path)) == [0.0, 0.333]
+
+def test_write_ffmetadata(tmp_path):
+    chapters = build_chapters([("Intro", "intro.mp4", Fraction(1, 3)), ("Main", "main.mp4", 2)])
+    path = tmp_path / "chapters.ffmetadata"
+    write_ffmetadata(str(path), chapters)
+    assert path.read_text(encoding="utf-8") == (
+        ";FFMETADATA1\n"
+        "\n[CHAPTER]\nTIMEBASE=1/1000\nSTART=0\nEND=333\ntitle=Intro\n"
+        "\n[CHAPTER]\nTIMEBASE=1/1000\nSTART=333\nEND=2333\ntitle=Main\n"
+    )
+
+def test_write_ffmetadata_escapes_special_characters(tmp_path):
+    chapters = build_chapters([("a=b;c#d\\e\nf 中文", "x.mp4", 1)])
+    path = tmp_path / "chapters.ffmetadata"
+    write_ffmetadata(str(path), chapters)
+    lines = path.read_text(encoding="utf-8").split("\n")
+    title_index = next(i for i, line in enumerate(lines) if line.startswith("title="))
+    # 換行以反斜線跳脫後延續到下一行
+    assert lines[title_index:title_index + 2] == ["title=a\\=b\\;c\\#d\\\\e\\", "f 中文"]
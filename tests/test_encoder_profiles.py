@@ -0,0 +1,88 @@
+import json
+import os
+
+import pytest
+
+from vidtoolbox import encoder_profiles
+from vidtoolbox.encoder_profiles import BUILTIN_PROFILES, DEFAULT_PROFILE, EncoderProfile, get_profile, load_profiles
+
+@pytest.fixture(autouse=True)
+def isolated_config(tmp_path, monkeypatch):
+    # 不讀取使用者的設定檔
+    monkeypatch.setenv("VIDTOOLBOX_CONFIG", str(tmp_path / "missing.json"))
+
+def write_config(path, config, mtime_offset=0):
+    path.write_text(json.dumps(config), encoding="utf-8")
+    if mtime_offset:
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + mtime_offset * 10 ** 9))
+    return str(path)
+
+def test_builtin_profiles():
+    assert get_profile() is BUILTIN_PROFILES[DEFAULT_PROFILE]
+    fast = get_profile("fast")
+    assert fast.preset == "veryfast"
+    assert fast.threads == "auto"
+    assert get_profile("copy").is_copy
+
+def test_profile_instance_is_returned_as_is():
+    profile = EncoderProfile("custom", crf=30)
+    assert get_profile(profile) is profile
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        get_profile("no-such-profile")
+
+def test_missing_explicit_config(tmp_path):
+    with pytest.raises(ValueError):
+        get_profile(None, str(tmp_path / "missing.json"))
+
+def test_config_path_overrides_builtin(tmp_path):
+    config = write_config(tmp_path / "profiles.json", {
+        "default": "nvenc",
+        "profiles": {
+            "fast": {"crf": 20},
+            "nvenc": {"base": "fast", "video_codec": "h264_nvenc", "preset": "p5", "crf": None,
+                      "extra_args": ["-cq", 23]},
+        },
+    })
+    fast = get_profile("fast", config)
+    assert (fast.crf, fast.preset) == (20, "veryfast")
+    assert BUILTIN_PROFILES['fast'].crf == 18
+    nvenc = get_profile(None, config)
+    assert nvenc.name == "nvenc"
+    assert nvenc.video_args() == ["-c:v", "h264_nvenc", "-preset", "p5", "-threads", str(os.cpu_count() or 1), "-cq", "23"]
+
+def test_environment_config(tmp_path, monkeypatch):
+    config = write_config(tmp_path / "env.json", {"default": "x265"})
+    monkeypatch.setenv("VIDTOOLBOX_CONFIG", config)
+    assert get_profile().name == "x265"
+
+def test_invalid_config(tmp_path):
+    with pytest.raises(ValueError):
+        get_profile(None, write_config(tmp_path / "a.json", {"profiles": {"bad": {"crf": 99}}}))
+    with pytest.raises(ValueError):
+        get_profile(None, write_config(tmp_path / "b.json", {"profiles": {"bad": {"unknown": 1}}}))
+    with pytest.raises(ValueError):
+        get_profile(None, write_config(tmp_path / "c.json", {"default": "missing"}))
+
+def test_config_is_read_once_until_changed(tmp_path, monkeypatch):
+    path = tmp_path / "profiles.json"
+    config = write_config(path, {"profiles": {"fast": {"crf": 20}}})
+    reads = []
+    read_config = encoder_profiles._read_config
+    monkeypatch.setattr(encoder_profiles, "_read_config", lambda path: reads.append(path) or read_config(path))
+
+    for _ in range(3):
+        assert get_profile("fast", config).crf == 20
+    assert len(reads) == 1
+
+    write_config(path, {"profiles": {"fast": {"crf": 24}}}, mtime_offset=10)
+    assert get_profile("fast", config).crf == 24
+    assert len(reads) == 2
+
+def test_cached_profiles_are_not_shared(tmp_path):
+    config = write_config(tmp_path / "profiles.json", {})
+    profiles, _ = load_profiles(config)
+    profiles.pop("fast")
+    assert "fast" in load_profiles(config)[0]
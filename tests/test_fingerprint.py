@@ -0,0 +1,56 @@
+import os
+import shutil
+
+from vidtoolbox.fingerprint import SAMPLE_SIZE, content_digest, fingerprint, sample_offsets
+
+SIZE = 16 * SAMPLE_SIZE
+# 不在開頭、中間、結尾任何一個取樣區塊內的位置
+UNSAMPLED_OFFSET = 4 * SAMPLE_SIZE
+
+def write_file(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+def edit_in_place(path, offset, data):
+    """同大小改寫，並讓修改時間一定不同"""
+    st = os.stat(path)
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+def test_sample_offsets():
+    assert sample_offsets(0) == [(0, 0)]
+    assert sample_offsets(3 * SAMPLE_SIZE) == [(0, 3 * SAMPLE_SIZE)]
+    offsets = sample_offsets(SIZE)
+    assert offsets == [(0, SAMPLE_SIZE), ((SIZE - SAMPLE_SIZE) // 2, SAMPLE_SIZE), (SIZE - SAMPLE_SIZE, SAMPLE_SIZE)]
+    assert all(not offset <= UNSAMPLED_OFFSET < offset + length for offset, length in offsets)
+
+def test_fingerprint_ignores_path_and_mtime(tmp_path):
+    path = write_file(tmp_path / "a.mp4", os.urandom(SIZE))
+    copy = str(tmp_path / "b.mp4")
+    shutil.copyfile(path, copy)
+    os.utime(copy, ns=(0, 10 ** 9))
+    assert fingerprint(path) == fingerprint(copy)
+    assert content_digest(path) == content_digest(copy)
+
+def test_fingerprint_detects_sampled_edit(tmp_path):
+    path = write_file(tmp_path / "a.mp4", bytes(SIZE))
+    before = fingerprint(path)
+    edit_in_place(path, SIZE - 1, b"\x01")
+    assert fingerprint(path) != before
+
+def test_unsampled_edit_needs_content_digest(tmp_path):
+    path = write_file(tmp_path / "a.mp4", bytes(SIZE))
+    sampled, digest = fingerprint(path), content_digest(path)
+    edit_in_place(path, UNSAMPLED_OFFSET, b"\x01")
+    # 取樣指紋看不到這個修改，完整雜湊可以
+    assert fingerprint(path) == sampled
+    assert content_digest(path) != digest
+
+def test_small_file_is_hashed_entirely(tmp_path):
+    path = write_file(tmp_path / "a.srt", b"a" * 1000)
+    before = fingerprint(path)
+    edit_in_place(path, 500, b"b")
+    assert fingerprint(path) != before
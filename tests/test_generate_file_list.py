@@ -0,0 +1,23 @@
+import pytest
+
+from vidtoolbox.generate_file_list import generate_file_list, read_file_list
+
+def make_videos(tmp_path, *names):
+    for name in names:
+        (tmp_path / name).write_bytes(b"")
+
+def test_lists_matching_files_in_order(tmp_path):
+    make_videos(tmp_path, "b.mp4", "a.mp4", "notes.txt")
+    file_list_path = generate_file_list(str(tmp_path), assume_yes=True)
+    assert read_file_list(file_list_path) == [str(tmp_path / "a.mp4"), str(tmp_path / "b.mp4")]
+
+def test_excludes_previous_and_partial_outputs(tmp_path):
+    make_videos(tmp_path, "a.mp4", "b.mp4", "output.mp4", "output.part.mp4")
+    file_list_path = generate_file_list(str(tmp_path), assume_yes=True,
+                                        exclude={"output.mp4", "output.part.mp4"})
+    assert read_file_list(file_list_path) == [str(tmp_path / "a.mp4"), str(tmp_path / "b.mp4")]
+
+def test_nothing_left_after_exclusion(tmp_path):
+    make_videos(tmp_path, "output.mp4")
+    with pytest.raises(FileNotFoundError):
+        generate_file_list(str(tmp_path), assume_yes=True, exclude={"output.mp4"})
@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+
+from vidtoolbox.fingerprint import SAMPLE_SIZE
+from vidtoolbox.journal import BatchJournal, atomic_output_path
+
+SIZE = 16 * SAMPLE_SIZE
+UNSAMPLED_OFFSET = 4 * SAMPLE_SIZE
+
+def make_file(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(os.urandom(SIZE))
+    return str(path)
+
+def touch(path, seconds=10):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 10 ** 9))
+
+def edit_unsampled(path):
+    with open(path, "r+b") as f:
+        f.seek(UNSAMPLED_OFFSET)
+        original = f.read(1)
+        f.seek(UNSAMPLED_OFFSET)
+        f.write(bytes([original[0] ^ 0xFF]))
+    touch(path)
+
+def setup_done(tmp_path, full_digest=True):
+    inputs = [make_file(tmp_path, "a.mp4"), make_file(tmp_path, "b.mp4")]
+    output = make_file(tmp_path, "out.mp4")
+    journal = BatchJournal(tmp_path / "journal.jsonl")
+    journal.record_done(output, inputs, output, full_digest)
+    return journal, inputs, output
+
+def test_atomic_output_path_keeps_extension():
+    assert atomic_output_path("/a/b.mp3") == "/a/b.part.mp3"
+
+def test_is_done(tmp_path):
+    journal, inputs, output = setup_done(tmp_path)
+    assert journal.status(output) == 'done'
+    assert journal.is_done(output, inputs, output)
+    # 重新讀取日誌後結果相同
+    assert BatchJournal(tmp_path / "journal.jsonl").is_done(output, inputs, output)
+
+def test_touched_input_and_output_are_still_done(tmp_path):
+    journal, inputs, output = setup_done(tmp_path)
+    touch(inputs[0])
+    touch(output)
+    assert journal.is_done(output, inputs, output)
+
+def test_record_without_full_digest(tmp_path):
+    journal, inputs, output = setup_done(tmp_path, full_digest=False)
+    record = journal._records[os.path.abspath(output)]
+    assert all('sha256' not in entry for entry in record['inputs'] + [record['output_identity']])
+    assert journal.is_done(output, inputs, output)
+    # 沒有完整雜湊時，修改時間改變就重新處理
+    touch(inputs[0])
+    assert not journal.is_done(output, inputs, output)
+
+def test_output_restored_by_copy_is_still_done(tmp_path):
+    journal, inputs, output = setup_done(tmp_path)
+    backup = str(tmp_path / "backup.mp4")
+    shutil.copy(output, backup)
+    os.remove(output)
+    shutil.copy(backup, output)
+    touch(output)
+    assert journal.is_done(output, inputs, output)
+
+def test_same_size_input_edit_is_not_done(tmp_path):
+    journal, inputs, output = setup_done(tmp_path)
+    edit_unsampled(inputs[1])
+    assert not journal.is_done(output, inputs, output)
+
+def test_same_size_output_edit_is_not_done(tmp_path):
+    journal, inputs, output = setup_done(tmp_path)
+    edit_unsampled(output)
+    assert not journal.is_done(output, inputs, output)
+
+def test_changed_input_list_is_not_done(tmp_path):
+    journal, inputs, output = setup_done(tmp_path)
+    copy = str(tmp_path / "c.mp4")
+    shutil.copy(inputs[1], copy)
+    assert not journal.is_done(output, [inputs[0], copy], output)
+    assert not journal.is_done(output, inputs[:1], output)
+
+def test_missing_output_is_not_done(tmp_path):
+    journal, inputs, output = setup_done(tmp_path)
+    os.remove(output)
+    assert not journal.is_done(output, inputs, output)
+
+def test_failed_record_overrides_done(tmp_path):
+    journal, inputs, output = setup_done(tmp_path)
+    journal.record_failed(output, inputs, "ffmpeg exited with 1")
+    assert journal.status(output) == 'failed'
+    assert not journal.is_done(output, inputs, output)
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    journal, inputs, output = setup_done(tmp_path)
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"key": "')
+    assert BatchJournal(journal.path).is_done(output, inputs, output)
+
+def test_old_record_without_output_identity(tmp_path):
+    journal, inputs, output = setup_done(tmp_path)
+    with open(journal.path, "r", encoding="utf-8") as f:
+        record = json.loads(f.readline())
+    del record['output_identity']
+    with open(journal.path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    journal = BatchJournal(journal.path)
+    assert journal.is_done(output, inputs, output)
+    with open(output, "ab") as f:
+        f.write(b"x")
+    assert not journal.is_done(output, inputs, output)
@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+
+from vidtoolbox.fingerprint import SAMPLE_SIZE
+from vidtoolbox.manifest import file_identity, is_unchanged, load_manifest, manifest_path, write_manifest
+
+SIZE = 16 * SAMPLE_SIZE
+UNSAMPLED_OFFSET = 4 * SAMPLE_SIZE
+
+def make_file(tmp_path, name="a.mp4"):
+    path = tmp_path / name
+    path.write_bytes(os.urandom(SIZE))
+    return str(path)
+
+def touch(path, seconds=10):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 10 ** 9))
+
+def test_file_identity(tmp_path):
+    path = make_file(tmp_path)
+    identity = file_identity(path)
+    st = os.stat(path)
+    assert identity['size'] == SIZE
+    assert identity['mtime_ns'] == st.st_mtime_ns
+    assert identity['inode'] == st.st_ino
+    # 預設不讀取整個檔案
+    assert set(identity) == {'size', 'mtime_ns', 'inode', 'fingerprint'}
+    assert set(file_identity(path, full=True)) == {'size', 'mtime_ns', 'inode', 'fingerprint', 'sha256'}
+    assert set(file_identity(path, digest=False)) == {'size', 'mtime_ns', 'inode'}
+
+def test_file_identity_reuses_previous_hashes(tmp_path):
+    path = make_file(tmp_path)
+    previous = dict(file_identity(path), fingerprint="f", sha256="s")
+    assert file_identity(path, previous=previous, full=True)['sha256'] == "s"
+    assert file_identity(path, previous=previous)['fingerprint'] == "f"
+    touch(path)
+    assert file_identity(path, previous=previous, full=True)['sha256'] != "s"
+
+def test_unchanged_file(tmp_path):
+    path = make_file(tmp_path)
+    assert is_unchanged(file_identity(path), path)
+
+def test_touch_only_is_unchanged(tmp_path):
+    path = make_file(tmp_path)
+    entry = file_identity(path, full=True)
+    touch(path)
+    assert is_unchanged(entry, path)
+
+def test_touch_without_full_digest_is_changed(tmp_path):
+    # 取樣指紋相同也不足以判斷為相同
+    path = make_file(tmp_path)
+    entry = file_identity(path)
+    touch(path)
+    assert not is_unchanged(entry, path)
+
+def test_copy_to_new_path_is_unchanged(tmp_path):
+    path = make_file(tmp_path)
+    entry = file_identity(path, full=True)
+    copy = str(tmp_path / "copy.mp4")
+    shutil.copy(path, copy)
+    touch(copy)
+    assert os.stat(copy).st_ino != entry['inode']
+    assert is_unchanged(entry, copy)
+
+def test_same_size_edit_outside_samples_is_changed(tmp_path):
+    path = make_file(tmp_path)
+    entry = file_identity(path, full=True)
+    with open(path, "r+b") as f:
+        f.seek(UNSAMPLED_OFFSET)
+        original = f.read(1)
+        f.seek(UNSAMPLED_OFFSET)
+        f.write(bytes([original[0] ^ 0xFF]))
+    touch(path)
+    assert not is_unchanged(entry, path)
+
+def test_size_change_and_missing_file(tmp_path):
+    path = make_file(tmp_path)
+    entry = file_identity(path)
+    with open(path, "ab") as f:
+        f.write(b"x")
+    assert not is_unchanged(entry, path)
+    assert not is_unchanged(entry, str(tmp_path / "missing.mp4"))
+
+def test_entry_without_hashes_needs_same_stat(tmp_path):
+    path = make_file(tmp_path)
+    entry = file_identity(path, digest=False)
+    assert is_unchanged(entry, path)
+    touch(path)
+    assert not is_unchanged(entry, path)
+
+def test_manifest_round_trip(tmp_path):
+    path = manifest_path(str(tmp_path / "show.mp4"))
+    assert path == str(tmp_path / "show.manifest.json")
+    assert load_manifest(path) is None
+    write_manifest(path, {'files': ['a.mp4']})
+    assert load_manifest(path) == {'files': ['a.mp4'], 'version': 1}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({'version': 0}, f)
+    assert load_manifest(path) is None
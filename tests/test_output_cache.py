@@ -0,0 +1,103 @@
+import itertools
+import os
+
+import pytest
+
+from vidtoolbox import output_cache
+from vidtoolbox.output_cache import OutputCache, command_key, output_cache_key
+
+@pytest.fixture
+def clock(monkeypatch):
+    # 每次呼叫前進一秒，讓 LRU 順序固定
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(output_cache.time, "time", lambda: float(next(ticks)))
+
+def make_cache(tmp_path, max_bytes=10 ** 6):
+    return OutputCache(str(tmp_path / "cache"), max_bytes)
+
+def make_output(tmp_path, name, size=100, fill=b"x"):
+    path = tmp_path / name
+    path.write_bytes(fill * size)
+    return str(path)
+
+def test_command_key_ignores_paths(tmp_path):
+    a = make_output(tmp_path, "a.mp4", fill=b"a")
+    copy = make_output(tmp_path, "copy.mp4", fill=b"a")
+    cmd = ["ffmpeg", "-i", a, "-c:a", "libmp3lame", str(tmp_path / "a.part.mp3")]
+    copy_cmd = ["ffmpeg", "-i", copy, "-c:a", "libmp3lame", str(tmp_path / "b.part.mp3")]
+    assert command_key(cmd, [a], tmp_path / "a.part.mp3") == command_key(copy_cmd, [copy], tmp_path / "b.part.mp3")
+
+def test_command_key_depends_on_content_and_arguments(tmp_path):
+    a = make_output(tmp_path, "a.mp4", fill=b"a")
+    output = tmp_path / "a.part.mp3"
+    key = command_key(["ffmpeg", "-i", a, "-q:a", "2", str(output)], [a], output)
+    assert command_key(["ffmpeg", "-i", a, "-q:a", "4", str(output)], [a], output) != key
+    make_output(tmp_path, "a.mp4", fill=b"b")
+    assert command_key(["ffmpeg", "-i", a, "-q:a", "2", str(output)], [a], output) != key
+
+def test_output_cache_key_disabled(tmp_path):
+    a = make_output(tmp_path, "a.mp4")
+    assert output_cache_key(["ffmpeg"], [a], "out.mp3", use_cache=False) is None
+    assert output_cache_key(["ffmpeg"], [str(tmp_path / "missing.mp4")], "out.mp3", use_cache=True) is None
+
+def test_hit_and_miss(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.fetch("k1", str(tmp_path / "miss.mp3")) is None
+    assert not (tmp_path / "miss.mp3").exists()
+
+    output = make_output(tmp_path, "out.mp3", fill=b"o")
+    assert cache.store("k1", output)
+    restored = tmp_path / "restored.mp3"
+    assert cache.fetch("k1", str(restored)) in ("reflink", "hardlink", "copy")
+    assert restored.read_bytes() == b"o" * 100
+    stats = cache.stats()
+    assert (stats['entries'], stats['bytes'], stats['hits'], stats['misses']) == (1, 100, 1, 1)
+
+def test_modified_object_is_invalidated(tmp_path):
+    cache = make_cache(tmp_path)
+    output = make_output(tmp_path, "out.mp3")
+    cache.store("k1", output)
+    object_path = cache._object_path("k1.mp3")
+    with open(object_path, "ab") as f:
+        f.write(b"edited")
+    assert cache.fetch("k1", str(tmp_path / "restored.mp3")) is None
+    assert not os.path.exists(object_path)
+    assert cache.stats()['entries'] == 0
+
+def test_missing_object_is_a_miss(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("k1", make_output(tmp_path, "out.mp3"))
+    os.remove(cache._object_path("k1.mp3"))
+    assert cache.fetch("k1", str(tmp_path / "restored.mp3")) is None
+    assert cache.stats()['entries'] == 0
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    cache = make_cache(tmp_path, max_bytes=250)
+    for key in ("k1", "k2"):
+        cache.store(key, make_output(tmp_path, f"{key}.mp3"))
+    # k1 最近被使用，超過上限時先淘汰 k2
+    assert cache.fetch("k1", str(tmp_path / "restored.mp3"))
+    cache.store("k3", make_output(tmp_path, "k3.mp3"))
+    assert cache.stats()['entries'] == 2
+    assert cache.fetch("k2", str(tmp_path / "k2-restored.mp3")) is None
+    assert cache.fetch("k1", str(tmp_path / "k1-restored.mp3"))
+    assert cache.fetch("k3", str(tmp_path / "k3-restored.mp3"))
+
+def test_output_larger_than_cache_is_not_stored(tmp_path, clock):
+    cache = make_cache(tmp_path, max_bytes=150)
+    cache.store("small", make_output(tmp_path, "small.mp3"))
+    assert not cache.store("large", make_output(tmp_path, "large.mp3", size=200))
+    assert not os.path.exists(cache._object_path("large.mp3"))
+    # 既有的項目不會被淘汰
+    assert cache.stats()['entries'] == 1
+    assert cache.fetch("small", str(tmp_path / "restored.mp3"))
+
+def test_prune_and_clear(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    for key in ("k1", "k2", "k3"):
+        cache.store(key, make_output(tmp_path, f"{key}.mp3"))
+    assert cache.prune(max_bytes=150) == 2
+    assert cache.fetch("k3", str(tmp_path / "restored.mp3"))
+    cache.clear()
+    stats = cache.stats()
+    assert (stats['entries'], stats['hits'], stats['misses']) == (0, 0, 0)
@@ -0,0 +1,100 @@
+import io
+
+from vidtoolbox.subtitle_shift import format_timestamp, parse_timing_line, shift_subtitle_file, write_header
+
+SRT = (
+    "1\n"
+    "00:00:01,000 --> 00:00:02,500\n"
+    "Hello\n"
+    "\n"
+    "2\n"
+    "00:00:03,000 --> 00:00:04,000\n"
+    "World\n"
+    "second line\n"
+)
+
+def write_subtitle(tmp_path, name, text, newline=None, encoding="utf-8"):
+    path = tmp_path / name
+    with open(path, "w", encoding=encoding, newline=newline) as f:
+        f.write(text)
+    return str(path)
+
+def shift(path, offset_ms, start_index=1, output_format="srt"):
+    output = io.StringIO()
+    result = shift_subtitle_file(path, offset_ms, start_index, output, output_format)
+    return output.getvalue(), result
+
+def test_parse_timing_line_srt_and_vtt():
+    assert parse_timing_line("00:00:01,000 --> 00:00:02,500") == (1000, 2500, "")
+    assert parse_timing_line("01:02:03.004 --> 01:02:04.005") == (3723004, 3724005, "")
+    # WebVTT 可省略小時，並可附加位置設定
+    assert parse_timing_line("00:01.000 --> 00:02.000 align:start\n") == (1000, 2000, " align:start")
+
+def test_parse_timing_line_rejects_other_lines():
+    assert parse_timing_line("1") is None
+    assert parse_timing_line("Hello --> World") is None
+    assert parse_timing_line("") is None
+
+def test_format_timestamp_clamps_negative():
+    assert format_timestamp(3723004) == "01:02:03,004"
+    assert format_timestamp(3723004, "vtt") == "01:02:03.004"
+    assert format_timestamp(-5) == "00:00:00,000"
+
+def test_shift_applies_offset(tmp_path):
+    path = write_subtitle(tmp_path, "a.srt", SRT)
+    text, _ = shift(path, 60000)
+    assert "00:01:01,000 --> 00:01:02,500\nHello\n" in text
+    assert "00:01:03,000 --> 00:01:04,000\nWorld\nsecond line\n" in text
+
+def test_shift_renumbers_from_start_index(tmp_path):
+    path = write_subtitle(tmp_path, "a.srt", SRT)
+    text, result = shift(path, 0, start_index=7)
+    assert text.startswith("7\n00:00:01,000")
+    assert "\n8\n00:00:03,000" in text
+    assert result == (9, 4000, 2)
+
+def test_shift_returns_counts_with_skipped_cues(tmp_path):
+    # 開始 >= 結束與空白內容的字幕被略過，但仍計入讀到的字幕數與最後結束時間
+    source = SRT + (
+        "\n3\n00:00:05,000 --> 00:00:05,000\nempty duration\n"
+        "\n4\n00:00:06,000 --> 00:00:07,000\n   \n"
+    )
+    path = write_subtitle(tmp_path, "a.srt", source)
+    text, result = shift(path, 0)
+    assert "empty duration" not in text
+    assert result == (3, 7000, 4)
+
+def test_shift_converts_srt_to_vtt(tmp_path):
+    path = write_subtitle(tmp_path, "a.srt", SRT)
+    output = io.StringIO()
+    write_header(output, "vtt")
+    shift_subtitle_file(path, 1000, 1, output, "vtt")
+    text = output.getvalue()
+    assert text.startswith("WEBVTT\n\n1\n00:00:02.000 --> 00:00:03.500\nHello\n")
+
+def test_shift_reads_vtt_input(tmp_path):
+    source = (
+        "WEBVTT\n\n"
+        "NOTE comment\n\n"
+        "00:01.000 --> 00:02.000 align:start\nHi\n"
+    )
+    path = write_subtitle(tmp_path, "a.vtt", source)
+    srt_text, result = shift(path, 0)
+    # SRT 輸出捨棄 WebVTT 的位置設定
+    assert srt_text == "1\n00:00:01,000 --> 00:00:02,000\nHi\n\n"
+    assert result == (2, 2000, 1)
+    vtt_text, _ = shift(path, 0, output_format="vtt")
+    assert "00:00:01.000 --> 00:00:02.000 align:start\n" in vtt_text
+
+def test_shift_handles_crlf_and_bom(tmp_path):
+    path = write_subtitle(tmp_path, "a.srt", SRT.replace("\n", "\r\n"), newline="", encoding="utf-8-sig")
+    text, result = shift(path, 0)
+    assert text.startswith("1\n00:00:01,000 --> 00:00:02,500\nHello\n")
+    assert "\ufeff" not in text and "\r" not in text
+    assert result == (3, 4000, 2)
+
+def test_shift_handles_missing_trailing_newline(tmp_path):
+    path = write_subtitle(tmp_path, "a.srt", SRT.rstrip("\n"))
+    text, result = shift(path, 0)
+    assert text.endswith("World\nsecond line\n\n")
+    assert result == (3, 4000, 2)
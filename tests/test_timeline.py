@@ -0,0 +1,47 @@
+from fractions import Fraction
+
+from vidtoolbox.timeline import Segment, Timeline
+
+def make_timeline(*durations):
+    return Timeline(Segment(index, f"/videos/{index:02d}.mp4", Fraction(0), Fraction(duration))
+                    for index, duration in enumerate(durations))
+
+def test_offsets_are_exact_prefix_sums():
+    timeline = make_timeline(Fraction(1, 3), Fraction(1, 3), Fraction(1, 3))
+    assert timeline.offsets == [0, Fraction(1, 3), Fraction(2, 3), 1]
+    assert timeline.total_duration == 1
+    assert [segment.start for segment in timeline] == timeline.offsets[:-1]
+    assert timeline[2].end == 1
+
+def test_offsets_do_not_accumulate_float_error():
+    timeline = make_timeline(*[Fraction(1001, 30000)] * 30000)
+    assert timeline.total_duration == 1001
+
+def test_segment_at_fraction_boundaries():
+    timeline = make_timeline(Fraction(1, 3), Fraction(1, 3), Fraction(1, 3))
+    assert timeline.segment_at(0).index == 0
+    assert timeline.segment_at(Fraction(1, 3) - Fraction(1, 10 ** 9)).index == 0
+    # 邊界時間屬於下一個片段
+    assert timeline.segment_at(Fraction(1, 3)).index == 1
+    assert timeline.segment_at(Fraction(2, 3)).index == 2
+    assert timeline.segment_at(0.5).index == 1
+
+def test_segment_at_out_of_range():
+    timeline = make_timeline(5, 5)
+    assert timeline.segment_at(-0.001) is None
+    assert timeline.segment_at(10) is None
+    assert make_timeline().segment_at(0) is None
+
+def test_segment_at_skips_zero_duration_segments():
+    timeline = make_timeline(0, 5, 0, 0, 5, 0)
+    assert timeline.segment_at(0).index == 1
+    assert timeline.segment_at(Fraction(9, 2)).index == 1
+    assert timeline.segment_at(5).index == 4
+    assert timeline.segment_at(Fraction(99, 10)).index == 4
+
+def test_chapters_match_offsets():
+    timeline = make_timeline(Fraction(1, 3), 0, Fraction(2, 3))
+    chapters = timeline.chapters()
+    assert [chapter['title'] for chapter in chapters] == ["00", "01", "02"]
+    assert [chapter['start'] for chapter in chapters] == [str(offset) for offset in timeline.offsets[:-1]]
+    assert chapters[1]['start_ms'] == chapters[1]['end_ms'] == 333
@@ -13,3 +13,7 @@ from .quick_merge import quick_merge_videos
 from .video_specs import check_video_compatibility, get_video_specs
 from .convert_to_mp3 import convert_video_to_mp3, batch_convert_to_mp3, get_quality_presets
 from .add_subtitles import merge_subtitles, batch_merge_subtitles
+from .probe import probe_file, probe_files, ProbeResult, set_cache_enabled
+from .probe_cache import ProbeCache
+from .timeline import Timeline
+from .encoder_profiles import EncoderProfile, get_profile
@@ -1,17 +1,20 @@
 import os
 import argparse
-import subprocess
 import re
 from pathlib import Path
 import srt
 from datetime import timedelta
+from .probe import probe_file, set_cache_enabled
+from .timeline import Timeline, list_media_files
+from .chapters import load_chapter_starts
+from .subtitle_shift import SUBTITLE_FORMATS, shift_subtitle_file, write_header
+from .process import add_trace_argument, enable_trace
 
 def get_subtitle_files(directory, pattern="*.srt"):
-    subtitle_dir = Path(directory)
-    subtitle_files = list(subtitle_dir.glob(pattern))
+    subtitle_files = list_media_files(directory, pattern)
     if not subtitle_files:
         raise FileNotFoundError(f"在目錄 {directory} 中找不到符合 {pattern} 的檔案")
-    return sorted(subtitle_files)
+    return subtitle_files
 
 def parse_srt_file(file_path):
     try:
@@ -62,100 +65,140 @@ def get_duration_from_timestamps(timestamps, index):
 
 def get_video_duration(file_path):
     try:
-        cmd = [
-            'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-            '-of', 'csv=p=0', str(file_path)
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-        else:
-            print(f"無法獲取影片時長 {file_path}")
-            return 0.0
+        return probe_file(file_path).duration
     except Exception as e:
         print(f"獲取影片時長失敗 {file_path}: {e}")
         return 0.0
 
-def merge_subtitles(subtitle_files, video_files=None, timestamps_file=None, output_file=None, use_subtitle_duration=True):
+def iter_srt_file(file_path):
+    """
+    逐條讀取字幕檔案，不一次載入整個檔案
+
+    以空白行切分字幕區塊，每次只解析一個區塊；無法解析的區塊會被略過。
+
+    Args:
+        file_path (str): 字幕檔案路徑
+
+    Yields:
+        srt.Subtitle: 字幕條目
+    """
+    def parse_block(lines):
+        try:
+            return list(srt.parse("".join(lines)))
+        except srt.SRTParseError as e:
+            print(f"略過無法解析的字幕區塊 {file_path}: {e}")
+            return []
+
+    block = []
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            if line.strip():
+                block.append(line)
+            elif block:
+                yield from parse_block(block)
+                block = []
+    if block:
+        yield from parse_block(block)
+
+def merge_subtitles(subtitle_files, video_files=None, timestamps_file=None, output_file=None, use_subtitle_duration=True, jobs=None, output_format=None, timeline=None):
     print(f"開始合併字幕檔案...")
     if not subtitle_files:
         print("沒有字幕檔案可合併")
         return False
+    # 輸出格式：未指定時依輸出副檔名判斷，預設 SRT
+    if output_format is None:
+        output_format = 'vtt' if output_file is not None and Path(output_file).suffix.lower() == '.vtt' else 'srt'
+    if output_format not in SUBTITLE_FORMATS:
+        print(f"不支援的字幕格式: {output_format}")
+        return False
     if output_file is None:
         first_file = Path(subtitle_files[0])
-        output_file = first_file.parent / f"{first_file.parent.name}_merged.srt"
+        output_file = first_file.parent / f"{first_file.parent.name}_merged.{output_format}"
     
-    # 解析時間軸檔案
+    # 解析時間軸檔案（章節索引 JSON 為精確毫秒，文字檔只到秒）
     timestamps = None
     if timestamps_file and timestamps_file.exists():
-        timestamps = parse_timestamps_file(timestamps_file)
+        if timestamps_file.suffix.lower() == '.json':
+            try:
+                timestamps = load_chapter_starts(timestamps_file)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"解析章節索引失敗 {timestamps_file}: {e}")
+        else:
+            timestamps = parse_timestamps_file(timestamps_file)
         if timestamps:
             print(f"✅ 找到時間軸檔案，包含 {len(timestamps)} 個時間點")
             print(f"時間點: {[f'{t//60:.0f}:{t%60:02.0f}' for t in timestamps]}")
     
-    merged_subtitles = []
-    current_index = 1
+    # 影片時間軸：可直接傳入已建立的 Timeline，否則每個影片只探測一次並以前綴和計算偏移
+    if timeline is not None:
+        video_files = timeline.files
+    elif video_files and not (timestamps and len(timestamps) >= len(subtitle_files)):
+        timeline = Timeline.from_files(video_files[:len(subtitle_files)], jobs)
+        for segment in timeline.failures:
+            print(f"獲取影片時長失敗 {segment.path}: {segment.error}")
     
-    for i, subtitle_file in enumerate(subtitle_files):
-        subtitle_list = parse_srt_file(subtitle_file)
-        if not subtitle_list:
-            print(f"跳過空字幕檔案: {subtitle_file.name}")
-            continue
-        
-        # 計算時間偏移
-        time_offset = timedelta(seconds=0)
-        if timestamps and i < len(timestamps):
-            # 使用時間軸檔案：直接使用對應的開始時間
-            time_offset = timedelta(seconds=timestamps[i])
-            print(f"✅ 字幕檔案 {i+1} ({subtitle_file.name}) 偏移到: {timestamps[i]//60:.0f}:{timestamps[i]%60:02.0f}")
-        elif video_files and i < len(video_files):
-            # 使用影片時長：累積偏移
-            for j in range(i):
-                video_duration = get_video_duration(video_files[j])
-                if video_duration > 0:
-                    time_offset += timedelta(seconds=video_duration)
-            print(f"✅ 使用影片時長計算偏移: {time_offset.total_seconds():.2f} 秒")
-        elif use_subtitle_duration and i > 0:
-            # 使用字幕時長：累積偏移
-            for j in range(i):
-                prev_subtitle_list = parse_srt_file(subtitle_files[j])
-                prev_subtitle_duration = get_subtitle_duration(prev_subtitle_list)
-                time_offset += timedelta(seconds=prev_subtitle_duration)
-            print(f"⚠️  使用字幕時長計算偏移: {time_offset.total_seconds():.2f} 秒")
-        
-        # 處理字幕
-        for subtitle in subtitle_list:
-            subtitle.start += time_offset
-            subtitle.end += time_offset
-            subtitle.index = current_index
-            current_index += 1
-            merged_subtitles.append(subtitle)
+    current_index = 1
+    # 字幕時長的累積和：每個字幕檔案只讀取一次
+    subtitle_offset = 0.0
     
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(srt.compose(merged_subtitles))
+        # 邊讀邊寫：記憶體用量只取決於單一字幕條目的大小
+        with open(output_file, 'w', encoding='utf-8') as output:
+            write_header(output, output_format)
+            for i, subtitle_file in enumerate(subtitle_files):
+                # 計算時間偏移
+                time_offset = timedelta(seconds=0)
+                if timestamps and i < len(timestamps):
+                    # 使用時間軸檔案：直接使用對應的開始時間
+                    time_offset = timedelta(seconds=timestamps[i])
+                    print(f"✅ 字幕檔案 {i+1} ({subtitle_file.name}) 偏移到: {timestamps[i]//60:.0f}:{timestamps[i]%60:02.0f}")
+                elif timeline is not None and i < len(timeline):
+                    # 使用影片時長：時間軸上的累積開始時間
+                    time_offset = timedelta(seconds=float(timeline.start_of(i)))
+                    print(f"✅ 使用影片時長計算偏移: {time_offset.total_seconds():.2f} 秒")
+                elif use_subtitle_duration and i > 0:
+                    # 使用字幕時長：累積偏移
+                    time_offset = timedelta(seconds=subtitle_offset)
+                    print(f"⚠️  使用字幕時長計算偏移: {time_offset.total_seconds():.2f} 秒")
+                
+                # 處理字幕：以整數毫秒改寫時間軸行，不建立字幕物件
+                offset_ms = round(time_offset.total_seconds() * 1000)
+                cue_count = 0
+                try:
+                    current_index, last_end, cue_count = shift_subtitle_file(
+                        subtitle_file, offset_ms, current_index, output, output_format
+                    )
+                    if last_end is not None:
+                        subtitle_offset += last_end / 1000
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"解析字幕檔案失敗 {subtitle_file}: {e}")
+                
+                if cue_count == 0:
+                    print(f"跳過空字幕檔案: {subtitle_file.name}")
+        
         print(f"字幕合併完成: {output_file}")
-        print(f"總字幕條目數: {len(merged_subtitles)}")
+        print(f"總字幕條目數: {current_index - 1}")
         return True
     except Exception as e:
         print(f"寫入字幕檔案失敗: {e}")
         return False
 
-def batch_merge_subtitles(directory, pattern="*.srt", video_pattern="*.mp4", timestamps_pattern="*.txt", output_file=None, confirm_order=True):
+def batch_merge_subtitles(directory, pattern="*.srt", video_pattern="*.mp4", timestamps_pattern="*.txt", output_file=None, confirm_order=True, output_format=None):
     print(f"開始批次合併字幕...")
     try:
         subtitle_files = get_subtitle_files(directory, pattern)
         video_files = None
         timestamps_file = None
         
-        # 尋找時間軸檔案
-        try:
-            timestamps_files = get_subtitle_files(directory, timestamps_pattern)
-            if timestamps_files:
-                timestamps_file = timestamps_files[0]  # 使用第一個找到的時間軸檔案
-                print(f"✅ 找到時間軸檔案: {timestamps_file.name} (最準確的時間計算)")
-        except FileNotFoundError:
-            pass
+        # 尋找時間軸檔案：優先使用 vid-timestamps 產生的章節索引（精確到毫秒）
+        for candidate_pattern in ("*.chapters.json", timestamps_pattern):
+            try:
+                timestamps_files = get_subtitle_files(directory, candidate_pattern)
+            except FileNotFoundError:
+                continue
+            timestamps_file = timestamps_files[0]  # 使用第一個找到的時間軸檔案
+            print(f"✅ 找到時間軸檔案: {timestamps_file.name} (最準確的時間計算)")
+            break
         
         # 尋找影片檔案
         try:
@@ -192,7 +235,7 @@ def batch_merge_subtitles(directory, pattern="*.srt", video_pattern="*.mp4", tim
                 print("合併已取消")
                 return False
         
-        success = merge_subtitles(subtitle_files, video_files, timestamps_file, output_file)
+        success = merge_subtitles(subtitle_files, video_files, timestamps_file, output_file, output_format=output_format)
         if success:
             print(f"\n成功合併 {len(subtitle_files)} 個字幕檔案！")
         else:
@@ -208,8 +251,13 @@ def main():
     parser.add_argument("-p", "--pattern", default="*.srt", help="字幕檔案匹配模式 (預設: *.srt)")
     parser.add_argument("-v", "--video-pattern", default="*.mp4", help="影片檔案匹配模式 (預設: *.mp4)")
     parser.add_argument("-o", "--output", help="輸出檔案路徑 (預設: 目錄名_merged.srt)")
-    parser.add_argument("--no-confirm", action="store_true", help="不確認檔案順序")
+    parser.add_argument("-f", "--format", choices=SUBTITLE_FORMATS, help="輸出格式 (預設依輸出副檔名判斷，否則為 srt)")
+    parser.add_argument("-y", "--yes", "--no-confirm", dest="no_confirm", action="store_true", help="不確認檔案順序 (非互動模式)")
+    parser.add_argument("--no-cache", action="store_true", help="不使用持久化的 ffprobe 快取")
+    add_trace_argument(parser)
     args = parser.parse_args()
+    enable_trace(args.trace, "vid-subtitles")
+    set_cache_enabled(not args.no_cache)
     try:
         success = batch_merge_subtitles(
             args.directory,
@@ -217,7 +265,8 @@ def main():
             args.video_pattern,
             "*.txt",  # timestamps_pattern
             args.output,
-            not args.no_confirm
+            not args.no_confirm,
+            args.format
         )
         if success:
             print(f"\n字幕合併完成！")
@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import asyncio
+from collections import deque
+from pathlib import Path
+from .chapters import add_chapter_metadata, ffmetadata_path
+from .convert_to_mp3 import resolve_audio_output, build_audio_command
+from .ffmpeg_runner import DEFAULT_STDERR_LINES, FFmpegResult, ProgressReader, with_progress_args
+from .generate_file_list import write_file_list
+from .journal import atomic_output_path, commit_output, discard_output
+from .generate_timestamps import write_timestamp_files
+from .process import ProcessRecord, emit
+from .probe import ffprobe_command, lookup_probe, store_probe, default_jobs
+from .timeline import Segment, Timeline, list_media_files
+from .encoder_profiles import get_profile
+from .video_specs import spec_key, build_ffmpeg_command, build_force_merge_command, get_quality_settings
+
+# 同時執行的 ffmpeg/ffprobe 子程序上限（None 表示 CPU 核心數）
+_concurrency = None
+# 每個事件迴圈各自的 Semaphore
+_semaphores = {}
+
+def set_concurrency(limit):
+    """
+    設定同時執行的 ffmpeg/ffprobe 子程序上限
+
+    Args:
+        limit (int): 上限（None 表示 CPU 核心數）
+    """
+    global _concurrency
+    if limit is not None and limit < 1:
+        raise ValueError("並行上限必須至少為 1")
+    _concurrency = limit
+    _semaphores.clear()
+
+def _get_semaphore():
+    loop = asyncio.get_event_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        # 只保留目前的事件迴圈，避免已關閉的迴圈留在記憶體中
+        _semaphores.clear()
+        semaphore = _semaphores[loop] = asyncio.Semaphore(_concurrency or default_jobs())
+    return semaphore
+
+def _record(cmd, process, start_time, start, stdout_bytes=0, stderr_bytes=0):
+    """將 asyncio 子程序交給 process 的 hook（子程序由事件迴圈回收，沒有 rusage）"""
+    task = asyncio.current_task() if hasattr(asyncio, "current_task") else None
+    emit(ProcessRecord(cmd, process.pid, id(task), start_time, time.monotonic() - start,
+                       process.returncode, stdout_bytes, stderr_bytes))
+
+async def _kill(process):
+    """結束子程序並等待回收，避免殭屍程序"""
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+class AsyncProcessError(Exception):
+    """
+    子程序以非零狀態結束
+    """
+
+    def __init__(self, cmd, returncode, stderr):
+        super().__init__(f"{cmd[0]} 結束狀態 {returncode}: {stderr.strip()}")
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stderr = stderr
+
+async def async_run_ffmpeg(cmd, total_duration=None, progress_callback=None, stderr_lines=DEFAULT_STDERR_LINES):
+    """
+    以 asyncio 子程序執行 ffmpeg 並即時解析進度（run_ffmpeg 的非同步版本）
+
+    受 set_concurrency 的上限限制；工作被取消時會終止 ffmpeg 子程序後再拋出 CancelledError。
+
+    Args:
+        cmd (list): ffmpeg 命令參數列表
+        total_duration (float): 輸入總時長（秒），用於計算百分比與 ETA（可選）
+        progress_callback (callable): 每次收到進度時呼叫，參數為 FFmpegProgress（可選）
+        stderr_lines (int): 保留的 stderr 行數
+
+    Returns:
+        FFmpegResult: 執行結果
+    """
+    async with _get_semaphore():
+        start_time, start = time.time(), time.monotonic()
+        process = await asyncio.create_subprocess_exec(
+            *with_progress_args(cmd),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stderr_tail = deque(maxlen=stderr_lines)
+        reader = ProgressReader(total_duration, progress_callback, start)
+        counts = {'stdout': 0, 'stderr': 0}
+
+        async def read_stdout():
+            async for line in process.stdout:
+                counts['stdout'] += len(line)
+                reader.feed(line.decode("utf-8", errors="replace"))
+
+        async def read_stderr():
+            async for line in process.stderr:
+                counts['stderr'] += len(line)
+                stderr_tail.append(line.decode("utf-8", errors="replace"))
+
+        try:
+            await asyncio.gather(read_stdout(), read_stderr())
+            returncode = await process.wait()
+        finally:
+            await _kill(process)
+            _record(cmd, process, start_time, start, counts['stdout'], counts['stderr'])
+        return FFmpegResult(cmd, returncode, "".join(stderr_tail), time.monotonic() - start)
+
+async def _run_ffprobe(file_path):
+    cmd = ffprobe_command(file_path)
+    async with _get_semaphore():
+        start_time, start = time.time(), time.monotonic()
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout = stderr = b""
+        try:
+            stdout, stderr = await process.communicate()
+        finally:
+            await _kill(process)
+            _record(cmd, process, start_time, start, len(stdout), len(stderr))
+    if process.returncode != 0:
+        raise AsyncProcessError(cmd, process.returncode, stderr.decode("utf-8", errors="replace"))
+    return json.loads(stdout.decode("utf-8"))
+
+async def async_probe(file_path, use_cache=None):
+    """
+    非同步探測影片檔案（probe_file 的非同步版本），共用同一份記憶體與持久化快取
+
+    Args:
+        file_path (str): 影片檔案路徑
+        use_cache (bool): 是否使用持久化快取（預設依 set_cache_enabled 設定）
+
+    Returns:
+        ProbeResult: 探測結果
+
+    Raises:
+        AsyncProcessError: ffprobe 執行失敗
+    """
+    loop = asyncio.get_event_loop()
+    abs_path = os.path.abspath(str(file_path))
+    # stat 與 SQLite 快取查詢在執行緒中進行，不阻塞事件迴圈
+    st = await loop.run_in_executor(None, os.stat, abs_path)
+    result = await loop.run_in_executor(None, lookup_probe, abs_path, st, use_cache)
+    if result is not None:
+        return result
+    data = await _run_ffprobe(abs_path)
+    return await loop.run_in_executor(None, store_probe, abs_path, st, data, use_cache)
+
+async def async_probe_files(file_paths, use_cache=None):
+    """
+    同時探測多個檔案（probe_files 的非同步版本），結果維持原始順序
+
+    Returns:
+        list: (ProbeResult, Exception) 列表，成功時錯誤為 None，失敗時結果為 None
+    """
+    results = await asyncio.gather(
+        *(async_probe(file_path, use_cache) for file_path in file_paths),
+        return_exceptions=True
+    )
+    return [
+        (None, result) if isinstance(result, Exception) else (result, None)
+        for result in results
+    ]
+
+async def async_get_video_specs(file_path):
+    """
+    非同步獲取影片規格（get_video_specs 的非同步版本）
+
+    Args:
+        file_path (str): 影片檔案路徑
+
+    Returns:
+        dict: 包含影片規格的字典；失敗時為 None
+    """
+    try:
+        return (await async_probe(file_path)).to_specs()
+    except (OSError, ValueError, AsyncProcessError) as e:
+        print(f"❌ 無法獲取影片規格: {e}")
+        return None
+
+async def async_convert_video_to_mp3(input_file, output_file=None, quality="2", overwrite=False,
+                                     copy_if_possible=False, allow_m4a=False, progress_callback=None):
+    """
+    非同步將單個影片檔案轉換為 MP3（convert_video_to_mp3 的非同步版本）
+
+    Args:
+        input_file (str): 輸入影片檔案路徑
+        output_file (str): 輸出 MP3 檔案路徑（可選）
+        quality (str): MP3 品質設定 (0-9，0=最高品質)
+        overwrite (bool): 是否覆蓋現有檔案
+        copy_if_possible (bool): 來源音訊相容時直接複製串流，不重新編碼
+        allow_m4a (bool): 來源為 AAC 時允許輸出 .m4a（搭配 copy_if_possible）
+        progress_callback (callable): 進度回呼，參數為 FFmpegProgress（可選）
+
+    Returns:
+        bool: 轉換是否成功
+    """
+    input_path = Path(input_file)
+    try:
+        total_duration = (await async_probe(input_path)).duration
+    except (OSError, ValueError, AsyncProcessError):
+        total_duration = None
+
+    # 探測結果已在快取中，resolve_audio_output 不會再執行 ffprobe
+    output_path, stream_copy = resolve_audio_output(input_path, output_file, copy_if_possible, allow_m4a)
+    if output_path.exists() and not overwrite:
+        print(f"⚠️  檔案已存在，跳過: {output_path.name}")
+        return True
+
+    part_path = atomic_output_path(output_path)
+    cmd = build_audio_command(input_path, part_path, quality, stream_copy, overwrite=True)
+    action = "複製音訊" if stream_copy else "轉換"
+    print(f"🔄 {action}: {input_path.name} → {output_path.name}")
+    try:
+        result = await async_run_ffmpeg(cmd, total_duration, progress_callback)
+    except BaseException:
+        # 包含取消：不留下不完整的輸出
+        discard_output(part_path)
+        raise
+    if result.returncode == 0:
+        commit_output(part_path, output_path)
+        print(f"✅ 完成: {output_path.name}")
+        return True
+    discard_output(part_path)
+    print(f"❌ 轉換失敗: {input_path.name}")
+    if result.stderr:
+        print(f"錯誤: {result.stderr}")
+    return False
+
+async def async_merge_videos(video_directory, output_file=None, on_incompatible="reencode",
+                             crf=None, audio_bitrate=None, progress_callback=None, profile=None):
+    """
+    非同步合併目錄中的影片（merge_videos 的非互動、非同步版本）
+
+    所有檔案同時探測；規格相同時以 copy 模式合併，否則依 on_incompatible 處理
+    （reencode：重新編碼、force：強制 copy、abort：取消）。
+    時間軸檔案與章節會一併產生並寫入輸出影片。
+
+    Args:
+        video_directory (str): 影片目錄路徑
+        output_file (str): 輸出檔案名稱（預設為目錄名稱）
+        on_incompatible (str): 規格不同時的處理方式
+        crf (int): 重新編碼的 CRF 值（預設依 profile）
+        audio_bitrate (str): 重新編碼的音訊位元率（預設依 profile）
+        progress_callback (callable): 進度回呼，參數為 FFmpegProgress（可選）
+        profile (EncoderProfile): 編碼 profile 或名稱（預設依設定檔，再來是 archive）
+
+    Returns:
+        Timeline: 成功時為合併的時間軸，否則為 None
+    """
+    if on_incompatible not in ("reencode", "force", "abort"):
+        raise ValueError(f"不支援的 on_incompatible: {on_incompatible}")
+    profile = get_profile(profile)
+    quality_settings = get_quality_settings(crf, audio_bitrate, assume_defaults=True, profile=profile)
+
+    folder_name = os.path.basename(os.path.normpath(video_directory))
+    output_file = os.path.join(video_directory, output_file or f"{folder_name}.mp4")
+    part_file = atomic_output_path(output_file)
+    exclude = {os.path.basename(output_file), os.path.basename(part_file)}
+    file_paths = [str(path) for path in list_media_files(video_directory, "*.mp4") if path.name not in exclude]
+    if not file_paths:
+        print(f"❌ 在目錄 {video_directory} 中找不到影片檔案")
+        return None
+
+    probes = await async_probe_files(file_paths)
+    for file_path, (probe, error) in zip(file_paths, probes):
+        if probe is None:
+            print(f"❌ Failed to probe {os.path.basename(file_path)}: {error}")
+            return None
+
+    timeline = Timeline([
+        Segment(index, file_path, 0, probe.exact_duration, probe)
+        for index, (file_path, (probe, _)) in enumerate(zip(file_paths, probes))
+    ])
+    write_timestamp_files(video_directory, timeline)
+
+    file_list_path = os.path.join(video_directory, "file_list.txt")
+    write_file_list(file_list_path, file_paths)
+    compatible = len({spec_key(probe.to_specs()) for probe, _ in probes}) == 1
+    if compatible or on_incompatible == "force":
+        cmd = build_force_merge_command(file_list_path, part_file)
+    elif on_incompatible == "reencode":
+        cmd = build_ffmpeg_command(file_list_path, part_file, quality_settings, profile)
+    else:
+        print("❌ 影片規格不同，合併已取消")
+        os.remove(file_list_path)
+        return None
+    cmd = add_chapter_metadata(cmd, ffmetadata_path(video_directory))
+
+    try:
+        result = await async_run_ffmpeg(cmd, float(timeline.total_duration), progress_callback)
+    except BaseException:
+        discard_output(part_file)
+        raise
+    finally:
+        os.remove(file_list_path)
+    if result.returncode == 0:
+        commit_output(part_file, output_file)
+    else:
+        discard_output(part_file)
+        print(f"❌ Video merge failed!")
+        if result.stderr:
+            print(f"錯誤訊息: {result.stderr}")
+        return None
+    print(f"✅ Video merge completed! Output file: {output_file}")
+    return timeline
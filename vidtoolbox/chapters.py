@@ -0,0 +1,129 @@
+import os
+import json
+from fractions import Fraction
+
+CHAPTER_INDEX_VERSION = 1
+
+def chapter_index_path(video_directory):
+    """章節索引 JSON 的預設路徑（目錄名.chapters.json）"""
+    folder_name = os.path.basename(os.path.normpath(video_directory))
+    return os.path.join(video_directory, f"{folder_name}.chapters.json")
+
+def ffmetadata_path(video_directory):
+    """ffmetadata 章節檔案的預設路徑（目錄名.ffmetadata）"""
+    folder_name = os.path.basename(os.path.normpath(video_directory))
+    return os.path.join(video_directory, f"{folder_name}.ffmetadata")
+
+def to_milliseconds(value):
+    """將有理數秒四捨五入為整數毫秒"""
+    return int(round(Fraction(value) * 1000))
+
+def build_chapters(entries):
+    """
+    依序累加精確時長，建立章節列表
+
+    Args:
+        entries (list): (章節名稱, 檔案名稱, 精確時長 Fraction) 列表
+
+    Returns:
+        list: 章節字典列表，start/end 為有理數字串，start_ms/end_ms 為整數毫秒
+    """
+    chapters = []
+    start = Fraction(0)
+    for title, file, duration in entries:
+        end = start + Fraction(duration)
+        chapters.append({
+            'title': title,
+            'file': file,
+            'start': str(start),
+            'end': str(end),
+            'start_ms': to_milliseconds(start),
+            'end_ms': to_milliseconds(end),
+        })
+        start = end
+    return chapters
+
+def write_chapter_index(path, chapters):
+    """
+    寫入機器可讀的章節索引（JSON）
+
+    Args:
+        path (str): 輸出路徑
+        chapters (list): build_chapters 產生的章節列表
+    """
+    data = {
+        'version': CHAPTER_INDEX_VERSION,
+        'chapters': chapters,
+        'total_duration': chapters[-1]['end'] if chapters else '0',
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+def load_chapter_index(path):
+    """
+    讀取章節索引
+
+    Args:
+        path (str): 章節索引 JSON 路徑
+
+    Returns:
+        list: 章節字典列表
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get('chapters', [])
+
+def load_chapter_starts(path):
+    """
+    讀取每個章節的精確開始時間（秒）
+
+    Args:
+        path (str): 章節索引 JSON 路徑
+
+    Returns:
+        list: 開始時間（秒，float，來自整數毫秒因此不會累積誤差）
+    """
+    return [chapter['start_ms'] / 1000 for chapter in load_chapter_index(path)]
+
+def _escape_metadata(value):
+    """跳脫 ffmetadata 中的特殊字元"""
+    for char in ('\\', '=', ';', '#', '\n'):
+        value = value.replace(char, '\\' + char)
+    return value
+
+def write_ffmetadata(path, chapters):
+    """
+    寫入 ffmpeg 可讀取的 ffmetadata 章節檔案
+
+    Args:
+        path (str): 輸出路徑
+        chapters (list): build_chapters 產生的章節列表
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(";FFMETADATA1\n")
+        for chapter in chapters:
+            f.write("\n[CHAPTER]\nTIMEBASE=1/1000\n")
+            f.write(f"START={chapter['start_ms']}\n")
+            f.write(f"END={chapter['end_ms']}\n")
+            f.write(f"title={_escape_metadata(chapter['title'])}\n")
+
+def add_chapter_metadata(cmd, metadata_file):
+    """
+    在 ffmpeg 合併命令中加入 ffmetadata 輸入，讓章節在同一次 ffmpeg 執行中寫入輸出檔案
+
+    多了第二個輸入後必須明確指定 -map，這裡與沒有 -map 時的預設選擇一致：一個影片串流與一個音訊串流
+    （0:V 不包含封面等附加圖片，copy 模式串接與部分封裝格式無法處理附加圖片）；字幕與資料串流和預設一樣不輸出。
+
+    Args:
+        cmd (list): 以 -i 指定第一個輸入的 ffmpeg 命令
+        metadata_file (str): ffmetadata 檔案路徑
+
+    Returns:
+        list: 加入章節參數的新命令
+    """
+    position = cmd.index("-i") + 2
+    return (
+        cmd[:position]
+        + ["-f", "ffmetadata", "-i", metadata_file]
+        + ["-map", "0:V:0", "-map", "0:a:0?", "-map_metadata", "1", "-map_chapters", "1"]
+        + cmd[position:]
+    )
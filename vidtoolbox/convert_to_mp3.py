@@ -1,8 +1,23 @@
 import os
+import time
 import argparse
-import subprocess
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .ffmpeg_runner import run_ffmpeg, print_progress
+from .probe import probe_file, probe_files
+from .journal import BatchJournal, atomic_output_path, commit_output, discard_output
+from .output_cache import output_cache_key, fetch_cached_output, store_cached_output, set_output_cache_enabled
+from .process import add_trace_argument, enable_trace
+
+# 批次轉換日誌的檔案名稱（位於輸出目錄中）
+MP3_JOURNAL = ".vidtoolbox_mp3.journal.jsonl"
+
+# 可直接複製音訊串流（不重新編碼）的來源編碼與對應容器
+STREAM_COPY_CONTAINERS = {
+    'mp3': '.mp3',
+    'aac': '.m4a',
+}
 
 def get_audio_files(directory, pattern="*.mp4"):
     """
@@ -23,7 +38,69 @@ def get_audio_files(directory, pattern="*.mp4"):
     
     return sorted(audio_files)
 
-def convert_video_to_mp3(input_file, output_file=None, quality="2", overwrite=False):
+def resolve_audio_output(input_file, output_file=None, copy_if_possible=False, allow_m4a=False):
+    """
+    決定輸出路徑，以及是否可以直接複製音訊串流而不重新編碼
+
+    來源音訊為 MP3 時直接複製到 .mp3；來源為 AAC 且允許 .m4a 時，
+    輸出副檔名改為 .m4a 並直接複製。其他情況使用 libmp3lame 重新編碼。
+
+    Args:
+        input_file (str): 輸入影片檔案路徑
+        output_file (str): 輸出檔案路徑（可選，預設為同名 .mp3）
+        copy_if_possible (bool): 是否在相容時直接複製音訊串流
+        allow_m4a (bool): 是否接受 AAC 音訊輸出為 .m4a
+
+    Returns:
+        tuple: (輸出路徑 Path, 是否直接複製 bool)
+    """
+    input_path = Path(input_file)
+    output_path = Path(output_file) if output_file is not None else input_path.with_suffix('.mp3')
+    
+    if not copy_if_possible:
+        return output_path, False
+    
+    try:
+        audio_codec = probe_file(input_path).audio_codec
+    except Exception:
+        return output_path, False
+    
+    container = STREAM_COPY_CONTAINERS.get(audio_codec)
+    if container == '.mp3':
+        return output_path.with_suffix('.mp3'), True
+    if container == '.m4a' and allow_m4a:
+        return output_path.with_suffix('.m4a'), True
+    return output_path, False
+
+def build_audio_command(input_path, output_path, quality="2", stream_copy=False, overwrite=False):
+    """
+    建立擷取音訊的 ffmpeg 命令
+
+    Args:
+        input_path (Path): 輸入影片檔案路徑
+        output_path (Path): 輸出音訊檔案路徑
+        quality (str): MP3 品質設定 (0-9，0=最高品質)
+        stream_copy (bool): 直接複製音訊串流，不重新編碼
+        overwrite (bool): 是否覆蓋現有檔案
+
+    Returns:
+        list: ffmpeg 命令參數列表
+    """
+    if stream_copy:
+        codec_args = ["-c:a", "copy"]  # 直接複製音訊串流
+    else:
+        codec_args = ["-acodec", "libmp3lame", "-q:a", quality]
+    return [
+        "ffmpeg",
+        "-i", str(input_path),
+        "-vn",  # 不包含影片
+        *codec_args,
+        "-y" if overwrite else "-n",  # -y 覆蓋，-n 不覆蓋
+        str(output_path)
+    ]
+
+def convert_video_to_mp3(input_file, output_file=None, quality="2", overwrite=False,
+                         copy_if_possible=False, allow_m4a=False, progress_callback=None):
     """
     將單個影片檔案轉換為 MP3
     
@@ -32,6 +109,9 @@ def convert_video_to_mp3(input_file, output_file=None, quality="2", overwrite=Fa
         output_file (str): 輸出 MP3 檔案路徑（可選）
         quality (str): MP3 品質設定 (0-9，0=最高品質)
         overwrite (bool): 是否覆蓋現有檔案
+        copy_if_possible (bool): 來源音訊相容時直接複製串流，不重新編碼
+        allow_m4a (bool): 來源為 AAC 時允許輸出 .m4a（搭配 copy_if_possible）
+        progress_callback (callable): 進度回呼，參數為 FFmpegProgress（可選）
     
     Returns:
         bool: 轉換是否成功
@@ -39,46 +119,69 @@ def convert_video_to_mp3(input_file, output_file=None, quality="2", overwrite=Fa
     input_path = Path(input_file)
     
     # 如果沒有指定輸出檔案，使用相同檔名但副檔名為 .mp3
-    if output_file is None:
-        output_path = input_path.with_suffix('.mp3')
-    else:
-        output_path = Path(output_file)
+    output_path, stream_copy = resolve_audio_output(input_path, output_file, copy_if_possible, allow_m4a)
     
     # 檢查輸出檔案是否已存在
     if output_path.exists() and not overwrite:
         print(f"⚠️  檔案已存在，跳過: {output_path.name}")
         return True
     
-    # 建立 ffmpeg 命令
-    cmd = [
-        "ffmpeg",
-        "-i", str(input_path),
-        "-vn",  # 不包含影片
-        "-acodec", "libmp3lame",
-        "-q:a", quality,
-        "-y" if overwrite else "-n",  # -y 覆蓋，-n 不覆蓋
-        str(output_path)
-    ]
+    # 建立 ffmpeg 命令：先寫入暫存檔，成功後才改名，中斷時不會留下不完整的輸出
+    part_path = atomic_output_path(output_path)
+    cmd = build_audio_command(input_path, part_path, quality, stream_copy, overwrite=True)
+    
+    # 相同輸入內容與參數已轉換過時直接取用快取的輸出；
+    # 複製串流只受磁碟速度限制，計算鍵值的完整雜湊就要讀取整個輸入，因此不使用快取
+    cache_key = output_cache_key(cmd, [input_path], part_path, use_cache=False if stream_copy else None)
+    method = fetch_cached_output(cache_key, output_path)
+    if method:
+        print(f"♻️  使用快取的輸出 ({method}): {output_path.name}")
+        return True
     
     try:
-        print(f"🔄 轉換: {input_path.name} → {output_path.name}")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        action = "複製音訊" if stream_copy else "轉換"
+        print(f"🔄 {action}: {input_path.name} → {output_path.name}")
+        try:
+            total_duration = probe_file(input_path).duration
+        except Exception:
+            total_duration = None
+        result = run_ffmpeg(cmd, total_duration, progress_callback)
         
         if result.returncode == 0:
+            commit_output(part_path, output_path)
+            store_cached_output(cache_key, output_path)
             print(f"✅ 完成: {output_path.name}")
             return True
         else:
+            discard_output(part_path)
             print(f"❌ 轉換失敗: {input_path.name}")
             if result.stderr:
                 print(f"錯誤: {result.stderr}")
             return False
             
     except Exception as e:
+        discard_output(part_path)
         print(f"❌ 轉換錯誤: {e}")
         return False
 
+def order_longest_first(file_paths, jobs=None):
+    """
+    依影片時長由長到短排序，讓最長的轉換最先開始以縮短整批完成時間
+
+    Args:
+        file_paths (list): 影片檔案路徑列表
+        jobs (int): 並行探測的工作數
+
+    Returns:
+        list: 排序後的 (檔案路徑, 時長) 列表；無法探測的檔案時長為 0
+    """
+    probes = probe_files(file_paths, jobs)
+    durations = [probe.duration if probe else 0.0 for probe, _ in probes]
+    return sorted(zip(file_paths, durations), key=lambda item: item[1], reverse=True)
+
 def batch_convert_to_mp3(directory, pattern="*.mp4", quality="2", overwrite=False, 
-                        output_directory=None, recursive=False):
+                        output_directory=None, recursive=False, jobs=1,
+                        copy_if_possible=False, allow_m4a=False, assume_yes=False, resume=False):
     """
     批次轉換目錄中的影片檔案為 MP3
     
@@ -89,22 +192,30 @@ def batch_convert_to_mp3(directory, pattern="*.mp4", quality="2", overwrite=Fals
         overwrite (bool): 是否覆蓋現有檔案
         output_directory (str): 輸出目錄（可選）
         recursive (bool): 是否遞迴搜尋子目錄
+        jobs (int): 同時執行的 ffmpeg 轉換數（預設: 1）
+        copy_if_possible (bool): 來源音訊相容時直接複製串流，不重新編碼
+        allow_m4a (bool): 來源為 AAC 時允許輸出 .m4a（搭配 copy_if_possible）
+        assume_yes (bool): 不詢問確認，直接轉換（非互動模式）
+        resume (bool): 續傳：依日誌跳過已驗證完成的檔案，其餘（含先前失敗的）重新轉換
     
     Returns:
-        dict: 轉換結果統計
+        dict: 轉換結果統計（含總耗時 elapsed 與各檔案耗時 timings）
     """
     print(f"🎵 開始批次轉換 MP3...")
     print(f"📁 目錄: {directory}")
     print(f"🔍 模式: {pattern}")
     print(f"🎨 品質: {quality}")
     print(f"🔄 遞迴: {'是' if recursive else '否'}")
+    print(f"⚙️  並行數: {jobs}")
     
     # 統計結果
     stats = {
         'total': 0,
         'success': 0,
         'failed': 0,
-        'skipped': 0
+        'skipped': 0,
+        'elapsed': 0.0,
+        'timings': {}
     }
     
     try:
@@ -129,14 +240,22 @@ def batch_convert_to_mp3(directory, pattern="*.mp4", quality="2", overwrite=Fals
             print(f"  {i}. {file_path.name}")
         
         # 確認轉換
-        confirm = input(f"\n✅ 確認轉換 {len(audio_files)} 個檔案？(Y/N): ").strip().lower()
-        if confirm != "y":
-            print("❌ 轉換已取消")
-            return stats
+        if not assume_yes:
+            confirm = input(f"\n✅ 確認轉換 {len(audio_files)} 個檔案？(Y/N): ").strip().lower()
+            if confirm != "y":
+                print("❌ 轉換已取消")
+                return stats
         
         # 開始轉換
         print(f"\n🚀 開始轉換...")
+        start_time = time.monotonic()
+        
+        # 每個完成或失敗的檔案都記錄在日誌中，供 --resume 使用
+        journal_directory = Path(output_directory) if output_directory else Path(directory)
+        journal_directory.mkdir(parents=True, exist_ok=True)
+        journal = BatchJournal(journal_directory / MP3_JOURNAL)
         
+        pending = []
         for file_path in audio_files:
             stats['total'] += 1
             
@@ -147,25 +266,69 @@ def batch_convert_to_mp3(directory, pattern="*.mp4", quality="2", overwrite=Fals
                 output_file = output_dir / file_path.with_suffix('.mp3').name
             else:
                 output_file = file_path.with_suffix('.mp3')
+            output_file, _ = resolve_audio_output(file_path, output_file, copy_if_possible, allow_m4a)
             
-            # 檢查是否已存在
-            if output_file.exists() and not overwrite:
+            if resume:
+                # 續傳：只信任日誌中已驗證的輸出，其他已存在的輸出可能不完整，重新轉換
+                if journal.is_done(output_file, [file_path], output_file):
+                    print(f"⏭️  跳過已完成的檔案 (日誌驗證): {output_file.name}")
+                    stats['skipped'] += 1
+                    continue
+                if journal.status(output_file) == 'failed':
+                    print(f"🔁 重試先前失敗的檔案: {file_path.name}")
+            elif output_file.exists() and not overwrite:
+                # 檢查是否已存在
                 print(f"⏭️  跳過已存在的檔案: {output_file.name}")
                 stats['skipped'] += 1
                 continue
             
-            # 轉換檔案
+            pending.append((file_path, output_file))
+        
+        def convert_one(file_path, output_file):
+            file_start = time.monotonic()
             success = convert_video_to_mp3(
                 str(file_path), 
                 str(output_file), 
                 quality, 
-                overwrite
+                overwrite or resume,
+                copy_if_possible,
+                allow_m4a,
+                progress_callback
             )
-            
+            return success, time.monotonic() - file_start
+        
+        outputs = dict(pending)
+        
+        def record(file_path, success, elapsed):
+            stats['timings'][str(file_path)] = elapsed
             if success:
                 stats['success'] += 1
+                journal.record_done(outputs[file_path], [file_path], outputs[file_path], full_digest=resume)
             else:
                 stats['failed'] += 1
+                journal.record_failed(outputs[file_path], [file_path])
+        
+        # 並行轉換時多個進度列會互相覆蓋，只在逐一轉換時顯示進度
+        parallel = jobs and jobs > 1 and len(pending) > 1
+        progress_callback = None if parallel else print_progress
+        
+        if parallel:
+            # 最長的檔案最先開始，避免最後只剩一個長任務在跑
+            ordered = order_longest_first([file_path for file_path, _ in pending], jobs)
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                futures = {
+                    executor.submit(convert_one, file_path, outputs[file_path]): file_path
+                    for file_path, _ in ordered
+                }
+                for future in as_completed(futures):
+                    success, elapsed = future.result()
+                    record(futures[future], success, elapsed)
+        else:
+            for file_path, output_file in pending:
+                success, elapsed = convert_one(file_path, output_file)
+                record(file_path, success, elapsed)
+        
+        stats['elapsed'] = time.monotonic() - start_time
         
         # 顯示結果
         print(f"\n📊 轉換完成！")
@@ -173,6 +336,9 @@ def batch_convert_to_mp3(directory, pattern="*.mp4", quality="2", overwrite=Fals
         print(f"  成功: {stats['success']}")
         print(f"  失敗: {stats['failed']}")
         print(f"  跳過: {stats['skipped']}")
+        print(f"  耗時: {stats['elapsed']:.1f} 秒")
+        for file_path, elapsed in sorted(stats['timings'].items(), key=lambda item: item[1], reverse=True):
+            print(f"    {Path(file_path).name}: {elapsed:.1f} 秒")
         
         return stats
         
@@ -210,8 +376,23 @@ def main():
                         help="覆蓋現有檔案")
     parser.add_argument("--show-quality", action="store_true", 
                         help="顯示品質預設值說明")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="同時執行的轉換數 (預設: 1，建議設為 CPU 核心數)")
+    parser.add_argument("--copy-if-possible", action="store_true",
+                        help="來源音訊已是 MP3（或搭配 --allow-m4a 時為 AAC）時直接複製，不重新編碼")
+    parser.add_argument("--allow-m4a", action="store_true",
+                        help="來源為 AAC 時輸出 .m4a 而非 .mp3")
+    parser.add_argument("-y", "--yes", action="store_true",
+                        help="不詢問確認 (非互動模式)")
+    parser.add_argument("--resume", action="store_true",
+                        help="續傳：跳過日誌中已驗證完成的檔案，重試失敗的檔案")
+    parser.add_argument("--no-output-cache", action="store_true",
+                        help="不使用輸出快取（相同輸入與參數時直接取用先前的轉換結果）")
     
+    add_trace_argument(parser)
     args = parser.parse_args()
+    enable_trace(args.trace, "vid-mp3")
+    set_output_cache_enabled(not args.no_output_cache)
     
     # 顯示品質預設值說明
     if args.show_quality:
@@ -229,7 +410,12 @@ def main():
             args.quality,
             args.overwrite,
             args.output,
-            args.recursive
+            args.recursive,
+            args.jobs,
+            args.copy_if_possible,
+            args.allow_m4a,
+            args.yes,
+            args.resume
         )
         
         if stats['success'] > 0:
@@ -0,0 +1,275 @@
+import os
+import json
+
+DEFAULT_CRF = 18
+DEFAULT_AUDIO_BITRATE = "192k"
+DEFAULT_PRESET = "slow"
+
+# x264/x265 可用的編碼速度預設
+X264_PRESETS = [
+    "ultrafast", "superfast", "veryfast", "faster", "fast",
+    "medium", "slow", "slower", "veryslow",
+]
+
+# 未指定 --profile 且設定檔沒有 default 時使用的 profile
+DEFAULT_PROFILE = "archive"
+
+# 設定檔中 profile 可覆寫的欄位
+PROFILE_FIELDS = ('video_codec', 'preset', 'crf', 'audio_codec', 'audio_bitrate', 'threads', 'extra_args', 'description')
+
+class EncoderProfile:
+    """
+    編碼設定（影片/音訊編碼器、速度預設、CRF、音訊位元率、執行緒數與額外參數）
+
+    video_codec 為 copy 時不重新編碼。threads 可為整數或 auto（CPU 核心數），None 表示交給 ffmpeg 決定。
+    """
+
+    def __init__(self, name, video_codec="libx264", preset=DEFAULT_PRESET, crf=DEFAULT_CRF,
+                 audio_codec="aac", audio_bitrate=DEFAULT_AUDIO_BITRATE, threads=None,
+                 extra_args=(), description=""):
+        self.name = name
+        self.video_codec = video_codec
+        self.preset = preset
+        self.crf = crf
+        self.audio_codec = audio_codec
+        self.audio_bitrate = audio_bitrate
+        self.threads = threads
+        self.extra_args = [str(arg) for arg in extra_args]
+        self.description = description
+
+    @property
+    def is_copy(self):
+        """是否不重新編碼影片"""
+        return self.video_codec == "copy"
+
+    def replace(self, name=None, **changes):
+        """
+        建立覆寫部分欄位的新 profile（值為 None 的欄位維持原值）
+
+        Returns:
+            EncoderProfile: 新的 profile
+        """
+        fields = self.to_dict()
+        fields.update({key: value for key, value in changes.items() if value is not None})
+        fields['name'] = name or self.name
+        return EncoderProfile(**fields)
+
+    def quality_settings(self):
+        """
+        轉為畫質設定字典（供互動詢問的預設值與 build_conform_command 使用）
+
+        Returns:
+            dict: crf、audio_bitrate、preset
+        """
+        return {'crf': self.crf, 'audio_bitrate': self.audio_bitrate, 'preset': self.preset}
+
+    def resolved_threads(self):
+        """實際傳給 -threads 的值（auto 為 CPU 核心數）"""
+        if self.threads == "auto":
+            return os.cpu_count() or 1
+        return self.threads
+
+    def video_args(self, quality_settings=None, threads=None):
+        """
+        影片編碼參數
+
+        Args:
+            quality_settings (dict): 覆寫 crf/preset 的畫質設定（可選）
+            threads (int): 覆寫 profile 的執行緒數（可選）
+
+        Returns:
+            list: ffmpeg 參數列表
+        """
+        if self.is_copy:
+            return ["-c:v", "copy"]
+        quality_settings = quality_settings or {}
+        preset = quality_settings.get('preset') or self.preset
+        # 不使用 CRF 的 profile（例如以 extra_args 設定 -cq 的硬體編碼器）忽略覆寫的 crf
+        crf = quality_settings.get('crf', self.crf) if self.crf is not None else None
+        threads = threads or self.resolved_threads()
+        args = ["-c:v", self.video_codec]
+        if preset:
+            args += ["-preset", preset]
+        if crf is not None:
+            args += ["-crf", str(crf)]
+        if threads:
+            args += ["-threads", str(threads)]
+        return args + self.extra_args
+
+    def audio_args(self, quality_settings=None):
+        """
+        音訊編碼參數
+
+        Args:
+            quality_settings (dict): 覆寫 audio_bitrate 的畫質設定（可選）
+
+        Returns:
+            list: ffmpeg 參數列表
+        """
+        if self.audio_codec == "copy":
+            return ["-c:a", "copy"]
+        audio_bitrate = (quality_settings or {}).get('audio_bitrate') or self.audio_bitrate
+        args = ["-c:a", self.audio_codec]
+        if audio_bitrate:
+            args += ["-b:a", audio_bitrate]
+        return args
+
+    def to_dict(self):
+        fields = {field: getattr(self, field) for field in PROFILE_FIELDS}
+        fields['name'] = self.name
+        return fields
+
+    def __repr__(self):
+        return f"EncoderProfile({self.name!r}, video_codec={self.video_codec!r}, preset={self.preset!r}, crf={self.crf!r})"
+
+# 內建 profile
+BUILTIN_PROFILES = {
+    'archive': EncoderProfile(
+        'archive', description="x264 slow，畫質優先（預設）"
+    ),
+    'fast': EncoderProfile(
+        'fast', preset="veryfast", threads="auto", description="x264 veryfast，使用所有 CPU 核心，速度優先"
+    ),
+    'x265': EncoderProfile(
+        'x265', video_codec="libx265", preset="medium", crf=22, extra_args=("-tag:v", "hvc1"),
+        description="x265 medium，檔案較小但編碼較慢"
+    ),
+    'copy': EncoderProfile(
+        'copy', video_codec="copy", preset=None, crf=None, audio_codec="copy", audio_bitrate=None,
+        description="不重新編碼（規格不同時等同強制合併）"
+    ),
+}
+
+def get_config_path():
+    """
+    獲取設定檔路徑（VIDTOOLBOX_CONFIG > XDG_CONFIG_HOME > ~/.config）
+
+    Returns:
+        str: 設定檔路徑（不一定存在）
+    """
+    config_path = os.environ.get('VIDTOOLBOX_CONFIG')
+    if config_path:
+        return config_path
+    base = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+    return os.path.join(base, 'vidtoolbox', 'profiles.json')
+
+def _build_profile(name, fields, profiles):
+    unknown = set(fields) - set(PROFILE_FIELDS) - {'base'}
+    if unknown:
+        raise ValueError(f"profile {name} 含有不支援的欄位: {', '.join(sorted(unknown))}")
+    base_name = fields.get('base', name if name in profiles else DEFAULT_PROFILE)
+    if base_name not in profiles:
+        raise ValueError(f"profile {name} 的 base 不存在: {base_name}")
+    crf = fields.get('crf')
+    if crf is not None and not (isinstance(crf, int) and 0 <= crf <= 51):
+        raise ValueError(f"profile {name} 的 crf 必須是 0-51 的整數")
+    threads = fields.get('threads')
+    if threads is not None and threads != "auto" and not (isinstance(threads, int) and threads >= 0):
+        raise ValueError(f"profile {name} 的 threads 必須是非負整數或 auto")
+    # 明確寫成 null 的欄位表示不輸出該參數（例如硬體編碼器不使用 -crf）
+    base = profiles[base_name].to_dict()
+    base.update({key: value for key, value in fields.items() if key != 'base'})
+    base['name'] = name
+    return EncoderProfile(**base)
+
+# 已載入的設定檔，鍵為路徑，值為 ((大小, mtime_ns), (profile 字典, 預設 profile 名稱))
+_loaded_configs = {}
+
+def _read_config(config_path):
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"無法讀取設定檔 {config_path}: {e}")
+    if not isinstance(config, dict) or not isinstance(config.get('profiles', {}), dict):
+        raise ValueError(f"設定檔格式錯誤: {config_path}")
+
+    profiles = dict(BUILTIN_PROFILES)
+    for name, fields in config.get('profiles', {}).items():
+        if not isinstance(fields, dict):
+            raise ValueError(f"profile {name} 必須是物件")
+        profiles[name] = _build_profile(name, fields, profiles)
+
+    default = config.get('default', DEFAULT_PROFILE)
+    if default not in profiles:
+        raise ValueError(f"設定檔的 default profile 不存在: {default}")
+    return profiles, default
+
+def load_profiles(config_path=None):
+    """
+    載入內建 profile 與設定檔中的 profile
+
+    設定檔為 JSON，例如:
+        {"default": "fast",
+         "profiles": {"fast": {"crf": 20},
+                      "nvenc": {"base": "fast", "video_codec": "h264_nvenc", "preset": "p5", "crf": null,
+                                "extra_args": ["-cq", "23"]}}}
+    與內建 profile 同名時只覆寫列出的欄位，新的 profile 以 base（預設 archive）為基礎。
+    同一程序中只在設定檔的大小或修改時間改變時重新讀取。
+
+    Args:
+        config_path (str): 設定檔路徑（預設為 get_config_path()，不存在時只使用內建 profile）
+
+    Returns:
+        tuple: (profile 字典, 預設 profile 名稱)
+
+    Raises:
+        ValueError: 設定檔格式錯誤
+    """
+    explicit = config_path is not None
+    config_path = config_path or get_config_path()
+    try:
+        st = os.stat(config_path)
+    except OSError:
+        if explicit:
+            raise ValueError(f"找不到設定檔: {config_path}")
+        return dict(BUILTIN_PROFILES), DEFAULT_PROFILE
+
+    stat_key = (st.st_size, st.st_mtime_ns)
+    cached = _loaded_configs.get(config_path)
+    if cached is None or cached[0] != stat_key:
+        cached = (stat_key, _read_config(config_path))
+        _loaded_configs[config_path] = cached
+    profiles, default = cached[1]
+    return dict(profiles), default
+
+def get_profile(name=None, config_path=None):
+    """
+    依名稱取得 profile
+
+    Args:
+        name (str): profile 名稱（None 時使用設定檔的 default，再來是 archive）
+        config_path (str): 設定檔路徑（可選）
+
+    Returns:
+        EncoderProfile: profile
+
+    Raises:
+        ValueError: 找不到 profile 或設定檔格式錯誤
+    """
+    if isinstance(name, EncoderProfile):
+        return name
+    profiles, default = load_profiles(config_path)
+    name = name or default
+    if name not in profiles:
+        raise ValueError(f"找不到編碼 profile: {name}（可用: {', '.join(sorted(profiles))}）")
+    return profiles[name]
+
+def add_profile_arguments(parser):
+    """在命令列加入 --profile 與 --profile-config 選項"""
+    parser.add_argument("--profile",
+                        help=f"編碼 profile: {', '.join(BUILTIN_PROFILES)} 或設定檔中的名稱 (預設: {DEFAULT_PROFILE})")
+    parser.add_argument("--profile-config", metavar="PATH",
+                        help="編碼 profile 設定檔 (預設: $VIDTOOLBOX_CONFIG 或 ~/.config/vidtoolbox/profiles.json)")
+
+def profile_from_args(parser, args):
+    """
+    由命令列參數取得 profile；錯誤時以 parser.error 結束
+
+    Returns:
+        EncoderProfile: profile
+    """
+    try:
+        return get_profile(args.profile, args.profile_config)
+    except ValueError as e:
+        parser.error(str(e))
@@ -0,0 +1,185 @@
+import sys
+import time
+import subprocess
+import threading
+from collections import deque
+from .process import TracedProcess
+
+# 發生錯誤時保留的 stderr 行數
+DEFAULT_STDERR_LINES = 200
+
+def format_seconds(seconds):
+    """將秒數轉為 HH:MM:SS 格式"""
+    seconds = max(0, int(seconds))
+    return f"{seconds // 3600:02}:{seconds % 3600 // 60:02}:{seconds % 60:02}"
+
+class FFmpegProgress:
+    """
+    ffmpeg -progress 輸出的單次進度快照
+    """
+
+    def __init__(self, out_time, speed, fps, total_duration, elapsed, done):
+        self.out_time = out_time
+        self.speed = speed
+        self.fps = fps
+        self.total_duration = total_duration
+        self.elapsed = elapsed
+        self.done = done
+
+    @property
+    def percent(self):
+        """完成百分比，未知總時長時為 None"""
+        if not self.total_duration:
+            return None
+        return min(100.0, self.out_time / self.total_duration * 100)
+
+    @property
+    def eta(self):
+        """預估剩餘秒數，無法估計時為 None"""
+        if not self.total_duration:
+            return None
+        remaining = max(0.0, self.total_duration - self.out_time)
+        if self.speed:
+            return remaining / self.speed
+        if self.out_time > 0:
+            return remaining * self.elapsed / self.out_time
+        return None
+
+class FFmpegResult:
+    """
+    ffmpeg 執行結果；stderr 只保留最後幾行
+    """
+
+    def __init__(self, cmd, returncode, stderr, elapsed):
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stderr = stderr
+        self.elapsed = elapsed
+
+def print_progress(progress):
+    """
+    預設的進度回呼，在終端機同一行更新進度
+
+    Args:
+        progress (FFmpegProgress): 進度快照
+    """
+    parts = [f"⏳ {format_seconds(progress.out_time)}"]
+    if progress.percent is not None:
+        parts[0] = f"⏳ {progress.percent:5.1f}% {format_seconds(progress.out_time)}/{format_seconds(progress.total_duration)}"
+    if progress.speed:
+        parts.append(f"speed={progress.speed:.2f}x")
+    if progress.fps:
+        parts.append(f"fps={progress.fps:.0f}")
+    if progress.eta is not None and not progress.done:
+        parts.append(f"ETA {format_seconds(progress.eta)}")
+    sys.stdout.write("\r" + "  ".join(parts) + "   ")
+    if progress.done:
+        sys.stdout.write("\n")
+    sys.stdout.flush()
+
+def _parse_float(value):
+    try:
+        return float(value.rstrip('x'))
+    except (AttributeError, ValueError):
+        return None
+
+def with_progress_args(cmd):
+    """
+    在 ffmpeg 命令中加入機器可讀的進度輸出參數
+
+    Args:
+        cmd (list): ffmpeg 命令參數列表
+
+    Returns:
+        list: 加入 -progress pipe:1 -nostats 的命令
+    """
+    return [cmd[0], "-progress", "pipe:1", "-nostats"] + list(cmd[1:])
+
+class ProgressReader:
+    """
+    逐行解析 -progress 輸出，每收到一組完整的進度就呼叫回呼（同步與 asyncio 執行器共用）
+    """
+
+    def __init__(self, total_duration=None, progress_callback=None, start=None):
+        self.total_duration = total_duration
+        self.progress_callback = progress_callback
+        self.start = time.monotonic() if start is None else start
+        self._fields = {}
+
+    def feed(self, line):
+        """
+        處理一行 key=value 輸出
+
+        Args:
+            line (str): ffmpeg -progress 的一行輸出
+        """
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            return
+        self._fields[key] = value
+        if key != "progress":
+            return
+        if self.progress_callback is not None:
+            fields = self._fields
+            # out_time_us 為微秒；舊版 ffmpeg 只有 out_time_ms，但其單位實際上也是微秒
+            out_time = _parse_float(fields.get("out_time_us") or fields.get("out_time_ms")) or 0.0
+            self.progress_callback(FFmpegProgress(
+                out_time / 1000000,
+                _parse_float(fields.get("speed")),
+                _parse_float(fields.get("fps")),
+                self.total_duration,
+                time.monotonic() - self.start,
+                value == "end",
+            ))
+        self._fields = {}
+
+def run_ffmpeg(cmd, total_duration=None, progress_callback=None, stderr_lines=DEFAULT_STDERR_LINES):
+    """
+    執行 ffmpeg 並即時解析進度，不在記憶體中累積完整輸出
+
+    透過 -progress pipe:1 逐步讀取 out_time/speed/fps，stderr 只保留最後幾行供錯誤回報。
+
+    Args:
+        cmd (list): ffmpeg 命令參數列表
+        total_duration (float): 輸入總時長（秒），用於計算百分比與 ETA（可選）
+        progress_callback (callable): 每次收到進度時呼叫，參數為 FFmpegProgress（可選）
+        stderr_lines (int): 保留的 stderr 行數
+
+    Returns:
+        FFmpegResult: 執行結果
+    """
+    start = time.monotonic()
+    process = TracedProcess(
+        with_progress_args(cmd),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+
+    stderr_tail = deque(maxlen=stderr_lines)
+
+    def drain_stderr():
+        for line in process.stderr:
+            process.stderr_bytes += len(line.encode("utf-8"))
+            stderr_tail.append(line)
+
+    stderr_thread = threading.Thread(target=drain_stderr, daemon=True)
+    stderr_thread.start()
+
+    reader = ProgressReader(total_duration, progress_callback, start)
+    finished = False
+    try:
+        for line in process.stdout:
+            process.stdout_bytes += len(line.encode("utf-8"))
+            reader.feed(line)
+        finished = True
+    finally:
+        if not finished and process.popen.poll() is None:
+            # 進度回呼拋出例外或 Ctrl+C：終止 ffmpeg，避免它在背景繼續寫入不完整的輸出
+            process.kill()
+        stderr_thread.join()
+        returncode = process.wait()
+    return FFmpegResult(cmd, returncode, "".join(stderr_tail), time.monotonic() - start)
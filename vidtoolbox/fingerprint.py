@@ -0,0 +1,108 @@
+import os
+import hashlib
+from .memo import BoundedMemo
+
+# 每個取樣區塊的大小
+SAMPLE_SIZE = 64 * 1024
+
+# 指紋格式的版本，改變取樣方式時遞增
+FINGERPRINT_VERSION = 1
+
+# 同一程序中最近計算過的指紋與完整雜湊，鍵為 (絕對路徑, 大小, mtime_ns, inode, ...)
+MEMO_SIZE = 16384
+_memo = BoundedMemo(MEMO_SIZE)
+
+def _stat_key(abs_path, st, *extra):
+    return (abs_path, st.st_size, st.st_mtime_ns, st.st_ino) + extra
+
+def sample_offsets(size, sample_size=SAMPLE_SIZE):
+    """
+    取樣區塊的起始位置（開頭、中間、結尾）；檔案不大於三個區塊時整個檔案作為一個區塊
+
+    Args:
+        size (int): 檔案大小
+        sample_size (int): 區塊大小
+
+    Returns:
+        list: (offset, length) 列表
+    """
+    if size <= 3 * sample_size:
+        return [(0, size)]
+    return [(0, sample_size), ((size - sample_size) // 2, sample_size), (size - sample_size, sample_size)]
+
+def _read_samples(fd, offsets):
+    if hasattr(os, "pread"):
+        # 直接以 pread 讀取指定位置，不經過 Python 的檔案緩衝，也不移動檔案位置
+        return [os.pread(fd, length, offset) for offset, length in offsets]
+    import mmap
+    # 沒有 pread 的平台（Windows）改用 mmap，只有被讀取的頁面會載入
+    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as view:
+        return [view[offset:offset + length] for offset, length in offsets]
+
+def fingerprint(file_path, sample_size=SAMPLE_SIZE):
+    """
+    以檔案大小與開頭、中間、結尾的取樣計算內容指紋
+
+    只讀取最多三個區塊，因此數 GB 的影片也能在毫秒內完成；
+    與完整雜湊不同，只改動未取樣區域且大小不變的修改不會被偵測到，
+    因此只適合快速排除已改變的檔案，判斷「相同」時須再以 content_digest 確認。
+    同一次命令中未改變的檔案（大小、mtime、inode 相同）只計算一次。
+
+    Args:
+        file_path (str): 檔案路徑
+        sample_size (int): 每個取樣區塊的大小
+
+    Returns:
+        str: 十六進位指紋
+
+    Raises:
+        OSError: 無法讀取檔案
+    """
+    abs_path = os.path.abspath(str(file_path))
+    fd = os.open(abs_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        st = os.fstat(fd)
+        memo_key = _stat_key(abs_path, st, 'sampled', sample_size)
+        cached = _memo.get(memo_key)
+        if cached is not None:
+            return cached
+
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"vidtoolbox-fingerprint-v{FINGERPRINT_VERSION}:{st.st_size}:{sample_size}".encode("ascii"))
+        if st.st_size:
+            for block in _read_samples(fd, sample_offsets(st.st_size, sample_size)):
+                digest.update(block)
+        result = digest.hexdigest()
+    finally:
+        os.close(fd)
+
+    _memo.put(memo_key, result)
+    return result
+
+def content_digest(file_path):
+    """
+    計算檔案完整內容的 SHA-256（同一次命令中未改變的檔案只計算一次）
+
+    Args:
+        file_path (str): 檔案路徑
+
+    Returns:
+        str: 十六進位雜湊值
+
+    Raises:
+        OSError: 無法讀取檔案
+    """
+    abs_path = os.path.abspath(str(file_path))
+    with open(abs_path, "rb") as f:
+        st = os.fstat(f.fileno())
+        memo_key = _stat_key(abs_path, st, 'sha256')
+        cached = _memo.get(memo_key)
+        if cached is not None:
+            return cached
+        sha = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+        result = sha.hexdigest()
+
+    _memo.put(memo_key, result)
+    return result
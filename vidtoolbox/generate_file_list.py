@@ -1,9 +1,14 @@
 import os
+import shlex
 import argparse
-import glob
+import subprocess
 from pathlib import Path
+from .timeline import list_media_files
+from .video_specs import build_ffmpeg_command
+from .encoder_profiles import add_profile_arguments, profile_from_args
+from .process import add_trace_argument, enable_trace
 
-def generate_file_list(video_directory, output_file="file_list.txt", pattern="*.mp4", sort_by_name=True):
+def generate_file_list(video_directory, output_file="file_list.txt", pattern="*.mp4", sort_by_name=True, assume_yes=False, exclude=()):
     """
     自動生成 file_list.txt 檔案，用於 ffmpeg concat 功能
     
@@ -12,6 +17,8 @@ def generate_file_list(video_directory, output_file="file_list.txt", pattern="*.
         output_file (str): 輸出的檔案名稱，預設為 "file_list.txt"
         pattern (str): 檔案匹配模式，預設為 "*.mp4"
         sort_by_name (bool): 是否按檔案名稱排序，預設為 True
+        assume_yes (bool): 不詢問確認，直接生成（非互動模式）
+        exclude (set): 不列入的檔案名稱（例如先前的合併輸出與中斷留下的暫存輸出）
     
     Returns:
         str: 生成的 file_list.txt 檔案路徑
@@ -23,26 +30,23 @@ def generate_file_list(video_directory, output_file="file_list.txt", pattern="*.
     # 使用 pathlib 來處理跨平台路徑
     video_dir = Path(video_directory)
     
-    # 搜尋符合模式的影片檔案
-    video_files = list(video_dir.glob(pattern))
+    # 搜尋符合模式的影片檔案（按檔案名稱排序，如果需要）
+    video_files = [path for path in list_media_files(video_directory, pattern, sort_by_name) if path.name not in exclude]
     
     if not video_files:
         raise FileNotFoundError(f"在目錄 {video_directory} 中找不到符合 {pattern} 的檔案")
     
-    # 按檔案名稱排序（如果需要）
-    if sort_by_name:
-        video_files.sort(key=lambda x: x.name)
-    
     # 顯示找到的檔案
     print(f"\n📁 在目錄中找到 {len(video_files)} 個影片檔案:")
     for i, file_path in enumerate(video_files, 1):
         print(f"  {i}. {file_path.name}")
     
     # 確認檔案順序
-    confirm = input(f"\n✅ 確認檔案順序並生成 {output_file}？(Y/N): ").strip().lower()
-    if confirm != "y":
-        print("❌ 取消生成 file_list.txt")
-        return None
+    if not assume_yes:
+        confirm = input(f"\n✅ 確認檔案順序並生成 {output_file}？(Y/N): ").strip().lower()
+        if confirm != "y":
+            print("❌ 取消生成 file_list.txt")
+            return None
     
     # 生成 file_list.txt 的路徑
     file_list_path = video_dir / output_file
@@ -66,19 +70,59 @@ def generate_file_list(video_directory, output_file="file_list.txt", pattern="*.
     
     return str(file_list_path)
 
-def quick_merge_command(file_list_path, output_name="output.mp4"):
+def write_file_list(file_list_path, file_paths):
+    """
+    將影片檔案路徑寫入 ffmpeg concat 使用的檔案列表
+    
+    Args:
+        file_list_path (str): 輸出的檔案列表路徑
+        file_paths (list): 影片檔案路徑列表
+    """
+    with open(file_list_path, "w", encoding="utf-8") as f:
+        for file_path in file_paths:
+            # 使用絕對路徑，並將反斜線轉換為正斜線，確保 ffmpeg 相容性
+            normalized_path = os.path.abspath(str(file_path)).replace("\\", "/")
+            f.write(f"file '{normalized_path}'\n")
+
+def read_file_list(file_list_path):
+    """
+    讀取 file_list.txt 中的影片檔案路徑
+    
+    Args:
+        file_list_path (str): file_list.txt 的檔案路徑
+    
+    Returns:
+        list: 影片檔案路徑列表（相對路徑以 file_list.txt 所在目錄為基準）
+    """
+    base_dir = Path(file_list_path).parent
+    file_paths = []
+    with open(file_list_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith("file "):
+                continue
+            path = line[len("file "):].strip()
+            if len(path) >= 2 and path[0] == path[-1] == "'":
+                path = path[1:-1].replace("'\\''", "'")
+            file_paths.append(str(base_dir / path))
+    return file_paths
+
+def quick_merge_command(file_list_path, output_name="output.mp4", profile=None):
     """
-    生成快速合併的 ffmpeg 命令
+    生成重新編碼合併的 ffmpeg 命令字串（與 build_ffmpeg_command 的命令相同，可直接貼到終端機）
     
     Args:
         file_list_path (str): file_list.txt 的檔案路徑
         output_name (str): 輸出檔案名稱
+        profile (EncoderProfile): 編碼 profile 或名稱（預設依設定檔，再來是 archive）
     
     Returns:
         str: ffmpeg 命令字串
     """
-    cmd = f'ffmpeg -f concat -safe 0 -i "{file_list_path}" -c:v libx264 -preset slow -crf 18 -c:a aac -b:a 192k "{output_name}"'
-    return cmd
+    cmd = build_ffmpeg_command(str(file_list_path), str(output_name), profile=profile)
+    if os.name == 'nt':
+        return subprocess.list2cmdline(cmd)
+    return " ".join(shlex.quote(arg) for arg in cmd)
 
 def main():
     parser = argparse.ArgumentParser(description="自動生成 file_list.txt 檔案，用於 ffmpeg 影片合併")
@@ -87,20 +131,26 @@ def main():
     parser.add_argument("-p", "--pattern", default="*.mp4", help="檔案匹配模式 (預設: *.mp4)")
     parser.add_argument("--no-sort", action="store_true", help="不按檔案名稱排序")
     parser.add_argument("--show-merge-cmd", action="store_true", help="顯示合併命令")
+    parser.add_argument("-y", "--yes", action="store_true", help="不詢問確認 (非互動模式)")
+    add_profile_arguments(parser)
     
+    add_trace_argument(parser)
     args = parser.parse_args()
+    enable_trace(args.trace, "vid-filelist")
+    profile = profile_from_args(parser, args)
     
     try:
         file_list_path = generate_file_list(
             args.video_directory,
             args.output,
             args.pattern,
-            not args.no_sort
+            not args.no_sort,
+            args.yes
         )
         
         if file_list_path and args.show_merge_cmd:
             print(f"\n🚀 合併命令:")
-            merge_cmd = quick_merge_command(file_list_path)
+            merge_cmd = quick_merge_command(file_list_path, profile=profile)
             print(merge_cmd)
             
     except Exception as e:
@@ -1,6 +1,10 @@
 import os
 import argparse
-import subprocess
+from fractions import Fraction
+from vidtoolbox.chapters import write_chapter_index, write_ffmetadata, chapter_index_path, ffmetadata_path
+from vidtoolbox.probe import set_cache_enabled
+from vidtoolbox.timeline import Timeline, list_media_files
+from vidtoolbox.process import add_trace_argument, enable_trace
 
 def format_duration(seconds):
     """Convert seconds to HH:MM:SS format."""
@@ -9,47 +13,64 @@ def format_duration(seconds):
     seconds = int(seconds % 60)
     return f"{hours:02}:{minutes:02}:{seconds:02}"
 
-def create_file_list(video_directory):
-    """Retrieve video files and display the order for user confirmation."""
-    files = sorted([f for f in os.listdir(video_directory) if f.endswith('.mp4')])
+def create_file_list(video_directory, assume_yes=False, exclude=()):
+    """Retrieve video files and display the order for user confirmation (skipped when assume_yes is set).
+
+    Files named in exclude (e.g. a previously merged output) are left out.
+    """
+    files = [path.name for path in list_media_files(video_directory, "*.mp4") if path.name not in exclude]
 
     print("\n📌 The chapter timestamps will use the following video order:")
     for index, file in enumerate(files, start=1):
         print(f"  {index}. {file}")
 
+    if assume_yes:
+        return files
+
     confirm = input("\n✅ Confirm the order? (Y/N): ").strip().lower()
     if confirm != "y":
         print("❌ Timestamp generation canceled!")
         return None
     return files
 
-def generate_timestamps(video_directory):
-    """Generate YouTube chapter timestamps based on video durations."""
-    files = create_file_list(video_directory)
+def generate_timestamps(video_directory, jobs=None, assume_yes=False, exclude=()):
+    """Generate YouTube chapter timestamps based on video durations.
+
+    Durations are accumulated as exact rationals (stream duration_ts * time_base),
+    so there is no drift over long playlists. Besides the text file, a JSON
+    chapter index and an ffmetadata file are written next to it.
+
+    Returns the Timeline built from the probes so callers can reuse it,
+    or None if the order was rejected or a file could not be probed.
+    """
+    files = create_file_list(video_directory, assume_yes, exclude)
     if files is None:
-        return
+        return None
 
-    timestamps = []
-    total_time = 0  # Accumulated time
+    # Probe all files concurrently once; the timeline keeps the original order
+    timeline = Timeline.from_files([os.path.join(video_directory, file) for file in files], jobs)
+    for segment in timeline.failures:
+        print(f"❌ Failed to probe {segment.name}: {segment.error}")
+        print("❌ Timestamp generation canceled!")
+        return None
 
-    for file in files:
-        file_path = os.path.join(video_directory, file)
+    output_timestamps = write_timestamp_files(video_directory, timeline)
+    print(f"\n✅ YouTube chapter timestamps generated: {output_timestamps}")
+    return timeline
 
-        # Get video duration
-        cmd_duration = [
-            'ffprobe', '-v', 'error', '-select_streams', 'v:0',
-            '-show_entries', 'format=duration', '-of', 'csv=p=0',
-            file_path
-        ]
-        duration = float(subprocess.check_output(cmd_duration).decode().strip())
+def write_timestamp_files(video_directory, timeline):
+    """Write `<folder>.txt`, the JSON chapter index and the ffmetadata chapters for a timeline.
 
-        # Format time
-        timestamp = format_duration(total_time)
-        chapter_name = os.path.splitext(file)[0]  # Remove .mp4 extension
-        timestamps.append(f"{timestamp} - {chapter_name}")
+    Returns the path of the timestamps text file.
+    """
+    # Exact rational chapter boundaries (titles without the .mp4 extension)
+    chapters = timeline.chapters()
 
-        # Update accumulated time
-        total_time += duration
+    timestamps = []
+    for chapter in chapters:
+        # Format time (truncated to whole seconds only for display)
+        timestamp = format_duration(Fraction(chapter['start']))
+        timestamps.append(f"{timestamp} - {chapter['title']}")
 
     # Default filename is the folder name
     folder_name = os.path.basename(os.path.normpath(video_directory))
@@ -59,7 +80,10 @@ def generate_timestamps(video_directory):
     with open(output_timestamps, "w", encoding="utf-8") as f:
         f.write("\n".join(timestamps))
 
-    print(f"\n✅ YouTube chapter timestamps generated: {output_timestamps}")
+    # Machine-readable chapter index and ffmetadata chapters for the merge
+    write_chapter_index(chapter_index_path(video_directory), chapters)
+    write_ffmetadata(ffmetadata_path(video_directory), chapters)
+    return output_timestamps
 
 def display_timestamps(video_directory):
     """Read and display the content of timestamps.txt."""
@@ -79,9 +103,15 @@ def display_timestamps(video_directory):
 def main():
     parser = argparse.ArgumentParser(description="Generate YouTube chapter timestamps")
     parser.add_argument("video_directory", help="Directory containing video files")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the persistent ffprobe cache")
+    parser.add_argument("-j", "--jobs", type=int, help="Number of concurrent ffprobe workers (default: CPU count)")
+    parser.add_argument("-y", "--yes", action="store_true", help="Do not ask for confirmation (non-interactive mode)")
     
+    add_trace_argument(parser)
     args = parser.parse_args()
-    generate_timestamps(args.video_directory)
+    enable_trace(args.trace, "vid-timestamps")
+    set_cache_enabled(not args.no_cache)
+    generate_timestamps(args.video_directory, args.jobs, args.yes)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
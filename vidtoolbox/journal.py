@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import threading
+from .manifest import file_identity, is_unchanged
+
+def atomic_output_path(output_file):
+    """
+    暫存輸出的路徑；保留原副檔名讓 ffmpeg 能判斷格式（例如 a.mp3 -> a.part.mp3）
+
+    Args:
+        output_file (str): 最終輸出路徑
+
+    Returns:
+        str: 暫存輸出路徑
+    """
+    stem, extension = os.path.splitext(str(output_file))
+    return f"{stem}.part{extension}"
+
+def commit_output(part_file, output_file):
+    """以改名的方式完成輸出，讀取端永遠不會看到寫到一半的檔案"""
+    os.replace(part_file, output_file)
+
+def discard_output(part_file):
+    """刪除失敗或中斷留下的暫存輸出"""
+    try:
+        os.remove(part_file)
+    except FileNotFoundError:
+        pass
+
+def inputs_identity(input_files, digest=True, previous=None, full=False):
+    """
+    多個輸入檔案的識別資訊（路徑、大小、修改時間、inode 與內容雜湊）
+
+    Args:
+        input_files (list): 輸入檔案路徑列表
+        digest (bool): 是否加入取樣指紋
+        previous (list): 先前記錄的識別資訊（可選）；未改變的檔案沿用其雜湊
+        full (bool): 是否加入完整內容雜湊（需要讀取整個檔案）
+
+    Returns:
+        list: 識別資訊列表
+    """
+    previous = {entry.get('path'): entry for entry in previous or []}
+    identities = []
+    for path in input_files:
+        abs_path = os.path.abspath(str(path))
+        identities.append(dict(file_identity(path, digest, previous.get(abs_path), full), path=abs_path))
+    return identities
+
+def _same_inputs(recorded, input_files):
+    """以路徑與 is_unchanged 比較輸入（大小與修改時間，不同時以內容雜湊確認）"""
+    if len(recorded) != len(input_files):
+        return False
+    for entry, path in zip(recorded, input_files):
+        if entry.get('path') != os.path.abspath(str(path)) or not is_unchanged(entry, path):
+            return False
+    return True
+
+class BatchJournal:
+    """
+    批次工作的日誌（JSON Lines，每行一筆完成或失敗記錄）
+
+    每筆記錄寫入後立即 fsync，程序中斷時最多遺失最後一行；
+    同一項目以最後一筆記錄為準。續傳時只有輸入未改變、輸出仍存在且未被修改的項目才視為已完成。
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._records = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 中斷時寫到一半的最後一行
+                        continue
+                    self._records[record['key']] = record
+        except OSError:
+            pass
+
+    def _append(self, record):
+        with self._lock:
+            self._records[record['key']] = record
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record_done(self, key, input_files, output_file, full_digest=False):
+        """
+        記錄完成的項目
+
+        預設只記錄大小、修改時間、inode 與取樣指紋；full_digest 為 True 時（--resume）
+        另外記錄完整內容雜湊，讓之後被 touch 或複製回來的檔案仍能確認為相同。
+
+        Args:
+            key (str): 項目識別（輸出路徑，以絕對路徑保存）
+            input_files (list): 輸入檔案路徑列表
+            output_file (str): 輸出檔案路徑
+            full_digest (bool): 是否計算輸入與輸出的完整內容雜湊
+        """
+        key = os.path.abspath(str(key))
+        previous = self._records.get(key)
+        previous_output = previous.get('output_identity') if previous else None
+        self._append({
+            'key': key,
+            'status': 'done',
+            'inputs': inputs_identity(input_files, previous=previous['inputs'] if previous else None,
+                                      full=full_digest),
+            'output': os.path.abspath(str(output_file)),
+            'output_size': os.path.getsize(output_file),
+            'output_identity': file_identity(output_file, previous=previous_output, full=full_digest),
+            'time': time.time(),
+        })
+
+    def record_failed(self, key, input_files, error=None):
+        """
+        記錄失敗的項目（續傳時會重試）
+
+        Args:
+            key (str): 項目識別（輸出路徑）
+            input_files (list): 輸入檔案路徑列表
+            error (str): 錯誤訊息（可選）
+        """
+        self._append({
+            'key': os.path.abspath(str(key)),
+            'status': 'failed',
+            'inputs': inputs_identity(input_files, digest=False),
+            'error': error,
+            'time': time.time(),
+        })
+
+    def status(self, key):
+        """項目最後一筆記錄的狀態（done / failed），沒有記錄時為 None"""
+        record = self._records.get(os.path.abspath(str(key)))
+        return record['status'] if record else None
+
+    def is_done(self, key, input_files, output_file):
+        """
+        檢查項目是否已完成且仍然有效
+
+        Args:
+            key (str): 項目識別
+            input_files (list): 輸入檔案路徑列表
+            output_file (str): 輸出檔案路徑
+
+        Returns:
+            bool: 記錄為完成、輸入未改變、輸出存在且未被修改
+        """
+        record = self._records.get(os.path.abspath(str(key)))
+        if record is None or record['status'] != 'done':
+            return False
+        if 'output_identity' in record:
+            if not is_unchanged(record['output_identity'], output_file):
+                return False
+        else:
+            # 舊版日誌只記錄輸出大小
+            try:
+                if os.path.getsize(output_file) != record['output_size']:
+                    return False
+            except OSError:
+                return False
+        return _same_inputs(record['inputs'], input_files)
@@ -0,0 +1,100 @@
+import os
+import json
+from .fingerprint import fingerprint, content_digest
+
+MANIFEST_VERSION = 1
+
+def manifest_path(output_file):
+    """合併清單的路徑（與輸出檔案同目錄，例如 show.mp4 -> show.manifest.json）"""
+    return os.path.splitext(output_file)[0] + ".manifest.json"
+
+def _same_stat(entry, st):
+    """大小、修改時間與 inode（有記錄時）都相同"""
+    return (st.st_size == entry.get('size') and st.st_mtime_ns == entry.get('mtime_ns')
+            and entry.get('inode', st.st_ino) == st.st_ino)
+
+def file_identity(file_path, digest=True, previous=None, full=False):
+    """
+    取得判斷檔案是否改變所需的資訊
+
+    完整內容雜湊需要讀取整個檔案，只在 full 為 True 時（--resume、增量合併的輸入）計算；
+    沒有完整雜湊的記錄在修改時間或 inode 改變時一律視為已改變。
+
+    Args:
+        file_path (str): 檔案路徑
+        digest (bool): 是否加入取樣指紋（只讀取三個區塊）
+        previous (dict): 同一檔案先前的記錄（可選）；大小、修改時間與 inode 相同時沿用其雜湊，不重新讀取檔案
+        full (bool): 是否加入完整內容雜湊
+
+    Returns:
+        dict: size、mtime_ns、inode，以及 fingerprint（digest 為 True 時）與 sha256（full 為 True 時）
+    """
+    st = os.stat(file_path)
+    identity = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'inode': st.st_ino}
+    if not digest:
+        return identity
+    reuse = previous if previous and _same_stat(previous, st) else {}
+    identity['fingerprint'] = reuse.get('fingerprint') or fingerprint(file_path)
+    if full:
+        identity['sha256'] = reuse.get('sha256') or content_digest(file_path)
+    return identity
+
+def is_unchanged(entry, file_path):
+    """
+    檢查檔案是否仍與清單中記錄的相同
+
+    大小、修改時間與 inode 相同即視為相同，不讀取檔案。
+    修改時間或 inode 不同時（複製、移動、其他主機）先以取樣指紋快速排除已改變的檔案，
+    再以完整內容雜湊確認；取樣指紋不會單獨作為相同的依據。沒有記錄完整雜湊時視為已改變。
+
+    Args:
+        entry (dict): 清單中的檔案記錄
+        file_path (str): 檔案路徑
+
+    Returns:
+        bool: 檔案存在且內容與記錄相同
+    """
+    try:
+        st = os.stat(file_path)
+        if st.st_size != entry.get('size'):
+            return False
+        if _same_stat(entry, st):
+            return True
+        if 'fingerprint' not in entry or 'sha256' not in entry:
+            return False
+        return fingerprint(file_path) == entry['fingerprint'] and content_digest(file_path) == entry['sha256']
+    except OSError:
+        return False
+
+def load_manifest(path):
+    """
+    讀取合併清單
+
+    Args:
+        path (str): 清單路徑
+
+    Returns:
+        dict: 清單內容；不存在、無法解析或版本不符時為 None
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def write_manifest(path, manifest):
+    """
+    寫入合併清單；先寫入暫存檔再改名，中斷時不會留下不完整的清單
+
+    Args:
+        path (str): 清單路徑
+        manifest (dict): 清單內容（version 會自動加入）
+    """
+    data = dict(manifest, version=MANIFEST_VERSION)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
@@ -0,0 +1,43 @@
+import threading
+from collections import OrderedDict
+
+class BoundedMemo:
+    """
+    有筆數上限的記憶體快取（LRU），可在多個執行緒中共用
+
+    供同一程序中的探測結果、內容指紋等使用；vid-watch 等長時間執行的程序
+    也不會因為看過的檔案越來越多而無限增加記憶體用量。
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        查詢並標記為最近使用
+
+        Returns:
+            object: 保存的值，沒有時為 None
+        """
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """保存值，超過上限時刪除最久未使用的項目"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -1,11 +1,74 @@
 import os
+import shutil
 import argparse
-import subprocess
-from vidtoolbox.generate_timestamps import generate_timestamps, create_file_list, display_timestamps
-from vidtoolbox.video_specs import check_video_compatibility, get_merge_options, get_quality_settings, build_ffmpeg_command, build_force_merge_command
+from fractions import Fraction
+from vidtoolbox.generate_file_list import write_file_list
+from vidtoolbox.generate_timestamps import generate_timestamps, display_timestamps, format_duration
+from vidtoolbox.chapters import add_chapter_metadata, chapter_index_path, ffmetadata_path, write_chapter_index, write_ffmetadata
+from vidtoolbox.journal import BatchJournal, atomic_output_path, commit_output, discard_output
+from vidtoolbox.manifest import manifest_path, file_identity, is_unchanged, load_manifest, write_manifest
+from vidtoolbox.subtitle_shift import shift_subtitle_file
+from vidtoolbox.timeline import Segment, Timeline, list_media_files
+from vidtoolbox.ffmpeg_runner import run_ffmpeg, print_progress
+from vidtoolbox.probe import set_cache_enabled
+from vidtoolbox.segment_merge import SEGMENT_DIRECTORY, build_intermediate_spec, encode_segments
+from vidtoolbox.video_specs import spec_key, get_video_specs, check_video_compatibility, get_merge_options, get_quality_settings, build_ffmpeg_command, build_force_merge_command, MERGE_OPTION_CHOICES, validate_crf, validate_audio_bitrate, select_target_spec, can_conform_to
+from vidtoolbox.encoder_profiles import get_profile, add_profile_arguments, profile_from_args
+from vidtoolbox.output_cache import output_cache_key, fetch_cached_output, store_cached_output, set_output_cache_enabled
+from vidtoolbox.process import add_trace_argument, enable_trace
+
+# Journal of completed merges, kept in the video directory
+MERGE_JOURNAL = ".vidtoolbox_merge.journal.jsonl"
+
+def resolve_output_path(video_directory, output_file=None):
+    """Return the merged output path (default: the folder name, inside the video directory)."""
+    if not output_file:
+        folder_name = os.path.basename(os.path.normpath(video_directory))
+        output_file = f"{folder_name}.mp4"
+    return os.path.join(video_directory, output_file)
+
+def conform_outliers(files, video_directory, target, quality_settings, work_directory, jobs=None):
+    """Re-encode only the files outside the target spec group so that every input matches it.
+
+    Returns the list of paths to concatenate (originals for matching files,
+    conformed segments for outliers), or None if any outlier failed to convert.
+    """
+    matching = set(target['files'])
+    outliers = [file for file in files if file not in matching]
+    print(f"\n🧩 Smart merge: {len(files) - len(outliers)} file(s) match the target spec, re-encoding {len(outliers)} file(s)")
+
+    segments = encode_segments(
+        [os.path.join(video_directory, file) for file in outliers],
+        work_directory, target['specs'], quality_settings, jobs
+    )
+    if segments is None:
+        return None
+
+    conformed = dict(zip(outliers, segments))
+    return [conformed.get(file, os.path.join(video_directory, file)) for file in files]
+
+def merge_videos(video_directory, output_file=None, keep_filelist=False, jobs=None,
+                 assume_yes=False, on_incompatible=None, crf=None, audio_bitrate=None,
+                 parallel_encode=False, resume=False, profile=None):
+    """Generate timestamps.txt first, confirm, and then merge videos.
+
+    With assume_yes every confirmation is skipped; incompatible inputs are then
+    handled according to on_incompatible (reencode/force/abort/smart, default reencode)
+    and the re-encode quality falls back to crf/audio_bitrate or their defaults.
+    With parallel_encode the re-encode path converts each file to a common
+    intermediate spec in parallel (resumable) and joins the parts in copy mode.
+    The output is written to a .part file and renamed when ffmpeg succeeds;
+    with resume an output the journal verifies (same inputs, unmodified
+    output) is
+    not merged again. profile (an EncoderProfile or its name, default from the
+    config file) selects the encoder, preset and default quality for re-encoding.
+
+    Returns the Timeline of the merged files on success, None otherwise.
+    """
+    if assume_yes and on_incompatible is None:
+        on_incompatible = "reencode"
+    profile = get_profile(profile)
 
-def merge_videos(video_directory, output_file=None, keep_filelist=False):
-    """Generate timestamps.txt first, confirm, and then merge videos."""
     # Ensure timestamps.txt is up-to-date
     folder_name = os.path.basename(os.path.normpath(video_directory))
     timestamps_path = os.path.join(video_directory, f"{folder_name}.txt")
@@ -14,68 +77,108 @@ def merge_videos(video_directory, output_file=None, keep_filelist=False):
         print(f"\n🛑 Detected an existing `{folder_name}.txt`, regenerating...")
         os.remove(timestamps_path)
 
-    generate_timestamps(video_directory)  # Generate timestamps.txt first
+    output_file = resolve_output_path(video_directory, output_file)
+
+    # Generate timestamps.txt first; the returned timeline is reused for the merge.
+    # A previous (or interrupted) output in the same folder is never merged into itself.
+    exclude = {os.path.basename(output_file), os.path.basename(atomic_output_path(output_file))}
+    timeline = generate_timestamps(video_directory, jobs, assume_yes, exclude)
+    if timeline is None:
+        return
 
     # Read and display `timestamps.txt`
     if not display_timestamps(video_directory):
         return
 
     # Confirm if the timestamps are correct
-    confirm = input("\n✅ Confirm that the timestamps are correct? (Y/N): ").strip().lower()
-    if confirm != "y":
-        print("❌ Merge canceled!")
-        return
+    if not assume_yes:
+        confirm = input("\n✅ Confirm that the timestamps are correct? (Y/N): ").strip().lower()
+        if confirm != "y":
+            print("❌ Merge canceled!")
+            return
 
-    # Ensure that the merged video does not include an existing merged file
-    files = create_file_list(video_directory)
-    if files is None:
-        return
+    # Merge exactly the files (and order) the timestamps were generated from
+    files = [segment.name for segment in timeline]
+
+    # The journal remembers completed merges; with resume a verified output is kept as is
+    journal = BatchJournal(os.path.join(video_directory, MERGE_JOURNAL))
+    if resume and journal.is_done(output_file, timeline.files, output_file):
+        print(f"\n⏭️  {os.path.basename(output_file)} is already merged from the same inputs (verified), skipping")
+        return timeline
+    # ffmpeg writes to a temporary file that is renamed only after it succeeds
+    part_file = atomic_output_path(output_file)
 
     # Check video compatibility
-    compatibility_result = check_video_compatibility(files, video_directory)
+    compatibility_result = check_video_compatibility(files, video_directory, jobs)
     print(f"\n{compatibility_result['message']}")
 
-    # Default video name is the folder name
-    if not output_file:
-        output_file = os.path.join(video_directory, f"{folder_name}.mp4")
-    else:
-        output_file = os.path.join(video_directory, output_file)
-
     # Generate file_list.txt
     file_list_path = os.path.join(video_directory, "file_list.txt")
-    with open(file_list_path, "w", encoding="utf-8") as f:
-        for file in files:
-            # Use the correct absolute path to avoid multi-directory issues
-            file_path = os.path.abspath(os.path.join(video_directory, file))
-            # Normalize path separators for ffmpeg compatibility
-            normalized_path = file_path.replace("\\", "/")
-            f.write(f"file '{normalized_path}'\n")
+    write_file_list(file_list_path, [os.path.join(video_directory, file) for file in files])
+    segment_directory = None
+    # Only whole-file re-encodes go through the output cache; copy merges are cheap to redo
+    reencode = False
 
     # Choose merge method based on compatibility
     if compatibility_result['compatible']:
         # Use fast merge (copy mode)
         print(f"\n🚀 **Starting fast video merge, output file:** {output_file}\n")
-        cmd = [
-            "ffmpeg", "-f", "concat", "-safe", "0",
-            "-i", file_list_path, "-c", "copy", output_file
-        ]
+        cmd = build_force_merge_command(file_list_path, part_file)
     else:
         # Incompatible videos - ask user for options
-        choice = get_merge_options()
+        choice = get_merge_options(on_incompatible)
+        
+        target = select_target_spec(compatibility_result) if choice == "4" else None
+        if choice == "4" and (target is None or not can_conform_to(target['specs'])):
+            print("⚠️  無法重新編碼成多數檔案的規格，改為重新編碼全部檔案")
+            choice = "1"
         
-        if choice == "1":
+        if choice == "1" and parallel_encode:
+            # Parallel segment-wise re-encode: every file to the same intermediate spec, then copy-concat
+            quality_settings = get_quality_settings(crf, audio_bitrate, assume_defaults=assume_yes, profile=profile)
+            target = select_target_spec(compatibility_result)
+            if target is None:
+                print("❌ Video merge failed! No readable video specs")
+                return
+            print(f"📊 畫質設定: profile={profile.name}, CRF={quality_settings['crf']}, 音訊={quality_settings['audio_bitrate']}")
+            segment_directory = os.path.join(video_directory, SEGMENT_DIRECTORY)
+            segments = encode_segments(
+                [os.path.join(video_directory, file) for file in files],
+                segment_directory, build_intermediate_spec(target['specs'], profile), quality_settings, jobs
+            )
+            if segments is None:
+                print("❌ Video merge failed!")
+                return
+            write_file_list(file_list_path, segments)
+            print(f"\n🚀 **Joining re-encoded segments (copy mode), output file:** {output_file}\n")
+            
+            cmd = build_force_merge_command(file_list_path, part_file)
+        elif choice == "1":
             # Re-encode merge
-            quality_settings = get_quality_settings()
+            quality_settings = get_quality_settings(crf, audio_bitrate, assume_defaults=assume_yes, profile=profile)
             print(f"\n🚀 **Starting re-encode video merge, output file:** {output_file}\n")
-            print(f"📊 畫質設定: CRF={quality_settings['crf']}, 音訊={quality_settings['audio_bitrate']}")
+            print(f"📊 畫質設定: profile={profile.name}, CRF={quality_settings['crf']}, 音訊={quality_settings['audio_bitrate']}")
             
-            cmd = build_ffmpeg_command(file_list_path, output_file, quality_settings)
+            cmd = build_ffmpeg_command(file_list_path, part_file, quality_settings, profile)
+            reencode = not profile.is_copy
         elif choice == "2":
             # Force merge (copy mode)
             print(f"\n🚀 **Starting force merge (copy mode), output file:** {output_file}\n")
             print("⚠️  警告：如果影片規格不同，可能會失敗")
             
-            cmd = build_force_merge_command(file_list_path, output_file)
+            cmd = build_force_merge_command(file_list_path, part_file)
+        elif choice == "4":
+            # Smart merge: re-encode only the outliers, then concat everything in copy mode
+            quality_settings = get_quality_settings(crf, audio_bitrate, assume_defaults=assume_yes, profile=profile)
+            segment_directory = os.path.join(video_directory, SEGMENT_DIRECTORY)
+            concat_paths = conform_outliers(files, video_directory, target, quality_settings, segment_directory, jobs)
+            if concat_paths is None:
+                print("❌ Video merge failed!")
+                return
+            write_file_list(file_list_path, concat_paths)
+            print(f"\n🚀 **Starting smart merge (copy mode), output file:** {output_file}\n")
+            
+            cmd = build_force_merge_command(file_list_path, part_file)
         else:
             # Cancel merge
             print("❌ 合併已取消")
@@ -83,19 +186,47 @@ def merge_videos(video_directory, output_file=None, keep_filelist=False):
                 os.remove(file_list_path)
             return
 
+    # Embed the chapters generated with the timestamps in the same ffmpeg pass
+    metadata_file = ffmetadata_path(video_directory)
+    chapter_inputs = []
+    if os.path.exists(metadata_file):
+        cmd = add_chapter_metadata(cmd, metadata_file)
+        chapter_inputs.append(metadata_file)
+
+    # The same inputs re-encoded with the same arguments before: reuse that output
+    cache_key = None
+    if reencode:
+        cache_key = output_cache_key(cmd, timeline.files + chapter_inputs, part_file, {file_list_path: "{file_list}"})
+    method = fetch_cached_output(cache_key, output_file)
+    if method:
+        print(f"\n♻️  Reusing the cached re-encode ({method}), ffmpeg skipped")
+        journal.record_done(output_file, timeline.files, output_file, full_digest=resume)
+        print(f"✅ Video merge completed! Output file: {output_file}")
+        if not keep_filelist:
+            os.remove(file_list_path)
+        return timeline
+
     # Execute ffmpeg command
     print(f"執行命令: {' '.join(cmd)}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    total_duration = float(timeline.total_duration)
+    result = run_ffmpeg(cmd, total_duration, print_progress)
     
     if result.returncode == 0:
+        commit_output(part_file, output_file)
+        store_cached_output(cache_key, output_file)
+        journal.record_done(output_file, timeline.files, output_file, full_digest=resume)
         print(f"✅ Video merge completed! Output file: {output_file}")
+        if segment_directory:
+            # Segments are kept on failure so that a rerun can resume
+            shutil.rmtree(segment_directory, ignore_errors=True)
+            print(f"🧹 `{SEGMENT_DIRECTORY}` deleted")
     else:
         print(f"❌ Video merge failed!")
         print(f"錯誤代碼: {result.returncode}")
-        if result.stdout:
-            print(f"標準輸出: {result.stdout}")
         if result.stderr:
             print(f"錯誤訊息: {result.stderr}")
+        discard_output(part_file)
+        journal.record_failed(output_file, timeline.files, f"ffmpeg exited with {result.returncode}")
         return
 
     # **Automatically delete file_list.txt**
@@ -103,14 +234,231 @@ def merge_videos(video_directory, output_file=None, keep_filelist=False):
         os.remove(file_list_path)
         print("🧹 `file_list.txt` deleted")
 
+    return timeline
+
+def merged_subtitles_path(video_directory):
+    """Default path of the merged subtitles (same name vid-subtitles uses)."""
+    folder_name = os.path.basename(os.path.normpath(video_directory))
+    return os.path.join(video_directory, f"{folder_name}_merged.srt")
+
+def append_subtitles(segments, video_directory, state):
+    """Append the subtitles of newly merged segments (ep1.mp4 -> ep1.srt) to the merged SRT.
+
+    Each subtitle file is shifted to its segment's start on the timeline and
+    written once; the state (next cue index, merged files) is returned updated
+    for the manifest. Segments without a matching .srt are skipped.
+    """
+    pending = []
+    for segment in segments:
+        subtitle_file = os.path.join(video_directory, f"{segment.title}.srt")
+        if os.path.exists(subtitle_file):
+            pending.append((segment, subtitle_file))
+    if not pending:
+        return state
+
+    if state is None:
+        state = {'file': os.path.basename(merged_subtitles_path(video_directory)), 'next_index': 1, 'merged': []}
+    subtitle_path = os.path.join(video_directory, state['file'])
+    # Start over if the merged file disappeared; otherwise only append
+    mode = "a" if state['merged'] and os.path.exists(subtitle_path) else "w"
+    if mode == "w":
+        state = dict(state, next_index=1, merged=[])
+
+    index = state['next_index']
+    merged = list(state['merged'])
+    with open(subtitle_path, mode, encoding="utf-8") as output:
+        for segment, subtitle_file in pending:
+            offset_ms = int(round(segment.start * 1000))
+            index, _, _ = shift_subtitle_file(subtitle_file, offset_ms, index, output)
+            merged.append(os.path.basename(subtitle_file))
+            print(f"📝 Subtitles appended: {os.path.basename(subtitle_file)}")
+    return dict(state, next_index=index, merged=merged)
+
+def record_manifest(video_directory, output_file, timeline, subtitles=None, previous=None):
+    """Write the manifest describing what output_file currently contains.
+
+    Inputs get a full content hash so that touched or copied files are still
+    recognised; hashes of files unchanged since the previous manifest are
+    carried over instead of reading the files again. The merged output is
+    rewritten on every append, so it is only identified by its stat and
+    sampled fingerprint; if it is touched the next run rebuilds it.
+    """
+    specs = get_video_specs(output_file)
+    if specs is None:
+        print("⚠️  Could not probe the merged output, the next incremental run will rebuild it")
+        return
+    previous_files = {entry['name']: entry for entry in previous['files']} if previous else {}
+    write_manifest(manifest_path(output_file), {
+        'output': os.path.basename(output_file),
+        'output_identity': file_identity(output_file),
+        'spec_key': list(spec_key(specs)),
+        'files': [
+            dict(file_identity(segment.path, previous=previous_files.get(segment.name), full=True),
+                 name=segment.name, duration=str(segment.duration))
+            for segment in timeline
+        ],
+        'subtitles': subtitles,
+    })
+
+def find_stale_reason(manifest, video_directory, output_file, files):
+    """Return why the output cannot simply be extended, or None if only new files were added."""
+    if manifest is None:
+        return "No usable merge manifest"
+    if not os.path.exists(output_file) or not is_unchanged(manifest['output_identity'], output_file):
+        return "The merged output is missing or was modified"
+    merged = manifest['files']
+    if files[:len(merged)] != [entry['name'] for entry in merged]:
+        return "Previously merged files were removed or reordered"
+    for entry in merged:
+        if not is_unchanged(entry, os.path.join(video_directory, entry['name'])):
+            return f"{entry['name']} changed since the last merge"
+    return None
+
+def incremental_merge(video_directory, output_file=None, keep_filelist=False, jobs=None,
+                      assume_yes=False, on_incompatible=None, crf=None, audio_bitrate=None,
+                      parallel_encode=False, profile=None):
+    """Append only the files added since the last merge to the existing output.
+
+    What the output contains is recorded in a manifest next to it. New files
+    that match the output spec are joined to it in copy mode; the timestamps
+    file is extended, the chapters are updated and the subtitles of the new
+    files are appended to the merged SRT. Anything else (no manifest, changed
+    or reordered inputs, incompatible new files) falls back to a full merge.
+
+    Returns True on success.
+    """
+    requested_output = output_file
+    output_file = resolve_output_path(video_directory, output_file)
+    folder_name = os.path.basename(os.path.normpath(video_directory))
+    manifest = load_manifest(manifest_path(output_file))
+    exclude = {os.path.basename(output_file), os.path.basename(atomic_output_path(output_file))}
+    files = [path.name for path in list_media_files(video_directory, "*.mp4") if path.name not in exclude]
+
+    def full_merge(reason):
+        print(f"\n🔁 {reason}, running a full merge")
+        timeline = merge_videos(video_directory, requested_output, keep_filelist, jobs, assume_yes,
+                                on_incompatible, crf, audio_bitrate, parallel_encode, profile=profile)
+        if timeline is None:
+            return False
+        subtitles = append_subtitles(timeline, video_directory, None)
+        record_manifest(video_directory, output_file, timeline, subtitles, manifest)
+        return True
+
+    reason = find_stale_reason(manifest, video_directory, output_file, files)
+    if reason:
+        return full_merge(reason)
+
+    merged = manifest['files']
+    new_files = files[len(merged):]
+    if not new_files:
+        print(f"✅ {os.path.basename(output_file)} is up to date ({len(merged)} file(s) merged)")
+        return True
+
+    print(f"\n📥 {len(new_files)} new file(s) to append:")
+    for index, file in enumerate(new_files, start=len(merged) + 1):
+        print(f"  {index}. {file}")
+
+    # Probe only the new files; merged ones come from the manifest
+    new_timeline = Timeline.from_files([os.path.join(video_directory, file) for file in new_files], jobs)
+    for segment in new_timeline.failures:
+        print(f"❌ Failed to probe {segment.name}: {segment.error}")
+        return False
+    target = tuple(manifest['spec_key'])
+    mismatched = [segment.name for segment in new_timeline if spec_key(segment.probe.to_specs()) != target]
+    if mismatched:
+        return full_merge(f"{', '.join(mismatched)} do(es) not match the spec of the merged output")
+
+    # Full timeline with exact boundaries, without probing the merged files again
+    timeline = Timeline(
+        [Segment(index, os.path.join(video_directory, entry['name']), 0, Fraction(entry['duration']))
+         for index, entry in enumerate(merged)]
+        + list(new_timeline)
+    )
+    new_segments = timeline[len(merged):]
+    chapters = timeline.chapters()
+
+    # Join the current output and the new files in copy mode into a temporary file
+    file_list_path = os.path.join(video_directory, "file_list.txt")
+    write_file_list(file_list_path, [output_file] + new_timeline.files)
+    metadata_file = ffmetadata_path(video_directory)
+    write_ffmetadata(metadata_file, chapters)
+    part_file = atomic_output_path(output_file)
+    cmd = add_chapter_metadata(build_force_merge_command(file_list_path, part_file), metadata_file)
+
+    print(f"\n🚀 **Appending {len(new_files)} file(s) (copy mode), output file:** {output_file}\n")
+    print(f"執行命令: {' '.join(cmd)}")
+    result = run_ffmpeg(cmd, float(timeline.total_duration), print_progress)
+    if not keep_filelist:
+        os.remove(file_list_path)
+    if result.returncode != 0:
+        print(f"❌ Video merge failed!")
+        print(f"錯誤代碼: {result.returncode}")
+        if result.stderr:
+            print(f"錯誤訊息: {result.stderr}")
+        discard_output(part_file)
+        return False
+    commit_output(part_file, output_file)
+    print(f"✅ Video merge completed! Output file: {output_file}")
+
+    # Extend the timestamps instead of regenerating them
+    timestamps_path = os.path.join(video_directory, f"{folder_name}.txt")
+    lines = [f"{format_duration(Fraction(chapter['start']))} - {chapter['title']}" for chapter in chapters]
+    if os.path.exists(timestamps_path):
+        with open(timestamps_path, "a", encoding="utf-8") as f:
+            f.write("\n" + "\n".join(lines[len(merged):]))
+    else:
+        with open(timestamps_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+    write_chapter_index(chapter_index_path(video_directory), chapters)
+    print(f"✅ Timestamps updated: {timestamps_path}")
+
+    subtitles = append_subtitles(new_segments, video_directory, manifest.get('subtitles'))
+    record_manifest(video_directory, output_file, timeline, subtitles, manifest)
+    return True
+
 def main():
     parser = argparse.ArgumentParser(description="Merge multiple .mp4 videos and ensure timestamps.txt is confirmed first")
     parser.add_argument("video_directory", help="Directory containing video files")
     parser.add_argument("-o", "--output", help="Output video filename (default is the folder name)")
     parser.add_argument("--keep-filelist", action="store_true", help="Keep file_list.txt")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the persistent ffprobe cache")
+    parser.add_argument("-j", "--jobs", type=int, help="Number of concurrent ffprobe/ffmpeg workers (default: CPU count)")
+    parser.add_argument("-y", "--yes", action="store_true", help="Do not ask for confirmation (non-interactive mode)")
+    parser.add_argument("--on-incompatible", choices=sorted(MERGE_OPTION_CHOICES),
+                        help="How to merge videos with different specs without prompting (default with --yes: reencode)")
+    parser.add_argument("--crf", type=int, help="CRF value for re-encoding (0-51, default: 18)")
+    parser.add_argument("--audio-bitrate", help="Audio bitrate for re-encoding (default: 192k)")
+    parser.add_argument("--parallel-encode", action="store_true",
+                        help="Re-encode each file in parallel to a common spec and join the parts in copy mode (resumable)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip the merge if the journal verifies the output was built from the same inputs")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only append files added since the last merge (tracked in a manifest next to the output)")
+    parser.add_argument("--no-output-cache", action="store_true",
+                        help="Always re-encode, even if the same inputs were re-encoded with the same settings before")
+    add_profile_arguments(parser)
 
+    add_trace_argument(parser)
     args = parser.parse_args()
-    merge_videos(args.video_directory, args.output, args.keep_filelist)
+    enable_trace(args.trace, "vid-merge")
+    profile = profile_from_args(parser, args)
+    try:
+        if args.crf is not None:
+            validate_crf(args.crf)
+        if args.audio_bitrate is not None:
+            validate_audio_bitrate(args.audio_bitrate)
+    except ValueError as e:
+        parser.error(str(e))
+    set_cache_enabled(not args.no_cache)
+    set_output_cache_enabled(not args.no_output_cache)
+    if args.incremental:
+        incremental_merge(args.video_directory, args.output, args.keep_filelist, args.jobs,
+                          args.yes, args.on_incompatible, args.crf, args.audio_bitrate, args.parallel_encode,
+                          profile)
+    else:
+        merge_videos(args.video_directory, args.output, args.keep_filelist, args.jobs,
+                     args.yes, args.on_incompatible, args.crf, args.audio_bitrate, args.parallel_encode,
+                     args.resume, profile)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,338 @@
+import os
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+from .probe_cache import get_cache_dir
+from .fingerprint import content_digest
+
+DEFAULT_OUTPUT_CACHE_BYTES = 10 * 1024 * 1024 * 1024
+
+# 鍵值格式的版本，改變雜湊內容時遞增讓舊的項目失效
+CACHE_KEY_VERSION = 3
+
+# Linux 的 FICLONE ioctl（btrfs、XFS 等支援 reflink 的檔案系統）
+_FICLONE = 0x40049409
+
+# 是否使用輸出快取（可由 --no-output-cache 關閉）
+_enabled = True
+
+def set_output_cache_enabled(enabled):
+    """
+    啟用或停用輸出快取
+
+    Args:
+        enabled (bool): 是否使用輸出快取
+    """
+    global _enabled
+    _enabled = enabled
+
+def command_key(cmd, input_files, output_file, aliases=None):
+    """
+    計算輸出的內容定址鍵值：輸入檔案的完整內容雜湊 + 完整的 ffmpeg 參數
+
+    參數中的輸入與輸出路徑會換成位置代號，因此同樣的輸入放在不同目錄或主機上也會得到相同的鍵值。
+
+    Args:
+        cmd (list): ffmpeg 命令參數列表
+        input_files (list): 影響輸出內容的輸入檔案（依序）
+        output_file (str): 命令中的輸出路徑
+        aliases (dict): 其他會出現在參數中的路徑與代號（例如 file_list.txt，內容已由輸入涵蓋）
+
+    Returns:
+        str: 十六進位雜湊值
+    """
+    tokens = {os.path.abspath(str(output_file)): "{output}"}
+    for path, token in (aliases or {}).items():
+        tokens[os.path.abspath(str(path))] = token
+    for index, path in enumerate(input_files):
+        tokens[os.path.abspath(str(path))] = f"{{input{index}}}"
+
+    sha = hashlib.sha256(f"vidtoolbox-output-v{CACHE_KEY_VERSION}".encode("utf-8"))
+    for path in input_files:
+        sha.update(b"\0input\0" + content_digest(path).encode("ascii"))
+    for arg in cmd:
+        arg = str(arg)
+        sha.update(b"\0arg\0" + tokens.get(os.path.abspath(arg) if os.sep in arg else arg, arg).encode("utf-8"))
+    # 副檔名決定輸出格式
+    sha.update(b"\0ext\0" + os.path.splitext(str(output_file))[1].encode("utf-8"))
+    return sha.hexdigest()
+
+def _reflink(source, destination):
+    """以 reflink（copy-on-write）複製檔案，不支援時拋出 OSError"""
+    import fcntl
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+
+def link_or_copy(source, destination):
+    """
+    以 reflink、硬連結或複製（依序嘗試）建立 destination
+
+    Returns:
+        str: 使用的方式（reflink、hardlink、copy）
+    """
+    try:
+        _reflink(source, destination)
+        return "reflink"
+    except (OSError, ImportError):
+        try:
+            os.remove(destination)
+        except OSError:
+            pass
+    try:
+        os.link(source, destination)
+        return "hardlink"
+    except OSError:
+        shutil.copyfile(source, destination)
+        return "copy"
+
+class OutputCache:
+    """
+    以內容定址儲存 ffmpeg 輸出檔案的快取
+
+    鍵為 command_key（輸入內容 + ffmpeg 參數）；輸出檔案存放在快取目錄的 objects/ 中，
+    命中時以 reflink 或硬連結放回，跨檔案系統時才複製。超過容量上限時依最近使用時間 (LRU) 淘汰。
+    儲存的檔案若被修改（例如硬連結的輸出被就地編輯），大小或 mtime 不符時視為未命中並刪除。
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_OUTPUT_CACHE_BYTES):
+        self.directory = directory or os.path.join(get_cache_dir(), 'outputs')
+        self.db_path = os.path.join(self.directory, 'index.sqlite3')
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.join(self.directory, 'objects'), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outputs ("
+                " key TEXT PRIMARY KEY, file TEXT, bytes INTEGER, mtime_ns INTEGER,"
+                " created REAL, last_access REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS outputs_last_access ON outputs (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _bump(self, conn, name):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,)
+        )
+
+    def _object_path(self, file):
+        return os.path.join(self.directory, 'objects', file[:2], file)
+
+    def _remove(self, conn, key, file):
+        conn.execute("DELETE FROM outputs WHERE key = ?", (key,))
+        try:
+            os.remove(self._object_path(file))
+        except OSError:
+            pass
+
+    def fetch(self, key, output_file):
+        """
+        命中時把快取的輸出放到 output_file（先寫入暫存檔再改名）
+
+        Args:
+            key (str): command_key 的結果
+            output_file (str): 輸出路徑
+
+        Returns:
+            str: 使用的方式（reflink、hardlink、copy），未命中時為 None
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT file, bytes, mtime_ns FROM outputs WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                file, size, mtime_ns = row
+                try:
+                    st = os.stat(self._object_path(file))
+                    valid = st.st_size == size and st.st_mtime_ns == mtime_ns
+                except OSError:
+                    valid = False
+                if not valid:
+                    self._remove(conn, key, file)
+                    row = None
+            if row is None:
+                self._bump(conn, 'misses')
+                conn.commit()
+                return None
+            conn.execute("UPDATE outputs SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._bump(conn, 'hits')
+            conn.commit()
+
+        stem, extension = os.path.splitext(str(output_file))
+        temporary = f"{stem}.cache{extension}"
+        try:
+            method = link_or_copy(self._object_path(file), temporary)
+            os.replace(temporary, output_file)
+        except OSError:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            return None
+        return method
+
+    def store(self, key, output_file):
+        """
+        將完成的輸出加入快取並在超過上限時淘汰最舊的項目
+
+        大於快取上限的輸出不加入快取（否則會先複製整個檔案，再淘汰包含它在內的所有項目）。
+
+        Args:
+            key (str): command_key 的結果
+            output_file (str): 已完成的輸出檔案
+
+        Returns:
+            bool: 是否已加入快取
+        """
+        if self.max_bytes is not None and os.stat(output_file).st_size > self.max_bytes:
+            return False
+        file = key + os.path.splitext(str(output_file))[1]
+        object_path = self._object_path(file)
+        with self._lock:
+            conn = self._connect()
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            temporary = object_path + ".tmp"
+            try:
+                link_or_copy(output_file, temporary)
+                os.replace(temporary, object_path)
+            except OSError:
+                try:
+                    os.remove(temporary)
+                except OSError:
+                    pass
+                raise
+            st = os.stat(object_path)
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO outputs (key, file, bytes, mtime_ns, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, file, st.st_size, st.st_mtime_ns, now, now)
+            )
+            self._evict(conn, self.max_bytes)
+            conn.commit()
+        return True
+
+    def _evict(self, conn, max_bytes, older_than=None):
+        removed = 0
+        if older_than is not None:
+            for key, file in conn.execute("SELECT key, file FROM outputs WHERE last_access < ?", (older_than,)).fetchall():
+                self._remove(conn, key, file)
+                removed += 1
+        (total,) = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM outputs").fetchone()
+        if max_bytes is not None and total > max_bytes:
+            # 依最近使用時間由舊到新刪除，直到容量低於上限
+            excess = total - max_bytes
+            for key, file, size in conn.execute("SELECT key, file, bytes FROM outputs ORDER BY last_access").fetchall():
+                self._remove(conn, key, file)
+                removed += 1
+                excess -= size
+                if excess <= 0:
+                    break
+        return removed
+
+    def prune(self, max_bytes=None, older_than_days=None):
+        """
+        清理快取
+
+        Args:
+            max_bytes (int): 保留的最大容量（可選，預設使用快取上限）
+            older_than_days (float): 刪除超過指定天數未使用的項目（可選）
+
+        Returns:
+            int: 刪除的項目數
+        """
+        older_than = time.time() - older_than_days * 86400 if older_than_days is not None else None
+        with self._lock:
+            conn = self._connect()
+            removed = self._evict(conn, max_bytes if max_bytes is not None else self.max_bytes, older_than)
+            conn.commit()
+            return removed
+
+    def clear(self):
+        """刪除所有快取的輸出並重設統計"""
+        with self._lock:
+            conn = self._connect()
+            for key, file in conn.execute("SELECT key, file FROM outputs").fetchall():
+                self._remove(conn, key, file)
+            conn.execute("DELETE FROM counters")
+            conn.commit()
+
+    def stats(self):
+        """
+        獲取快取統計
+
+        Returns:
+            dict: 筆數、容量、命中與未命中次數
+        """
+        with self._lock:
+            conn = self._connect()
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM outputs").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            'path': self.directory,
+            'entries': count,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0
+        }
+
+_default_cache = None
+
+def get_output_cache():
+    """獲取預設的輸出快取（延遲建立）"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = OutputCache()
+    return _default_cache
+
+def output_cache_key(cmd, input_files, output_file, aliases=None, use_cache=None):
+    """
+    計算輸出快取的鍵值；輸出快取停用或輸入無法讀取時為 None
+
+    Args:
+        use_cache (bool): 是否使用輸出快取（預設依 set_output_cache_enabled 設定）
+    """
+    if not (_enabled if use_cache is None else use_cache):
+        return None
+    try:
+        return command_key(cmd, input_files, output_file, aliases)
+    except OSError:
+        return None
+
+def fetch_cached_output(key, output_file):
+    """
+    從預設的輸出快取取出輸出（key 為 None 時不做任何事）；快取本身的錯誤視為未命中
+
+    Returns:
+        str: 使用的方式（reflink、hardlink、copy），未命中時為 None
+    """
+    if key is None:
+        return None
+    try:
+        return get_output_cache().fetch(key, output_file)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️  輸出快取讀取失敗: {e}")
+        return None
+
+def store_cached_output(key, output_file):
+    """將輸出加入預設的輸出快取（key 為 None 時不做任何事）；失敗時只顯示警告"""
+    if key is None:
+        return
+    try:
+        get_output_cache().store(key, output_file)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️  無法寫入輸出快取: {e}")
@@ -0,0 +1,57 @@
+import csv
+import sys
+import json
+
+# 命令列工具支援的輸出格式
+OUTPUT_FORMATS = ('text', 'json', 'jsonl', 'csv')
+
+def write_json(data, stream=None):
+    """
+    以單一 JSON 文件輸出
+
+    Args:
+        data: 可序列化為 JSON 的資料
+        stream (file): 輸出串流（預設為 stdout）
+    """
+    stream = stream or sys.stdout
+    json.dump(data, stream, ensure_ascii=False, indent=2)
+    stream.write("\n")
+    stream.flush()
+
+def write_jsonl(record, stream=None):
+    """
+    輸出一筆 JSON Lines 記錄並立即 flush，讓下游可以邊讀邊處理
+
+    Args:
+        record (dict): 記錄
+        stream (file): 輸出串流（預設為 stdout）
+    """
+    stream = stream or sys.stdout
+    stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+    stream.flush()
+
+def write_csv(records, fields, stream=None):
+    """
+    以 CSV 輸出記錄
+
+    Args:
+        records (list): 記錄列表
+        fields (list): 欄位名稱（其他欄位會被忽略）
+        stream (file): 輸出串流（預設為 stdout）
+    """
+    stream = stream or sys.stdout
+    writer = csv.DictWriter(stream, fieldnames=fields, extrasaction='ignore', lineterminator="\n")
+    writer.writeheader()
+    for record in records:
+        writer.writerow({key: ("" if value is None else value) for key, value in record.items()})
+    stream.flush()
+
+def log(message, output_format='text'):
+    """
+    輸出給人看的訊息；結構化輸出時改寫到 stderr，避免混入 stdout 的資料
+
+    Args:
+        message (str): 訊息
+        output_format (str): 目前的輸出格式
+    """
+    print(message, file=sys.stdout if output_format == 'text' else sys.stderr)
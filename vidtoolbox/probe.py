@@ -0,0 +1,307 @@
+import os
+import json
+import sqlite3
+from fractions import Fraction
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .probe_cache import get_default_cache
+from .fingerprint import fingerprint
+from .memo import BoundedMemo
+from .process import check_output
+
+# 同一程序中最近探測過的檔案，鍵為 (絕對路徑, 大小, mtime_ns)
+PROBE_MEMO_SIZE = 4096
+_probe_memo = BoundedMemo(PROBE_MEMO_SIZE)
+
+# 是否使用持久化探測快取（可由 --no-cache 關閉）
+_cache_enabled = True
+
+def set_cache_enabled(enabled):
+    """
+    啟用或停用持久化探測快取
+
+    Args:
+        enabled (bool): 是否使用 ~/.cache/vidtoolbox 中的探測快取
+    """
+    global _cache_enabled
+    _cache_enabled = enabled
+
+class ProbeResult:
+    """
+    單次 ffprobe 的結果，包含 format 與所有 streams 資訊
+    """
+
+    def __init__(self, path, data):
+        self.path = str(path)
+        self.data = data
+        self.format = data.get('format', {})
+        self.streams = data.get('streams', [])
+        self.video_stream = self._first_stream('video')
+        self.audio_stream = self._first_stream('audio')
+
+    def _first_stream(self, codec_type):
+        for stream in self.streams:
+            # 跳過封面圖片等附加圖像串流
+            if stream.get('disposition', {}).get('attached_pic'):
+                continue
+            if stream.get('codec_type') == codec_type:
+                return stream
+        return None
+
+    @property
+    def duration(self):
+        """影片總時長（秒），無法取得時為 0.0"""
+        try:
+            return float(self.format.get('duration', 0.0))
+        except (TypeError, ValueError):
+            return 0.0
+
+    @property
+    def exact_duration(self):
+        """
+        以串流 time_base 與 duration_ts 計算的精確時長（有理數秒）
+
+        取影音串流中最長者（與 concat 合併時的接續點一致），
+        串流沒有 duration_ts 時退回 format 的十進位時長。
+        """
+        durations = []
+        for stream in (self.video_stream, self.audio_stream):
+            if not stream:
+                continue
+            try:
+                durations.append(int(stream['duration_ts']) * Fraction(stream['time_base']))
+            except (KeyError, TypeError, ValueError, ZeroDivisionError):
+                continue
+        if durations:
+            return max(durations)
+        try:
+            return Fraction(self.format.get('duration', '0'))
+        except (TypeError, ValueError):
+            return Fraction(0)
+
+    @property
+    def width(self):
+        return self.video_stream.get('width') if self.video_stream else None
+
+    @property
+    def height(self):
+        return self.video_stream.get('height') if self.video_stream else None
+
+    @property
+    def video_codec(self):
+        return self.video_stream.get('codec_name') if self.video_stream else None
+
+    @property
+    def audio_codec(self):
+        return self.audio_stream.get('codec_name') if self.audio_stream else None
+
+    def to_specs(self):
+        """
+        轉換為 get_video_specs 使用的規格字典
+
+        Returns:
+            dict: 影片規格字典，缺少的欄位以 'unknown' 表示
+        """
+        video = self.video_stream or {}
+        audio = self.audio_stream or {}
+
+        def field(stream, key):
+            value = stream.get(key)
+            return str(value) if value not in (None, '') else 'unknown'
+
+        width = field(video, 'width')
+        height = field(video, 'height')
+        return {
+            'video_codec': field(video, 'codec_name'),
+            'width': width,
+            'height': height,
+            'pix_fmt': field(video, 'pix_fmt'),
+            'profile': field(video, 'profile'),
+            'level': field(video, 'level'),
+            'video_bitrate': field(video, 'bit_rate'),
+            'audio_codec': field(audio, 'codec_name'),
+            'audio_profile': field(audio, 'profile'),
+            'sample_rate': field(audio, 'sample_rate'),
+            'channels': field(audio, 'channels'),
+            'frame_rate': field(video, 'r_frame_rate'),
+            'time_base': field(video, 'time_base'),
+            'resolution': f"{width}x{height}" if width != 'unknown' and height != 'unknown' else 'unknown'
+        }
+
+    def __repr__(self):
+        return f"ProbeResult({self.path!r}, duration={self.duration:.3f})"
+
+def run_ffprobe(file_path):
+    """
+    執行一次 ffprobe，取得 format 與所有 streams 的 JSON 資訊
+
+    Args:
+        file_path (str): 影片檔案路徑
+
+    Returns:
+        dict: ffprobe 輸出的 JSON 資料
+    """
+    output = check_output(ffprobe_command(file_path))
+    return json.loads(output.decode('utf-8'))
+
+def ffprobe_command(file_path):
+    """取得 format 與所有 streams 的 ffprobe 命令"""
+    return [
+        'ffprobe', '-v', 'error',
+        '-show_format', '-show_streams',
+        '-of', 'json', str(file_path)
+    ]
+
+def lookup_probe(abs_path, st, use_cache=None):
+    """
+    從記憶體或持久化快取中取得探測結果，不執行 ffprobe
+
+    Args:
+        abs_path (str): 絕對路徑
+        st (os.stat_result): 檔案狀態
+        use_cache (bool): 是否使用持久化快取（預設依 set_cache_enabled 設定）
+
+    Returns:
+        ProbeResult: 探測結果；沒有快取時為 None
+    """
+    if use_cache is None:
+        use_cache = _cache_enabled
+    key = (abs_path, st.st_size, st.st_mtime_ns)
+    result = _probe_memo.get(key)
+    if result is not None or not use_cache:
+        return result
+    try:
+        cache = get_default_cache()
+        data = cache.get(abs_path, st)
+        if data is None:
+            # 路徑或修改時間不同但內容相同（複製、移動、其他主機）的檔案以指紋命中
+            data = cache.get_by_fingerprint(abs_path, st, fingerprint(abs_path))
+    except (sqlite3.Error, OSError):
+        data = None
+    if data is None:
+        return None
+    result = ProbeResult(abs_path, data)
+    _probe_memo.put(key, result)
+    return result
+
+def store_probe(abs_path, st, data, use_cache=None):
+    """
+    保存新的探測結果到記憶體與持久化快取
+
+    Args:
+        abs_path (str): 絕對路徑
+        st (os.stat_result): 探測前的檔案狀態
+        data (dict): ffprobe 輸出的 JSON 資料
+        use_cache (bool): 是否使用持久化快取（預設依 set_cache_enabled 設定）
+
+    Returns:
+        ProbeResult: 探測結果
+    """
+    if use_cache is None:
+        use_cache = _cache_enabled
+    if use_cache:
+        try:
+            get_default_cache().put(abs_path, st, data, fingerprint(abs_path))
+        except (sqlite3.Error, OSError):
+            pass
+    result = ProbeResult(abs_path, data)
+    _probe_memo.put((abs_path, st.st_size, st.st_mtime_ns), result)
+    return result
+
+def probe_file(file_path, use_cache=None):
+    """
+    探測影片檔案；同一檔案在同一次命令中只會執行一次 ffprobe，
+    且檔案未變更時直接使用持久化快取，完全不執行 ffprobe
+
+    Args:
+        file_path (str): 影片檔案路徑
+        use_cache (bool): 是否使用持久化快取（預設依 set_cache_enabled 設定）
+
+    Returns:
+        ProbeResult: 探測結果
+
+    Raises:
+        subprocess.CalledProcessError: ffprobe 執行失敗
+    """
+    if use_cache is None:
+        use_cache = _cache_enabled
+
+    abs_path = os.path.abspath(str(file_path))
+    st = os.stat(abs_path)
+
+    result = lookup_probe(abs_path, st, use_cache)
+    if result is not None:
+        return result
+    return store_probe(abs_path, st, run_ffprobe(abs_path), use_cache)
+
+def default_jobs():
+    """預設的並行工作數（CPU 核心數）"""
+    return os.cpu_count() or 1
+
+def probe_files(file_paths, jobs=None, use_cache=None):
+    """
+    以有限大小的執行緒池並行探測多個檔案，結果維持原始順序
+
+    單一檔案失敗不會中斷其他檔案的探測。
+
+    Args:
+        file_paths (list): 影片檔案路徑列表
+        jobs (int): 並行工作數（預設為 CPU 核心數）
+        use_cache (bool): 是否使用持久化快取（預設依 set_cache_enabled 設定）
+
+    Returns:
+        list: 與輸入順序相同的 (ProbeResult, Exception) 列表，成功時錯誤為 None，失敗時結果為 None
+    """
+    def probe_one(file_path):
+        return _probe_safely(file_path, use_cache)
+
+    file_paths = list(file_paths)
+    jobs = max(1, min(jobs or default_jobs(), len(file_paths) or 1))
+    if jobs == 1:
+        return [probe_one(file_path) for file_path in file_paths]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(probe_one, file_paths))
+
+def _probe_safely(file_path, use_cache=None):
+    try:
+        return probe_file(file_path, use_cache), None
+    except Exception as e:
+        return None, e
+
+def iter_probe_files(file_paths, jobs=None, use_cache=None):
+    """
+    並行探測多個檔案，依完成順序逐一產生結果（不等待全部完成）
+
+    Args:
+        file_paths (list): 影片檔案路徑列表
+        jobs (int): 並行工作數（預設為 CPU 核心數）
+        use_cache (bool): 是否使用持久化快取（預設依 set_cache_enabled 設定）
+
+    Yields:
+        tuple: (原始索引, 檔案路徑, ProbeResult, Exception)，成功時錯誤為 None，失敗時結果為 None
+    """
+    file_paths = list(file_paths)
+    jobs = max(1, min(jobs or default_jobs(), len(file_paths) or 1))
+    if jobs == 1:
+        for index, file_path in enumerate(file_paths):
+            yield (index, file_path) + _probe_safely(file_path, use_cache)
+        return
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(_probe_safely, file_path, use_cache): (index, file_path)
+            for index, file_path in enumerate(file_paths)
+        }
+        for future in as_completed(futures):
+            yield futures[future] + future.result()
+
+def get_total_duration(file_paths, jobs=None):
+    """
+    計算多個檔案的總時長（無法探測的檔案以 0 計）
+
+    Args:
+        file_paths (list): 影片檔案路徑列表
+        jobs (int): 並行探測的工作數
+
+    Returns:
+        float: 總時長（秒）
+    """
+    return sum(probe.duration for probe, _ in probe_files(file_paths, jobs) if probe)
@@ -0,0 +1,368 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import argparse
+import threading
+from .process import add_trace_argument, enable_trace
+
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# last_access 只在超過這個秒數沒有更新時才需要寫回（LRU 不需要更精確的時間）
+LAST_ACCESS_RESOLUTION = 10 * 60
+
+# 累積的統計與 last_access 更新最多延遲這麼多秒或筆數才寫回資料庫
+FLUSH_INTERVAL = 60
+FLUSH_BATCH = 512
+
+def get_cache_dir():
+    """
+    獲取快取目錄（VIDTOOLBOX_CACHE_DIR > XDG_CACHE_HOME > ~/.cache）
+
+    Returns:
+        str: 快取目錄路徑
+    """
+    cache_dir = os.environ.get('VIDTOOLBOX_CACHE_DIR')
+    if cache_dir:
+        return cache_dir
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'vidtoolbox')
+
+class ProbeCache:
+    """
+    以 SQLite 儲存的 ffprobe 結果快取
+
+    鍵為 (絕對路徑, 檔案大小, mtime_ns, inode)，任一值改變即視為未命中；
+    未命中時可再以內容指紋（fingerprint.py）查詢，複製、移動或在其他主機上的相同檔案不必重新探測。
+    超過筆數或容量上限時依最近使用時間 (LRU) 淘汰。
+
+    命中只執行查詢，不寫入資料庫：命中/未命中次數保存在記憶體中，過期的 last_access 累積後
+    批次寫回，淘汰也只在寫回時進行（flush，程序結束時自動執行）。
+    """
+
+    def __init__(self, db_path=None, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.db_path = db_path or os.path.join(get_cache_dir(), 'probe_cache.sqlite3')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        self._counters = {}  # 尚未寫回的統計
+        self._touched = {}  # 尚未寫回的 last_access，path -> 時間
+        self._inserted = False  # 上次淘汰後是否新增過項目
+        self._last_flush = time.monotonic()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER,"
+                " data TEXT, bytes INTEGER, last_access REAL)"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(probes)")]
+            if 'fingerprint' not in columns:
+                # 舊版建立的資料庫沒有指紋欄位
+                conn.execute("ALTER TABLE probes ADD COLUMN fingerprint TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS probes_last_access ON probes (last_access)")
+            conn.execute("CREATE INDEX IF NOT EXISTS probes_fingerprint ON probes (fingerprint, size)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+            conn.commit()
+            self._conn = conn
+            atexit.register(self._flush_at_exit)
+        return self._conn
+
+    def _bump(self, name):
+        self._counters[name] = self._counters.get(name, 0) + 1
+
+    def _touch(self, path, last_access):
+        now = time.time()
+        if last_access is None or now - last_access > LAST_ACCESS_RESOLUTION:
+            self._touched[path] = now
+
+    def _maybe_flush(self, conn):
+        if len(self._touched) >= FLUSH_BATCH or time.monotonic() - self._last_flush > FLUSH_INTERVAL:
+            self._flush(conn)
+
+    def _flush(self, conn):
+        if self._counters:
+            conn.executemany(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                list(self._counters.items())
+            )
+        if self._touched:
+            conn.executemany(
+                "UPDATE probes SET last_access = ? WHERE path = ?",
+                [(last_access, path) for path, last_access in self._touched.items()]
+            )
+        if self._inserted:
+            self._evict(conn, self.max_entries, self.max_bytes)
+        conn.commit()
+        self._counters = {}
+        self._touched = {}
+        self._inserted = False
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        """將累積的統計與 last_access 寫回資料庫，並在新增過項目時依上限淘汰"""
+        with self._lock:
+            if self._conn is not None:
+                self._flush(self._conn)
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except sqlite3.Error:
+            # 資料庫被其他程序鎖住時只遺失這次的統計
+            pass
+
+    def get(self, path, st):
+        """
+        查詢快取
+
+        Args:
+            path (str): 絕對路徑
+            st (os.stat_result): 檔案的 stat 結果
+
+        Returns:
+            dict: ffprobe JSON 資料，未命中時為 None
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT data, last_access FROM probes WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+                (path, st.st_size, st.st_mtime_ns, st.st_ino)
+            ).fetchone()
+            if row is None:
+                self._bump('misses')
+            else:
+                self._bump('hits')
+                self._touch(path, row[1])
+            self._maybe_flush(conn)
+        return json.loads(row[0]) if row is not None else None
+
+    def get_by_fingerprint(self, path, st, fingerprint):
+        """
+        以內容指紋查詢快取（get 未命中後使用）；命中時為 path 新增一筆記錄，之後直接以路徑命中
+
+        Args:
+            path (str): 絕對路徑
+            st (os.stat_result): 檔案的 stat 結果
+            fingerprint (str): 檔案的內容指紋
+
+        Returns:
+            dict: ffprobe JSON 資料，未命中時為 None
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT data FROM probes WHERE fingerprint = ? AND size = ? LIMIT 1",
+                (fingerprint, st.st_size)
+            ).fetchone()
+            if row is None:
+                return None
+            self._insert(conn, path, st, row[0], fingerprint)
+            # get 已記錄一次未命中，這裡另外計數，stats 會換算
+            self._bump('fingerprint_hits')
+            conn.commit()
+            return json.loads(row[0])
+
+    def _insert(self, conn, path, st, payload, fingerprint):
+        conn.execute(
+            "INSERT OR REPLACE INTO probes (path, size, mtime_ns, inode, data, bytes, last_access, fingerprint) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime_ns, st.st_ino, payload, len(payload), time.time(), fingerprint)
+        )
+        self._touched.pop(path, None)
+        self._inserted = True
+
+    def put(self, path, st, data, fingerprint=None):
+        """
+        寫入快取；超過上限的項目在下次寫回（flush）時淘汰
+
+        Args:
+            path (str): 絕對路徑
+            st (os.stat_result): 檔案的 stat 結果
+            data (dict): ffprobe JSON 資料
+            fingerprint (str): 檔案的內容指紋（可選）
+        """
+        payload = json.dumps(data, separators=(',', ':'))
+        with self._lock:
+            conn = self._connect()
+            self._insert(conn, path, st, payload, fingerprint)
+            conn.commit()
+            self._maybe_flush(conn)
+
+    def _evict(self, conn, max_entries, max_bytes, older_than=None):
+        removed = 0
+        if older_than is not None:
+            removed += conn.execute("DELETE FROM probes WHERE last_access < ?", (older_than,)).rowcount
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM probes").fetchone()
+        if max_entries is not None and count > max_entries:
+            removed += conn.execute(
+                "DELETE FROM probes WHERE path IN "
+                "(SELECT path FROM probes ORDER BY last_access LIMIT ?)",
+                (count - max_entries,)
+            ).rowcount
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM probes").fetchone()
+        if max_bytes is not None and total > max_bytes:
+            # 依最近使用時間由舊到新刪除，直到容量低於上限
+            excess = total - max_bytes
+            victims = []
+            for path, size in conn.execute("SELECT path, bytes FROM probes ORDER BY last_access"):
+                victims.append((path,))
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM probes WHERE path = ?", victims)
+            removed += len(victims)
+        return removed
+
+    def prune(self, max_entries=None, max_bytes=None, older_than_days=None, missing=True):
+        """
+        清理快取
+
+        Args:
+            max_entries (int): 保留的最大筆數（可選，預設使用快取上限）
+            max_bytes (int): 保留的最大容量（可選，預設使用快取上限）
+            older_than_days (float): 刪除超過指定天數未使用的項目（可選）
+            missing (bool): 是否刪除原始檔案已不存在的項目
+
+        Returns:
+            int: 刪除的項目數
+        """
+        older_than = time.time() - older_than_days * 86400 if older_than_days is not None else None
+        with self._lock:
+            conn = self._connect()
+            self._flush(conn)
+            removed = 0
+            if missing:
+                gone = [(path,) for (path,) in conn.execute("SELECT path FROM probes") if not os.path.exists(path)]
+                conn.executemany("DELETE FROM probes WHERE path = ?", gone)
+                removed += len(gone)
+            removed += self._evict(
+                conn,
+                max_entries if max_entries is not None else self.max_entries,
+                max_bytes if max_bytes is not None else self.max_bytes,
+                older_than
+            )
+            conn.commit()
+            conn.execute("VACUUM")
+            return removed
+
+    def clear(self):
+        """刪除所有快取項目並重設統計"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM probes")
+            conn.execute("DELETE FROM counters")
+            conn.commit()
+            self._counters = {}
+            self._touched = {}
+            self._inserted = False
+            conn.execute("VACUUM")
+
+    def stats(self):
+        """
+        獲取快取統計
+
+        Returns:
+            dict: 筆數、容量、命中與未命中次數
+        """
+        with self._lock:
+            conn = self._connect()
+            self._flush(conn)
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM probes").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        fingerprint_hits = counters.get('fingerprint_hits', 0)
+        hits = counters.get('hits', 0) + fingerprint_hits
+        misses = max(counters.get('misses', 0) - fingerprint_hits, 0)
+        lookups = hits + misses
+        return {
+            'path': self.db_path,
+            'entries': count,
+            'bytes': total,
+            'db_bytes': os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+            'hits': hits,
+            'fingerprint_hits': fingerprint_hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0
+        }
+
+_default_cache = None
+
+def get_default_cache():
+    """獲取預設的探測快取（延遲建立）"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ProbeCache()
+    return _default_cache
+
+def output_cache_main(args):
+    """vid-cache --outputs：管理輸出快取"""
+    # output_cache 依賴本模組的 get_cache_dir，在這裡才匯入以避免循環匯入
+    from .output_cache import get_output_cache
+    cache = get_output_cache()
+    try:
+        if args.command == "prune":
+            max_bytes = int(args.max_size * 1024 * 1024) if args.max_size is not None else None
+            removed = cache.prune(max_bytes, args.older_than)
+            print(f"🧹 已刪除 {removed} 個快取的輸出")
+        elif args.command == "clear":
+            cache.clear()
+            print("🧹 輸出快取已清除")
+        else:
+            stats = cache.stats()
+            print(f"📁 輸出快取目錄: {stats['path']}")
+            print(f"  項目數: {stats['entries']}")
+            print(f"  資料大小: {stats['bytes'] / (1024 * 1024):.2f} MB (上限 {stats['max_bytes'] / (1024 * 1024):.0f} MB)")
+            print(f"  命中: {stats['hits']}")
+            print(f"  未命中: {stats['misses']}")
+            print(f"  命中率: {stats['hit_rate']:.1%}")
+    except (OSError, sqlite3.Error) as e:
+        print(f"❌ 快取操作失敗: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description="管理 ffprobe 探測結果快取與輸出快取")
+    parser.add_argument("--outputs", action="store_true", help="管理輸出快取（vid-mp3 / vid-merge 重新編碼的結果）")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("stats", help="顯示快取統計與命中率")
+    prune_parser = subparsers.add_parser("prune", help="清理快取")
+    prune_parser.add_argument("--max-entries", type=int, help="保留的最大筆數")
+    prune_parser.add_argument("--max-size", type=float, help="保留的最大容量 (MB)")
+    prune_parser.add_argument("--older-than", type=float, help="刪除超過指定天數未使用的項目")
+    prune_parser.add_argument("--keep-missing", action="store_true", help="保留原始檔案已不存在的項目")
+    subparsers.add_parser("clear", help="清除所有快取")
+    add_trace_argument(parser)
+
+    args = parser.parse_args()
+    enable_trace(args.trace, "vid-cache")
+    if args.outputs:
+        output_cache_main(args)
+        return
+    cache = get_default_cache()
+
+    try:
+        if args.command == "prune":
+            max_bytes = int(args.max_size * 1024 * 1024) if args.max_size is not None else None
+            removed = cache.prune(args.max_entries, max_bytes, args.older_than, not args.keep_missing)
+            print(f"🧹 已刪除 {removed} 筆快取項目")
+        elif args.command == "clear":
+            cache.clear()
+            print("🧹 快取已清除")
+        else:
+            stats = cache.stats()
+            print(f"📁 快取檔案: {stats['path']}")
+            print(f"  項目數: {stats['entries']}")
+            print(f"  資料大小: {stats['bytes'] / (1024 * 1024):.2f} MB (資料庫 {stats['db_bytes'] / (1024 * 1024):.2f} MB)")
+            print(f"  命中: {stats['hits']} (其中以內容指紋命中 {stats['fingerprint_hits']})")
+            print(f"  未命中: {stats['misses']}")
+            print(f"  命中率: {stats['hit_rate']:.1%}")
+    except sqlite3.Error as e:
+        print(f"❌ 快取操作失敗: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import atexit
+import threading
+import subprocess
+
+# 每個子程序結束時呼叫的 hook（參數為 ProcessRecord）
+_hooks = []
+_hooks_lock = threading.Lock()
+
+def add_hook(hook):
+    """
+    註冊子程序結束時呼叫的 hook
+
+    Args:
+        hook (callable): 以 ProcessRecord 呼叫；可能在任何執行緒中被呼叫
+    """
+    with _hooks_lock:
+        _hooks.append(hook)
+
+def remove_hook(hook):
+    """移除已註冊的 hook（未註冊時忽略）"""
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+class ProcessRecord:
+    """
+    一次子程序執行的記錄
+
+    start 為 Unix 時間（秒）；peak_rss_kb、CPU 時間與磁碟讀寫量來自 wait4 的 rusage，
+    無法取得時（例如 asyncio 子程序或非 POSIX 平台）為 None。
+    """
+
+    __slots__ = ('cmd', 'pid', 'thread', 'start', 'duration', 'returncode',
+                 'stdout_bytes', 'stderr_bytes', 'user_time', 'system_time',
+                 'peak_rss_kb', 'read_bytes', 'write_bytes')
+
+    def __init__(self, cmd, pid, thread, start, duration, returncode,
+                 stdout_bytes=0, stderr_bytes=0, rusage=None):
+        self.cmd = [str(arg) for arg in cmd]
+        self.pid = pid
+        self.thread = thread
+        self.start = start
+        self.duration = duration
+        self.returncode = returncode
+        self.stdout_bytes = stdout_bytes
+        self.stderr_bytes = stderr_bytes
+        self.user_time = rusage.ru_utime if rusage else None
+        self.system_time = rusage.ru_stime if rusage else None
+        # Linux 上 ru_maxrss 的單位為 KB，ru_inblock/ru_oublock 為 512 位元組的區塊
+        self.peak_rss_kb = rusage.ru_maxrss if rusage else None
+        self.read_bytes = rusage.ru_inblock * 512 if rusage else None
+        self.write_bytes = rusage.ru_oublock * 512 if rusage else None
+
+    @property
+    def program(self):
+        """執行的程式名稱（例如 ffmpeg、ffprobe）"""
+        return os.path.basename(self.cmd[0])
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"ProcessRecord({self.program!r}, returncode={self.returncode}, duration={self.duration:.3f})"
+
+def emit(record):
+    """將記錄交給所有 hook"""
+    with _hooks_lock:
+        hooks = list(_hooks)
+    for hook in hooks:
+        hook(record)
+
+def _exit_code(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+class TracedProcess:
+    """
+    可量測的子程序（subprocess.Popen 的包裝）
+
+    wait() 以 os.wait4 回收子程序以取得該子程序自己的 rusage，並將 ProcessRecord 交給 hook。
+    呼叫端讀取 stdout/stderr 後可設定 stdout_bytes / stderr_bytes 一併記錄。
+    """
+
+    def __init__(self, cmd, **popen_kwargs):
+        self.cmd = list(cmd)
+        self.stdout_bytes = 0
+        self.stderr_bytes = 0
+        self.record = None
+        self._thread = threading.get_ident()
+        self._start_time = time.time()
+        self._start = time.perf_counter()
+        self.popen = subprocess.Popen(self.cmd, **popen_kwargs)
+
+    @property
+    def pid(self):
+        return self.popen.pid
+
+    @property
+    def stdout(self):
+        return self.popen.stdout
+
+    @property
+    def stderr(self):
+        return self.popen.stderr
+
+    def kill(self):
+        self.popen.kill()
+
+    def wait(self):
+        """
+        等待子程序結束並記錄
+
+        Returns:
+            int: 結束狀態（被訊號終止時為負的訊號編號）
+        """
+        if self.record is not None:
+            return self.record.returncode
+        rusage = None
+        if hasattr(os, "wait4") and self.popen.returncode is None:
+            try:
+                _, status, rusage = os.wait4(self.popen.pid, 0)
+                self.popen.returncode = _exit_code(status)
+            except ChildProcessError:
+                # 已被其他地方回收
+                rusage = None
+        returncode = self.popen.wait()
+        for stream in (self.popen.stdout, self.popen.stderr):
+            if stream is not None:
+                stream.close()
+
+        self.record = ProcessRecord(
+            self.cmd, self.popen.pid, self._thread, self._start_time,
+            time.perf_counter() - self._start, returncode,
+            self.stdout_bytes, self.stderr_bytes, rusage
+        )
+        emit(self.record)
+        return returncode
+
+def run(cmd, check=False, capture_stderr=True):
+    """
+    執行命令並讀取全部輸出（subprocess.run 的可量測版本）
+
+    Args:
+        cmd (list): 命令參數列表
+        check (bool): 非零結束狀態時拋出 CalledProcessError
+        capture_stderr (bool): 是否擷取 stderr（否則直接輸出到終端機）
+
+    Returns:
+        subprocess.CompletedProcess: stdout/stderr 為 bytes
+    """
+    process = TracedProcess(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE if capture_stderr else None,
+    )
+    stderr = [b""]
+    if capture_stderr:
+        # 另一個執行緒讀取 stderr，避免任一管道寫滿造成死結
+        reader = threading.Thread(target=lambda: stderr.__setitem__(0, process.stderr.read()), daemon=True)
+        reader.start()
+    stdout = process.stdout.read()
+    if capture_stderr:
+        reader.join()
+    process.stdout_bytes = len(stdout)
+    process.stderr_bytes = len(stderr[0])
+    returncode = process.wait()
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, stdout, stderr[0] if capture_stderr else None)
+    return subprocess.CompletedProcess(cmd, returncode, stdout, stderr[0] if capture_stderr else None)
+
+def check_output(cmd):
+    """subprocess.check_output 的可量測版本（stderr 直接輸出到終端機）"""
+    return run(cmd, check=True, capture_stderr=False).stdout
+
+class ChromeTracer:
+    """
+    以 Chrome trace event 格式記錄子程序（可用 chrome://tracing 或 Perfetto 開啟）
+
+    每個子程序為一個完整事件（ph: X），同一執行緒啟動的子程序排在同一列；
+    另有一個涵蓋整個執行期間的事件，子程序之間的空白即為 Python 本身的時間。
+    """
+
+    def __init__(self, name="vidtoolbox"):
+        self.name = name
+        self.start = time.time()
+        self._records = []
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def events(self):
+        """
+        產生 trace 事件
+
+        Returns:
+            list: trace event 字典列表（時間單位為微秒）
+        """
+        pid = os.getpid()
+        with self._lock:
+            records = list(self._records)
+        lanes = {}
+        for record in sorted(records, key=lambda record: record.start):
+            lanes.setdefault(record.thread, len(lanes) + 1)
+
+        events = [
+            {'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': self.name}},
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'python'}},
+            {'name': self.name, 'cat': 'python', 'ph': 'X', 'pid': pid, 'tid': 0,
+             'ts': 0, 'dur': int((time.time() - self.start) * 1e6)},
+        ]
+        for thread, lane in lanes.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': lane,
+                           'args': {'name': f"worker {lane}"}})
+        for record in records:
+            events.append({
+                'name': f"{record.program} {os.path.basename(record.cmd[-1])}",
+                'cat': record.program,
+                'ph': 'X',
+                'pid': pid,
+                'tid': lanes[record.thread],
+                'ts': int((record.start - self.start) * 1e6),
+                'dur': int(record.duration * 1e6),
+                'args': record.to_dict(),
+            })
+        return events
+
+    def write(self, path):
+        """將 trace 寫入 JSON 檔案"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({'traceEvents': self.events(), 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+def enable_trace(path, name="vidtoolbox"):
+    """
+    開始記錄子程序，並在程式結束時把 Chrome trace 寫入 path（供命令列的 --trace 使用）
+
+    Args:
+        path (str): 輸出的 JSON 檔案路徑；None 時不做任何事
+        name (str): trace 中的程序名稱
+
+    Returns:
+        ChromeTracer: 已註冊的 tracer（path 為 None 時為 None）
+    """
+    if not path:
+        return None
+    tracer = ChromeTracer(name)
+    add_hook(tracer)
+
+    def finish():
+        remove_hook(tracer)
+        tracer.write(path)
+        print(f"📈 Trace 已寫入: {path}")
+
+    atexit.register(finish)
+    return tracer
+
+def add_trace_argument(parser):
+    """在命令列加入 --trace 選項"""
+    parser.add_argument("--trace", metavar="OUT_JSON",
+                        help="將 ffmpeg/ffprobe 子程序的時間軸寫成 Chrome trace 格式 (chrome://tracing)")
@@ -1,13 +1,24 @@
 import os
+import shutil
 import argparse
-import subprocess
-from .generate_file_list import generate_file_list, quick_merge_command
+from .generate_file_list import generate_file_list, quick_merge_command, read_file_list, write_file_list
+from .ffmpeg_runner import run_ffmpeg, print_progress
+from .timeline import Timeline
+from .segment_merge import SEGMENT_DIRECTORY, build_intermediate_spec, encode_segments
+from .video_specs import check_video_compatibility, select_target_spec, build_ffmpeg_command, build_force_merge_command, get_quality_settings, X264_PRESETS
+from .encoder_profiles import get_profile, add_profile_arguments, profile_from_args
+from .process import add_trace_argument, enable_trace
+from .journal import atomic_output_path, commit_output, discard_output
 
 def quick_merge_videos(video_directory, output_file="output.mp4", pattern="*.mp4", 
-                      sort_by_name=True, keep_filelist=False, auto_generate_list=True):
+                      sort_by_name=True, keep_filelist=False, auto_generate_list=True, assume_yes=False,
+                      parallel_encode=False, jobs=None, reencode=False, preset=None, profile=None):
     """
     快速合併影片檔案
     
+    先檢查影片規格，全部相同時以 copy 模式直接合併（不重新編碼）；
+    規格不同或指定 reencode 時才重新編碼。
+    
     Args:
         video_directory (str): 包含影片檔案的目錄路徑
         output_file (str): 輸出檔案名稱
@@ -15,18 +26,35 @@ def quick_merge_videos(video_directory, output_file="output.mp4", pattern="*.mp4
         sort_by_name (bool): 是否按檔案名稱排序
         keep_filelist (bool): 是否保留 file_list.txt
         auto_generate_list (bool): 是否自動生成 file_list.txt
+        assume_yes (bool): 不詢問確認（非互動模式）
+        parallel_encode (bool): 並行將每個檔案編碼成相同規格後以 copy 模式合併（可續傳）
+        jobs (int): 並行探測與編碼的工作數（預設為 CPU 核心數）
+        reencode (bool): 即使規格相同也強制重新編碼
+        preset (str): 覆寫 profile 的編碼速度預設（可選）
+        profile (EncoderProfile): 編碼 profile 或名稱（預設依設定檔，再來是 archive）
     
     Returns:
         bool: 合併是否成功
     """
     try:
+        profile = get_profile(profile).replace(preset=preset)
+        
+        # 確保輸出檔案路徑
+        if not os.path.isabs(output_file):
+            output_file = os.path.join(video_directory, output_file)
+        # ffmpeg 先寫入暫存檔，成功後才改名為最終輸出
+        part_file = atomic_output_path(output_file)
+        
         # 如果指定自動生成 file_list.txt
         if auto_generate_list:
+            # 先前的輸出與中斷留下的暫存輸出不會被合併進新的輸出
             file_list_path = generate_file_list(
                 video_directory, 
                 "file_list.txt", 
                 pattern, 
-                sort_by_name
+                sort_by_name,
+                assume_yes,
+                {os.path.basename(output_file), os.path.basename(part_file)}
             )
             if not file_list_path:
                 print("❌ 無法生成 file_list.txt，合併取消")
@@ -38,27 +66,58 @@ def quick_merge_videos(video_directory, output_file="output.mp4", pattern="*.mp4
                 print(f"❌ 找不到 {file_list_path}")
                 return False
         
-        # 確保輸出檔案路徑
-        if not os.path.isabs(output_file):
-            output_file = os.path.join(video_directory, output_file)
+        # 先檢查規格，相同時直接以 copy 模式合併
+        file_paths = read_file_list(file_list_path)
+        timeline = Timeline.from_files(file_paths, jobs)
+        compatibility_result = check_video_compatibility(file_paths, "", jobs)
+        print(f"\n{compatibility_result['message']}")
+        quality_settings = get_quality_settings(assume_defaults=True, profile=profile)
         
         print(f"\n🚀 開始合併影片，輸出檔案: {output_file}")
         
-        # 執行 ffmpeg 合併命令
-        cmd = [
-            "ffmpeg", "-f", "concat", "-safe", "0",
-            "-i", file_list_path,
-            "-c:v", "libx264", "-preset", "slow", "-crf", "18",
-            "-c:a", "aac", "-b:a", "192k",
-            output_file
-        ]
+        segment_directory = None
+        if compatibility_result['compatible'] and not reencode:
+            print("⚡ 規格相同，使用 copy 模式合併 (不重新編碼)")
+            cmd = build_force_merge_command(file_list_path, part_file)
+        elif parallel_encode:
+            # 並行編碼每個檔案，再以 copy 模式合併
+            specs = compatibility_result.get('specs')
+            if specs is None:
+                target = select_target_spec(compatibility_result)
+                specs = target['specs'] if target else None
+            if specs is None:
+                print("❌ 無法讀取影片規格，合併取消")
+                return False
+            segment_directory = os.path.join(video_directory, SEGMENT_DIRECTORY)
+            segments = encode_segments(
+                file_paths, segment_directory, build_intermediate_spec(specs, profile),
+                quality_settings, jobs
+            )
+            if segments is None:
+                return False
+            concat_list_path = os.path.join(segment_directory, "segments.txt")
+            write_file_list(concat_list_path, segments)
+            cmd = build_force_merge_command(concat_list_path, part_file)
+        else:
+            # 重新編碼合併
+            print(f"🎨 重新編碼: profile={profile.name}, preset={profile.preset}, CRF={quality_settings['crf']}")
+            cmd = build_ffmpeg_command(file_list_path, part_file, quality_settings, profile)
         
         print(f"執行命令: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        try:
+            result = run_ffmpeg(cmd, float(timeline.total_duration), print_progress)
+        except BaseException:
+            discard_output(part_file)
+            raise
         
         if result.returncode == 0:
+            commit_output(part_file, output_file)
             print(f"✅ 影片合併完成！輸出檔案: {output_file}")
             
+            # 分段只在失敗時保留以便續傳
+            if segment_directory:
+                shutil.rmtree(segment_directory, ignore_errors=True)
+            
             # 清理 file_list.txt（如果不需要保留）
             if not keep_filelist and auto_generate_list:
                 os.remove(file_list_path)
@@ -68,6 +127,7 @@ def quick_merge_videos(video_directory, output_file="output.mp4", pattern="*.mp4
         else:
             print(f"❌ 合併失敗！錯誤訊息:")
             print(result.stderr)
+            discard_output(part_file)
             return False
             
     except Exception as e:
@@ -82,8 +142,18 @@ def main():
     parser.add_argument("--no-sort", action="store_true", help="不按檔案名稱排序")
     parser.add_argument("--keep-filelist", action="store_true", help="保留 file_list.txt")
     parser.add_argument("--use-existing-list", action="store_true", help="使用現有的 file_list.txt")
+    parser.add_argument("-y", "--yes", action="store_true", help="不詢問確認 (非互動模式)")
+    parser.add_argument("--parallel-encode", action="store_true", help="並行編碼每個檔案後以 copy 模式合併 (可續傳)")
+    parser.add_argument("-j", "--jobs", type=int, help="並行探測與編碼的工作數 (預設: CPU 核心數)")
+    parser.add_argument("--reencode", action="store_true", help="即使影片規格相同也強制重新編碼")
+    parser.add_argument("--preset", choices=X264_PRESETS,
+                        help="覆寫 profile 的 x264 編碼速度預設 (追求速度可用 veryfast)")
+    add_profile_arguments(parser)
     
+    add_trace_argument(parser)
     args = parser.parse_args()
+    enable_trace(args.trace, "vid-quick-merge")
+    profile = profile_from_args(parser, args)
     
     success = quick_merge_videos(
         args.video_directory,
@@ -91,7 +161,13 @@ def main():
         args.pattern,
         not args.no_sort,
         args.keep_filelist,
-        not args.use_existing_list
+        not args.use_existing_list,
+        args.yes,
+        args.parallel_encode,
+        args.jobs,
+        args.reencode,
+        args.preset,
+        profile
     )
     
     if success:
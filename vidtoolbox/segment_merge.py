@@ -0,0 +1,119 @@
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from .ffmpeg_runner import run_ffmpeg
+from .probe import probe_file, default_jobs
+from .video_specs import build_conform_command
+
+# 分段編碼的暫存目錄名稱（位於影片目錄中）
+SEGMENT_DIRECTORY = ".vidtoolbox_segments"
+
+def build_intermediate_spec(target_specs, profile=None):
+    """
+    以目標規格為基礎，建立全部重新編碼時使用的統一中間規格（H.264 + AAC，x265 profile 時為 HEVC）
+
+    Args:
+        target_specs (dict): 多數檔案的規格字典
+        profile (EncoderProfile): 編碼 profile（可選）
+
+    Returns:
+        dict: 中間規格字典（解析度調整為偶數）
+    """
+    specs = dict(target_specs)
+
+    def even(value, default):
+        try:
+            return str(int(value) // 2 * 2)
+        except (TypeError, ValueError):
+            return default
+
+    specs['width'] = even(specs.get('width'), '1920')
+    specs['height'] = even(specs.get('height'), '1080')
+    specs['resolution'] = f"{specs['width']}x{specs['height']}"
+    specs['video_codec'] = 'hevc' if profile is not None and profile.video_codec == 'libx265' else 'h264'
+    specs['pix_fmt'] = 'yuv420p'
+    # 所有分段都以相同的編碼器與參數產生，profile 與 level 交給編碼器決定即可一致
+    specs['profile'] = specs['level'] = specs['audio_profile'] = 'unknown'
+    specs['audio_codec'] = 'aac'
+    if specs.get('sample_rate', 'unknown') == 'unknown':
+        specs['sample_rate'] = '48000'
+    if specs.get('channels', 'unknown') == 'unknown':
+        specs['channels'] = '2'
+    return specs
+
+def segment_key(input_file, cmd):
+    """
+    計算分段檔案的鍵值；輸入檔案或編碼參數改變時鍵值也會改變，避免沿用過期的分段
+
+    Args:
+        input_file (str): 輸入影片檔案路徑
+        cmd (list): 不含輸出路徑的 ffmpeg 命令
+
+    Returns:
+        str: 十六進位雜湊值
+    """
+    st = os.stat(input_file)
+    identity = [os.path.abspath(input_file), str(st.st_size), str(st.st_mtime_ns)] + list(cmd)
+    return hashlib.sha1("\0".join(identity).encode("utf-8")).hexdigest()[:16]
+
+def encode_segments(file_paths, work_directory, target_specs, quality_settings, jobs=None):
+    """
+    以多個 ffmpeg 程序並行地將每個檔案重新編碼成相同規格，之後可用 copy 模式合併
+
+    已完成的分段會保留在暫存目錄中，中斷後重新執行時會直接沿用（可續傳）。
+    分段先寫入 .part 檔案，完成後才改名，未完成的分段不會被誤用。
+
+    Args:
+        file_paths (list): 輸入影片檔案路徑列表
+        work_directory (str): 分段暫存目錄
+        target_specs (dict): 目標規格字典
+        quality_settings (dict): 畫質設定
+        jobs (int): 同時執行的 ffmpeg 數（預設為 CPU 核心數）
+
+    Returns:
+        list: 與輸入順序相同的分段檔案路徑；任一分段失敗時為 None
+    """
+    os.makedirs(work_directory, exist_ok=True)
+    jobs = max(1, min(jobs or default_jobs(), len(file_paths) or 1))
+    # 平均分配 CPU 執行緒給各個 ffmpeg，避免過度搶佔
+    threads = max(1, (os.cpu_count() or 1) // jobs)
+
+    tasks = []
+    for index, file_path in enumerate(file_paths):
+        try:
+            has_audio = probe_file(file_path).audio_stream is not None
+        except Exception:
+            has_audio = True
+        cmd = build_conform_command(file_path, None, target_specs, quality_settings, has_audio, threads)
+        key = segment_key(file_path, cmd[:-1])
+        segment_path = os.path.join(work_directory, f"{index:05d}_{key}.mp4")
+        tasks.append((file_path, segment_path, cmd[:-1]))
+
+    def encode_one(task):
+        file_path, segment_path, cmd = task
+        name = os.path.basename(file_path)
+        if os.path.exists(segment_path):
+            print(f"♻️  沿用已完成的分段: {name}")
+            return True
+        part_path = segment_path[:-len(".mp4")] + ".part.mp4"
+        print(f"🔄 編碼分段: {name}")
+        result = run_ffmpeg(cmd + [part_path])
+        if result.returncode != 0:
+            print(f"❌ 分段編碼失敗: {name}")
+            if result.stderr:
+                print(f"錯誤訊息: {result.stderr}")
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            return False
+        os.replace(part_path, segment_path)
+        print(f"✅ 分段完成: {name}")
+        return True
+
+    print(f"\n⚙️  並行編碼 {len(tasks)} 個分段 (並行數: {jobs}, 每個 ffmpeg {threads} 執行緒)")
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(encode_one, tasks))
+
+    if not all(results):
+        print(f"⚠️  {results.count(False)} 個分段失敗，已完成的分段保留於 {work_directory}，重新執行即可續傳")
+        return None
+    return [segment_path for _, segment_path, _ in tasks]
@@ -0,0 +1,111 @@
+import re
+
+# 時間軸行：SRT 使用 "," 作為毫秒分隔，WebVTT 使用 "."，且 WebVTT 可省略小時
+TIMING_PATTERN = re.compile(
+    r'^\s*(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{3})\s*-->\s*'
+    r'(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{3})(.*)$'
+)
+
+SUBTITLE_FORMATS = ('srt', 'vtt')
+
+def format_timestamp(ms, output_format='srt'):
+    """
+    將毫秒整數轉為字幕時間格式
+
+    Args:
+        ms (int): 毫秒
+        output_format (str): 'srt' (HH:MM:SS,mmm) 或 'vtt' (HH:MM:SS.mmm)
+
+    Returns:
+        str: 時間字串
+    """
+    if ms < 0:
+        ms = 0
+    separator = '.' if output_format == 'vtt' else ','
+    return "%02d:%02d:%02d%s%03d" % (ms // 3600000, ms // 60000 % 60, ms // 1000 % 60, separator, ms % 1000)
+
+def parse_timing_line(line):
+    """
+    解析時間軸行
+
+    Args:
+        line (str): 字幕區塊中的一行
+
+    Returns:
+        tuple: (開始毫秒, 結束毫秒, 時間後的附加設定)；不是時間軸行時為 None
+    """
+    match = TIMING_PATTERN.match(line)
+    if match is None:
+        return None
+    h1, m1, s1, f1, h2, m2, s2, f2, settings = match.groups()
+    start = ((int(h1 or 0) * 60 + int(m1)) * 60 + int(s1)) * 1000 + int(f1)
+    end = ((int(h2 or 0) * 60 + int(m2)) * 60 + int(s2)) * 1000 + int(f2)
+    return start, end, settings.rstrip()
+
+def write_header(output, output_format='srt'):
+    """寫入字幕檔案開頭（WebVTT 需要 WEBVTT 標頭）"""
+    if output_format == 'vtt':
+        output.write("WEBVTT\n\n")
+
+def shift_subtitle_file(file_path, offset_ms, start_index, output, output_format='srt'):
+    """
+    以整數毫秒平移字幕時間並直接寫出，不建立字幕物件
+
+    只改寫時間軸行與編號，其餘內容原樣輸出；空白或時間無效（開始 >= 結束）的字幕會被略過，
+    與 srt.compose 的行為一致。輸入可以是 SRT 或 WebVTT。
+
+    Args:
+        file_path (str): 輸入字幕檔案路徑
+        offset_ms (int): 時間偏移（毫秒）
+        start_index (int): 第一條字幕的編號
+        output (file): 已開啟的輸出檔案
+        output_format (str): 'srt' 或 'vtt'
+
+    Returns:
+        tuple: (下一個字幕編號, 最後一條字幕的原始結束毫秒或 None, 讀到的字幕數)
+    """
+    index = start_index
+    last_end = None
+    cue_count = 0
+    vtt = output_format == 'vtt'
+
+    def flush(block):
+        nonlocal index, last_end, cue_count
+        for position, line in enumerate(block):
+            # 先以字串搜尋排除編號行，減少正規表示式比對次數
+            if '-->' in line:
+                timing = parse_timing_line(line)
+                if timing is not None:
+                    break
+        else:
+            # WEBVTT 標頭、NOTE、STYLE 等沒有時間軸的區塊
+            return
+        start, end, settings = timing
+        cue_count += 1
+        last_end = end
+        content = block[position + 1:]
+        if start >= end or not any(line.strip() for line in content):
+            return
+        if vtt:
+            output.write(f"{index}\n{format_timestamp(start + offset_ms, 'vtt')} --> "
+                         f"{format_timestamp(end + offset_ms, 'vtt')}{settings}\n")
+        else:
+            # SRT 不支援 WebVTT 的位置設定，直接捨棄
+            output.write(f"{index}\n{format_timestamp(start + offset_ms)} --> "
+                         f"{format_timestamp(end + offset_ms)}\n")
+        output.write("".join(content))
+        output.write("\n")
+        index += 1
+
+    block = []
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            if line.strip():
+                block.append(line if line.endswith("\n") else line + "\n")
+            elif block:
+                flush(block)
+                block = []
+    if block:
+        flush(block)
+
+    return index, last_end, cue_count
@@ -0,0 +1,158 @@
+import os
+from bisect import bisect_right
+from fractions import Fraction
+from pathlib import Path
+from .chapters import build_chapters
+from .probe import probe_files
+
+def list_media_files(directory, pattern="*.mp4", sort_by_name=True):
+    """
+    列出目錄中符合模式的檔案（播放清單的唯一來源）
+
+    Args:
+        directory (str): 目錄路徑
+        pattern (str): 檔案匹配模式
+        sort_by_name (bool): 是否按檔案名稱排序
+
+    Returns:
+        list: Path 物件列表
+    """
+    files = [path for path in Path(directory).glob(pattern) if path.is_file()]
+    if sort_by_name:
+        files.sort(key=lambda path: path.name)
+    return files
+
+class Segment:
+    """
+    時間軸上的單一片段（對應一個輸入檔案）
+    """
+
+    __slots__ = ('index', 'path', 'name', 'start', 'duration', 'probe', 'error')
+
+    def __init__(self, index, path, start, duration, probe=None, error=None):
+        self.index = index
+        self.path = str(path)
+        self.name = os.path.basename(self.path)
+        self.start = start
+        self.duration = duration
+        self.probe = probe
+        self.error = error
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+    @property
+    def title(self):
+        """章節名稱（去掉副檔名的檔案名稱）"""
+        return os.path.splitext(self.name)[0]
+
+    def __repr__(self):
+        return f"Segment({self.index}, {self.name!r}, start={float(self.start):.3f}, duration={float(self.duration):.3f})"
+
+class Timeline:
+    """
+    concat 合併後的時間軸模型
+
+    以前綴和陣列保存每個片段的累積開始時間（精確有理數秒），
+    並以二分搜尋在 O(log n) 時間內找出任一時間點所在的片段。
+    探測資料只在建立時取得一次，供時間軸、合併與字幕合併共用。
+    """
+
+    def __init__(self, segments):
+        self.segments = list(segments)
+        # offsets[i] 為第 i 個片段的開始時間，offsets[-1] 為總時長
+        self.offsets = [Fraction(0)]
+        for index, segment in enumerate(self.segments):
+            segment.index = index
+            segment.start = self.offsets[-1]
+            self.offsets.append(self.offsets[-1] + segment.duration)
+
+    @classmethod
+    def from_files(cls, file_paths, jobs=None):
+        """
+        並行探測所有檔案後建立時間軸；無法探測的檔案時長以 0 計，並記錄在 failures
+
+        Args:
+            file_paths (list): 依播放順序排列的影片檔案路徑
+            jobs (int): 並行探測的工作數（預設為 CPU 核心數）
+
+        Returns:
+            Timeline: 時間軸
+        """
+        file_paths = [str(file_path) for file_path in file_paths]
+        segments = []
+        for index, (file_path, (probe, error)) in enumerate(zip(file_paths, probe_files(file_paths, jobs))):
+            duration = probe.exact_duration if probe else Fraction(0)
+            segments.append(Segment(index, file_path, Fraction(0), max(duration, Fraction(0)), probe, error))
+        return cls(segments)
+
+    @classmethod
+    def from_directory(cls, directory, pattern="*.mp4", sort_by_name=True, jobs=None):
+        """
+        以目錄中符合模式的檔案建立時間軸
+
+        Args:
+            directory (str): 影片目錄路徑
+            pattern (str): 檔案匹配模式
+            sort_by_name (bool): 是否按檔案名稱排序
+            jobs (int): 並行探測的工作數
+
+        Returns:
+            Timeline: 時間軸
+        """
+        return cls.from_files(list_media_files(directory, pattern, sort_by_name), jobs)
+
+    @property
+    def failures(self):
+        """無法探測的片段列表"""
+        return [segment for segment in self.segments if segment.probe is None]
+
+    @property
+    def total_duration(self):
+        """總時長（有理數秒）"""
+        return self.offsets[-1]
+
+    @property
+    def files(self):
+        """依播放順序排列的檔案路徑"""
+        return [segment.path for segment in self.segments]
+
+    def start_of(self, index):
+        """第 index 個片段的開始時間（有理數秒）"""
+        return self.offsets[index]
+
+    def segment_at(self, time):
+        """
+        找出指定時間點所在的片段
+
+        片段的範圍為 [start, end)；bisect_right 會越過所有相同的累積時間，
+        因此時長為 0 的片段永遠不會被選中。
+
+        Args:
+            time (float | Fraction): 合併後時間軸上的時間（秒）
+
+        Returns:
+            Segment: 所在片段；超出範圍時為 None
+        """
+        if time < 0 or time >= self.total_duration:
+            return None
+        return self.segments[bisect_right(self.offsets, time) - 1]
+
+    def chapters(self):
+        """
+        轉換為章節列表
+
+        Returns:
+            list: build_chapters 格式的章節列表
+        """
+        return build_chapters([(segment.title, segment.name, segment.duration) for segment in self.segments])
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __getitem__(self, index):
+        return self.segments[index]
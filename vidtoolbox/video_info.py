@@ -1,6 +1,14 @@
 import os
-import subprocess
 import argparse
+from vidtoolbox.probe import iter_probe_files, set_cache_enabled
+from vidtoolbox.output_formats import OUTPUT_FORMATS, write_json, write_jsonl, write_csv, log
+from vidtoolbox.process import add_trace_argument, enable_trace
+
+# Columns of the CSV output (also the keys of every record)
+VIDEO_INFO_FIELDS = [
+    "file", "path", "width", "height", "resolution", "duration", "duration_hms",
+    "size_bytes", "size_mb", "video_codec", "audio_codec", "error",
+]
 
 def format_duration(seconds):
     """Convert seconds into HH:MM:SS format."""
@@ -15,57 +23,92 @@ def get_file_size(file_path):
     size_in_mb = size_in_bytes / (1024 * 1024)
     return size_in_mb
 
-def get_video_info(video_directory, sort_by="name"):
-    """Retrieve video resolution, duration, and file size from a given directory and sort the output."""
-    files = [f for f in os.listdir(video_directory) if f.endswith('.mp4')]
+def video_info_record(file_path, probe, error=None):
+    """Build the structured record for one file (error is set and the rest empty if probing failed)."""
+    record = dict.fromkeys(VIDEO_INFO_FIELDS)
+    record["file"] = os.path.basename(file_path)
+    record["path"] = os.path.abspath(file_path)
+    if probe is None:
+        record["error"] = str(error)
+        return record
 
-    video_data = []
-    for file in files:
-        file_path = os.path.join(video_directory, file)
+    # Probe once for resolution, duration and codecs
+    if probe.video_stream:
+        record["width"], record["height"] = probe.width, probe.height
+        record["resolution"] = f"{probe.width}x{probe.height}"
+    record["duration"] = probe.duration
+    record["duration_hms"] = format_duration(probe.duration)
+    record["size_bytes"] = os.path.getsize(file_path)
+    record["size_mb"] = round(get_file_size(file_path), 2)
+    record["video_codec"] = probe.video_codec
+    record["audio_codec"] = probe.audio_codec
+    return record
 
-        # Get video resolution
-        cmd_size = [
-            'ffprobe', '-v', 'error', '-select_streams', 'v:0',
-            '-show_entries', 'stream=width,height', '-of', 'csv=p=0',
-            file_path
-        ]
-        width_height = subprocess.check_output(cmd_size).decode().strip()
+def iter_video_info(video_directory, jobs=None):
+    """Yield one record per .mp4 file in completion order, as soon as each probe finishes."""
+    files = [f for f in os.listdir(video_directory) if f.endswith('.mp4')]
+    file_paths = [os.path.join(video_directory, file) for file in files]
+    for _, file_path, probe, error in iter_probe_files(file_paths, jobs):
+        yield video_info_record(file_path, probe, error)
 
-        # Get video duration
-        cmd_duration = [
-            'ffprobe', '-v', 'error', '-select_streams', 'v:0',
-            '-show_entries', 'format=duration', '-of', 'csv=p=0',
-            file_path
-        ]
-        duration = float(subprocess.check_output(cmd_duration).decode().strip())
-        formatted_duration = format_duration(duration)
+def sort_video_info(records, sort_by="name"):
+    """Sort records by name, size (largest first) or duration (longest first, unprobed files last)."""
+    if sort_by == "size":
+        return sorted(records, key=lambda record: record["size_bytes"] or -1, reverse=True)
+    if sort_by == "duration":
+        return sorted(records, key=lambda record: record["duration"] if record["duration"] is not None else -1, reverse=True)
+    return sorted(records, key=lambda record: record["file"])
 
-        # Get file size
-        file_size = get_file_size(file_path)
+def get_video_info(video_directory, sort_by="name", jobs=None, output_format="text", stream=None):
+    """Retrieve video resolution, duration, and file size from a given directory and sort the output.
 
-        video_data.append((file, width_height, formatted_duration, file_size, duration))
+    Returns the list of records (one dict per file, see VIDEO_INFO_FIELDS).
+    output_format selects what is written: human-readable text (default),
+    a JSON array, CSV, or JSON Lines. JSON Lines is streamed in completion
+    order while probing, so sort_by does not apply to it.
+    """
+    if output_format == "jsonl":
+        records = []
+        for record in iter_video_info(video_directory, jobs):
+            write_jsonl(record, stream)
+            records.append(record)
+        return sort_video_info(records, sort_by)
 
-    # **Sort videos based on user selection**
-    if sort_by == "name":
-        video_data.sort(key=lambda x: x[0])  # Sort by filename
-    elif sort_by == "size":
-        video_data.sort(key=lambda x: x[3], reverse=True)  # Sort by file size (largest to smallest)
-    elif sort_by == "duration":
-        video_data.sort(key=lambda x: x[4], reverse=True)  # Sort by duration (longest to shortest)
+    records = sort_video_info(iter_video_info(video_directory, jobs), sort_by)
+    if output_format == "json":
+        write_json(records, stream)
+    elif output_format == "csv":
+        write_csv(records, VIDEO_INFO_FIELDS, stream)
+    else:
+        for record in records:
+            if record["error"]:
+                log(f"❌ Failed to probe {record['file']}: {record['error']}")
 
-    # **Print output**
-    print("\n📌 Video Information:")
-    for file, width_height, formatted_duration, file_size, _ in video_data:
-        print(f"Video: {file}, Resolution: {width_height}, Duration: {formatted_duration}, File Size: {file_size:.2f} MB")
+        # **Print output**
+        print("\n📌 Video Information:", file=stream)
+        for record in records:
+            if record["error"]:
+                continue
+            width_height = f"{record['width']},{record['height']}" if record["resolution"] else ""
+            print(f"Video: {record['file']}, Resolution: {width_height}, Duration: {record['duration_hms']}, "
+                  f"File Size: {record['size_bytes'] / (1024 * 1024):.2f} MB", file=stream)
+    return records
 
 def main():
     parser = argparse.ArgumentParser(description="Retrieve video resolution, duration, and file size with sorting options")
     parser.add_argument("video_directory", help="Directory containing video files")
     parser.add_argument("--sort", choices=["name", "size", "duration"], default="name",
                         help="Sorting method: name (default), size (file size), duration (video length)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the persistent ffprobe cache")
+    parser.add_argument("-j", "--jobs", type=int, help="Number of concurrent ffprobe workers (default: CPU count)")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="text",
+                        help="Output format: text (default), json, jsonl (streamed as files are probed) or csv")
     
+    add_trace_argument(parser)
     args = parser.parse_args()
-    get_video_info(args.video_directory, args.sort)
+    enable_trace(args.trace, "vid-info")
+    set_cache_enabled(not args.no_cache)
+    get_video_info(args.video_directory, args.sort, args.jobs, args.format)
 
 if __name__ == "__main__":
     main()
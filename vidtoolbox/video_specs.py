@@ -1,105 +1,121 @@
 import os
-import subprocess
+import sys
+import argparse
 from collections import defaultdict
+from .probe import probe_file, iter_probe_files, set_cache_enabled
+from .timeline import list_media_files
+from .encoder_profiles import DEFAULT_CRF, DEFAULT_AUDIO_BITRATE, DEFAULT_PRESET, DEFAULT_PROFILE, X264_PRESETS, BUILTIN_PROFILES, get_profile
+from .output_formats import OUTPUT_FORMATS, write_json, write_jsonl, write_csv
+from .process import add_trace_argument, enable_trace
 
-def get_video_specs(file_path):
+def get_video_specs(file_path, probe=None):
     """
     獲取影片的詳細規格資訊
     
     Args:
         file_path (str): 影片檔案路徑
+        probe (ProbeResult): 已取得的探測結果（可選，避免重複執行 ffprobe）
     
     Returns:
         dict: 包含影片規格的字典
     """
     try:
-        # 獲取影片編碼資訊
-        cmd_codec = [
-            'ffprobe', '-v', 'error', '-select_streams', 'v:0',
-            '-show_entries', 'stream=codec_name,width,height,pix_fmt,bit_rate', 
-            '-of', 'csv=p=0', file_path
-        ]
-        video_info = subprocess.check_output(cmd_codec).decode().strip().split(',')
-        
-        # 獲取音訊編碼資訊
-        cmd_audio = [
-            'ffprobe', '-v', 'error', '-select_streams', 'a:0',
-            '-show_entries', 'stream=codec_name,sample_rate,channels', 
-            '-of', 'csv=p=0', file_path
-        ]
-        audio_info = subprocess.check_output(cmd_audio).decode().strip().split(',')
-        
-        # 解析資訊
-        if len(video_info) >= 4:
-            video_codec = video_info[0] or 'unknown'
-            width = video_info[1] or 'unknown'
-            height = video_info[2] or 'unknown'
-            pix_fmt = video_info[3] or 'unknown'
-            video_bitrate = video_info[4] if len(video_info) > 4 else 'unknown'
-        else:
-            video_codec = width = height = pix_fmt = video_bitrate = 'unknown'
-        
-        if len(audio_info) >= 3:
-            audio_codec = audio_info[0] or 'unknown'
-            sample_rate = audio_info[1] or 'unknown'
-            channels = audio_info[2] or 'unknown'
-        else:
-            audio_codec = sample_rate = channels = 'unknown'
-        
-        return {
-            'video_codec': video_codec,
-            'width': width,
-            'height': height,
-            'pix_fmt': pix_fmt,
-            'video_bitrate': video_bitrate,
-            'audio_codec': audio_codec,
-            'sample_rate': sample_rate,
-            'channels': channels,
-            'resolution': f"{width}x{height}" if width != 'unknown' and height != 'unknown' else 'unknown'
-        }
+        if probe is None:
+            probe = probe_file(file_path)
+        return probe.to_specs()
         
     except Exception as e:
         print(f"❌ 無法獲取影片規格: {e}")
         return None
 
-def check_video_compatibility(video_files, video_directory):
+# spec_key 各欄位的名稱：copy 模式串接時必須一致的規格
+# （H.264/HEVC 的 profile 與 level 不同時 SPS/PPS 不同，串接後播放器可能無法解碼）
+SPEC_KEY_FIELDS = (
+    'video_codec', 'resolution', 'pix_fmt', 'profile', 'level', 'frame_rate', 'time_base',
+    'audio_codec', 'audio_profile', 'sample_rate', 'channels',
+)
+
+def spec_key(specs):
+    """
+    取得決定能否以 copy 模式合併的規格組合
+
+    Args:
+        specs (dict): get_video_specs 回傳的規格字典
+
+    Returns:
+        tuple: SPEC_KEY_FIELDS 各欄位的值（缺少的欄位為 'unknown'）
+    """
+    return tuple(specs.get(field, 'unknown') for field in SPEC_KEY_FIELDS)
+
+# 每個檔案的規格記錄欄位（CSV 欄位順序）
+SPEC_RECORD_FIELDS = [
+    'file', 'group', 'video_codec', 'width', 'height', 'resolution', 'pix_fmt', 'profile', 'level',
+    'video_bitrate', 'frame_rate', 'time_base', 'audio_codec', 'audio_profile', 'sample_rate', 'channels',
+    'error',
+]
+
+def spec_record(file, specs, error=None):
+    """
+    單一檔案的結構化規格記錄
+
+    Args:
+        file (str): 檔案名稱
+        specs (dict): 規格字典（探測失敗時為 None）
+        error (Exception): 探測錯誤（可選）
+
+    Returns:
+        dict: 規格記錄，error 在成功時為 None
+    """
+    record = dict.fromkeys(SPEC_RECORD_FIELDS)
+    record.update(specs or {})
+    record['file'] = file
+    record['error'] = None if specs else str(error)
+    return record
+
+def check_video_compatibility(video_files, video_directory, jobs=None, verbose=True, on_record=None):
     """
     檢查影片檔案的相容性
     
     Args:
         video_files (list): 影片檔案列表
         video_directory (str): 影片目錄路徑
+        jobs (int): 並行探測的工作數（預設為 CPU 核心數）
+        verbose (bool): 是否輸出給人看的檢查過程
+        on_record (callable): 每個檔案探測完成時（依完成順序）以規格記錄呼叫（可選）
     
     Returns:
-        dict: 相容性檢查結果
+        dict: 相容性檢查結果；records 為依輸入順序排列的規格記錄（含 group 編號）
     """
     specs_list = []
     specs_groups = defaultdict(list)
     
-    print("\n🔍 檢查影片規格相容性...")
+    if verbose:
+        print("\n🔍 檢查影片規格相容性...")
     
-    for i, file in enumerate(video_files, 1):
-        file_path = os.path.join(video_directory, file)
-        specs = get_video_specs(file_path)
-        
-        if specs:
+    file_paths = [os.path.join(video_directory, file) for file in video_files]
+    records = [None] * len(video_files)
+    for index, _, probe, error in iter_probe_files(file_paths, jobs):
+        records[index] = spec_record(video_files[index], probe.to_specs() if probe else None, error)
+        if on_record is not None:
+            on_record(records[index])
+    
+    for i, (file, record) in enumerate(zip(video_files, records), 1):
+        if record['error'] is None:
+            specs = {key: value for key, value in record.items() if key not in ('file', 'group', 'error')}
             specs_list.append((file, specs))
             
             # 創建規格組合的鍵值
-            spec_key = (
-                specs['video_codec'],
-                specs['resolution'],
-                specs['pix_fmt'],
-                specs['audio_codec'],
-                specs['sample_rate']
-            )
-            specs_groups[spec_key].append(file)
+            specs_groups[spec_key(specs)].append(file)
+            record['group'] = list(specs_groups).index(spec_key(specs)) + 1
             
-            print(f"  {i}. {file}")
-            print(f"     影片編碼: {specs['video_codec']}, 解析度: {specs['resolution']}")
-            print(f"     像素格式: {specs['pix_fmt']}, 音訊: {specs['audio_codec']} {specs['sample_rate']}Hz")
-        else:
-            print(f"  {i}. {file} - ❌ 無法讀取規格")
+            if verbose:
+                print(f"  {i}. {file}")
+                print(f"     影片編碼: {specs['video_codec']}, 解析度: {specs['resolution']}")
+                print(f"     像素格式: {specs['pix_fmt']}, profile: {specs['profile']} (level {specs['level']}), "
+                      f"幀率: {specs['frame_rate']}")
+                print(f"     音訊: {specs['audio_codec']} {specs['sample_rate']}Hz {specs['channels']}ch")
+        elif verbose:
+            print(f"  {i}. {file} - ❌ 無法讀取規格: {record['error']}")
     
     # 分析相容性
     if len(specs_groups) == 1:
@@ -107,117 +123,414 @@ def check_video_compatibility(video_files, video_directory):
         return {
             'compatible': True,
             'message': '✅ 所有影片規格相同，可以使用快速合併',
-            'specs': specs_list[0][1] if specs_list else None
+            'specs': specs_list[0][1] if specs_list else None,
+            'specs_groups': specs_groups,
+            'specs_list': specs_list,
+            'records': records
         }
     else:
         # 影片規格不同
-        print(f"\n⚠️  發現 {len(specs_groups)} 種不同的影片規格:")
-        for i, (spec_key, files) in enumerate(specs_groups.items(), 1):
-            print(f"  規格 {i}: {len(files)} 個檔案")
-            for file in files:
-                print(f"    - {file}")
+        if verbose:
+            print(f"\n⚠️  發現 {len(specs_groups)} 種不同的影片規格:")
+            for i, (_, files) in enumerate(specs_groups.items(), 1):
+                print(f"  規格 {i}: {len(files)} 個檔案")
+                for file in files:
+                    print(f"    - {file}")
         
         return {
             'compatible': False,
             'message': f'❌ 發現 {len(specs_groups)} 種不同的影片規格，需要重新編碼',
             'specs_groups': specs_groups,
-            'specs_list': specs_list
+            'specs_list': specs_list,
+            'records': records
         }
 
-def get_merge_options():
+def compatibility_report(result):
+    """
+    將相容性檢查結果轉為可序列化為 JSON 的摘要
+
+    Args:
+        result (dict): check_video_compatibility 的回傳值
+
+    Returns:
+        dict: compatible、groups（每組規格與檔案）、files（每個檔案的規格記錄）與 errors
+    """
+    return {
+        'compatible': result['compatible'],
+        'groups': [
+            {'group': index, 'spec': dict(zip(SPEC_KEY_FIELDS, key)), 'files': list(files)}
+            for index, (key, files) in enumerate(result['specs_groups'].items(), 1)
+        ],
+        'files': result['records'],
+        'errors': [record for record in result['records'] if record['error'] is not None],
+    }
+
+# 非互動模式下 on_incompatible 參數與合併選項的對應
+MERGE_OPTION_CHOICES = {
+    'reencode': '1',
+    'force': '2',
+    'abort': '3',
+    'smart': '4',
+}
+
+# 智慧合併時可以重新編碼成相同規格的編碼器
+VIDEO_ENCODERS = {
+    'h264': 'libx264',
+    'hevc': 'libx265',
+}
+AUDIO_ENCODERS = {
+    'aac': 'aac',
+    'mp3': 'libmp3lame',
+    'opus': 'libopus',
+    'ac3': 'ac3',
+}
+
+# ffprobe 回報的 profile 名稱與編碼器 -profile 參數的對應
+VIDEO_PROFILES = {
+    'h264': {
+        'Constrained Baseline': 'baseline',
+        'Baseline': 'baseline',
+        'Main': 'main',
+        'High': 'high',
+        'High 10': 'high10',
+        'High 4:2:2': 'high422',
+        'High 4:4:4 Predictive': 'high444',
+    },
+    'hevc': {
+        'Main': 'main',
+        'Main 10': 'main10',
+    },
+}
+# ffmpeg 內建的 aac 編碼器只能輸出 AAC-LC
+AUDIO_PROFILES = {
+    'aac': {'LC': 'aac_low'},
+}
+
+def level_argument(codec, level):
+    """
+    ffprobe 的 level 數值轉為編碼器使用的格式（H.264 為 level×10，HEVC 為 level×30）
+
+    Returns:
+        str: 例如 4.1；無法轉換時為 None
+    """
+    try:
+        level = int(level)
+    except (TypeError, ValueError):
+        return None
+    if level <= 0:
+        return None
+    return f"{level / (30 if codec == 'hevc' else 10):.1f}"
+
+def validate_crf(crf):
+    """
+    驗證 CRF 值
+
+    Args:
+        crf (int): CRF 值
+
+    Returns:
+        int: 合法的 CRF 值
+
+    Raises:
+        ValueError: CRF 值不在 0-51 之間
+    """
+    crf = int(crf)
+    if not 0 <= crf <= 51:
+        raise ValueError("CRF 值必須在 0-51 之間")
+    return crf
+
+def validate_audio_bitrate(audio_bitrate):
+    """
+    驗證音訊位元率格式（例如 192k）
+
+    Args:
+        audio_bitrate (str): 音訊位元率
+
+    Returns:
+        str: 合法的音訊位元率
+
+    Raises:
+        ValueError: 格式不正確
+    """
+    audio_bitrate = str(audio_bitrate).strip()
+    if not (audio_bitrate.endswith('k') and audio_bitrate[:-1].isdigit()):
+        raise ValueError("請輸入有效的位元率 (例如: 192k)")
+    return audio_bitrate
+
+def get_merge_options(on_incompatible=None):
     """
     獲取合併選項
     
+    Args:
+        on_incompatible (str): 非互動模式的預設選擇 (reencode/force/abort)，
+            指定時不詢問使用者
+    
     Returns:
         str: 使用者選擇的選項
     """
+    if on_incompatible is not None:
+        if on_incompatible not in MERGE_OPTION_CHOICES:
+            raise ValueError(f"無效的 on_incompatible 選項: {on_incompatible}")
+        return MERGE_OPTION_CHOICES[on_incompatible]
+    
     print("\n🎯 請選擇合併方式:")
     print("  1. 重新編碼合併 (推薦，可調整畫質)")
     print("  2. 強制合併 (嘗試直接合併，可能失敗)")
     print("  3. 取消合併")
+    print("  4. 智慧合併 (只重新編碼規格不同的檔案，其餘直接複製)")
     
     while True:
-        choice = input("\n請輸入選項 (1/2/3): ").strip()
-        if choice in ['1', '2', '3']:
+        choice = input("\n請輸入選項 (1/2/3/4): ").strip()
+        if choice in ['1', '2', '3', '4']:
             return choice
         else:
-            print("❌ 無效選項，請輸入 1、2 或 3")
+            print("❌ 無效選項，請輸入 1、2、3 或 4")
 
-def get_quality_settings():
+def get_quality_settings(crf=None, audio_bitrate=None, assume_defaults=False, profile=None):
     """
     獲取畫質設定
     
+    Args:
+        crf (int): CRF 值（可選，指定時不詢問）
+        audio_bitrate (str): 音訊位元率（可選，指定時不詢問）
+        assume_defaults (bool): 未指定的設定直接使用預設值，不詢問使用者
+        profile (EncoderProfile): 提供預設值與 preset 的編碼 profile（預設依設定檔）
+    
     Returns:
-        dict: 畫質設定
+        dict: 畫質設定（crf、audio_bitrate、preset）
+    
+    Raises:
+        ValueError: 指定的 CRF 值或音訊位元率不合法
     """
+    profile = get_profile(profile)
+    if profile.is_copy:
+        # copy profile 沒有畫質設定，需要重新編碼的檔案使用預設 profile 的設定
+        profile = BUILTIN_PROFILES[DEFAULT_PROFILE]
+    defaults = profile.quality_settings()
+    default_crf = defaults['crf'] if defaults['crf'] is not None else DEFAULT_CRF
+    default_audio_bitrate = defaults['audio_bitrate'] or DEFAULT_AUDIO_BITRATE
+    
+    if crf is not None:
+        crf = validate_crf(crf)
+    elif assume_defaults:
+        crf = default_crf
+    if audio_bitrate is not None:
+        audio_bitrate = validate_audio_bitrate(audio_bitrate)
+    elif assume_defaults:
+        audio_bitrate = default_audio_bitrate
+    
+    if crf is not None and audio_bitrate is not None:
+        return {
+            'crf': crf,
+            'audio_bitrate': audio_bitrate,
+            'preset': defaults['preset']
+        }
+    
     print("\n🎨 畫質設定:")
     
-    # CRF 值設定
-    print("CRF 值 (0-51，越低畫質越好，檔案越大):")
-    print("  18-23: 高畫質 (推薦)")
-    print("  23-28: 中等畫質")
-    print("  28-35: 較低畫質")
+    if crf is None:
+        # CRF 值設定
+        print("CRF 值 (0-51，越低畫質越好，檔案越大):")
+        print("  18-23: 高畫質 (推薦)")
+        print("  23-28: 中等畫質")
+        print("  28-35: 較低畫質")
     
-    while True:
+    while crf is None:
+        value = input(f"請輸入 CRF 值 (預設: {default_crf}): ").strip()
+        if value == "":
+            crf = default_crf
+            break
         try:
-            crf = input("請輸入 CRF 值 (預設: 18): ").strip()
-            if crf == "":
-                crf = 18
-            else:
-                crf = int(crf)
-                if 0 <= crf <= 51:
-                    break
-                else:
-                    print("❌ CRF 值必須在 0-51 之間")
-        except ValueError:
-            print("❌ 請輸入有效的數字")
-    
-    # 音訊位元率設定
-    print("\n音訊位元率設定:")
-    print("  128k: 較低音質")
-    print("  192k: 中等音質 (推薦)")
-    print("  256k: 高音質")
-    print("  320k: 最高音質")
+            crf = validate_crf(value)
+        except ValueError as e:
+            print(f"❌ {e}")
     
-    while True:
-        audio_bitrate = input("請輸入音訊位元率 (預設: 192k): ").strip()
-        if audio_bitrate == "":
-            audio_bitrate = "192k"
-        if audio_bitrate.endswith('k') and audio_bitrate[:-1].isdigit():
+    if audio_bitrate is None:
+        # 音訊位元率設定
+        print("\n音訊位元率設定:")
+        print("  128k: 較低音質")
+        print("  192k: 中等音質 (推薦)")
+        print("  256k: 高音質")
+        print("  320k: 最高音質")
+    
+    while audio_bitrate is None:
+        value = input(f"請輸入音訊位元率 (預設: {default_audio_bitrate}): ").strip()
+        if value == "":
+            audio_bitrate = default_audio_bitrate
             break
-        else:
-            print("❌ 請輸入有效的位元率 (例如: 192k)")
+        try:
+            audio_bitrate = validate_audio_bitrate(value)
+        except ValueError as e:
+            print(f"❌ {e}")
     
     return {
         'crf': crf,
-        'audio_bitrate': audio_bitrate
+        'audio_bitrate': audio_bitrate,
+        'preset': defaults['preset']
     }
 
-def build_ffmpeg_command(file_list_path, output_file, quality_settings):
+def build_ffmpeg_command(file_list_path, output_file, quality_settings=None, profile=None):
     """
-    建立 ffmpeg 命令
+    建立重新編碼合併的 ffmpeg 命令
     
     Args:
         file_list_path (str): file_list.txt 路徑
         output_file (str): 輸出檔案路徑
-        quality_settings (dict): 畫質設定
+        quality_settings (dict): 覆寫 profile 的畫質設定（crf、audio_bitrate、preset，可選）
+        profile (EncoderProfile): 編碼 profile 或名稱（預設依設定檔，再來是 archive）
     
     Returns:
-        list: ffmpeg 命令參數列表
+        list: ffmpeg 命令參數列表；copy profile 時為強制合併命令
     """
+    profile = get_profile(profile)
+    if profile.is_copy:
+        return build_force_merge_command(file_list_path, output_file)
+    
     cmd = [
         "ffmpeg", "-f", "concat", "-safe", "0",
         "-i", file_list_path,
-        "-c:v", "libx264", "-preset", "slow", 
-        "-crf", str(quality_settings['crf']),
-        "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2",  # 確保解析度為偶數
-        "-c:a", "aac", "-b:a", quality_settings['audio_bitrate'],
+    ]
+    cmd += profile.video_args(quality_settings)
+    cmd += ["-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2"]  # 確保解析度為偶數
+    cmd += profile.audio_args(quality_settings)
+    cmd += [
         "-y",  # 覆蓋輸出檔案
         output_file
     ]
     
     return cmd
 
+def select_target_spec(compatibility_result):
+    """
+    選出檔案數最多的規格組作為智慧合併的目標規格
+
+    Args:
+        compatibility_result (dict): check_video_compatibility 的結果
+
+    Returns:
+        dict: 目標規格，包含 spec_key、files（符合目標規格的檔案）與 specs（規格字典）；
+            無可用規格時為 None
+    """
+    specs_groups = compatibility_result.get('specs_groups')
+    if not specs_groups:
+        return None
+    
+    # 檔案數相同時取最先出現的規格組
+    key, files = max(specs_groups.items(), key=lambda item: len(item[1]))
+    specs_by_file = dict(compatibility_result.get('specs_list', []))
+    return {
+        'spec_key': key,
+        'files': list(files),
+        'specs': specs_by_file[files[0]]
+    }
+
+def can_conform_to(target_specs):
+    """
+    檢查是否能重新編碼成目標規格
+
+    目標的 profile（例如 H.264 High、AAC-LC）必須是編碼器能輸出的，否則串接時參數集不一致。
+
+    Args:
+        target_specs (dict): 目標規格字典
+
+    Returns:
+        bool: 目標的影片與音訊編碼都有對應的編碼器時為 True
+    """
+    video_codec = target_specs['video_codec']
+    if video_codec not in VIDEO_ENCODERS:
+        return False
+    if target_specs['resolution'] == 'unknown' or target_specs['pix_fmt'] == 'unknown':
+        return False
+    profile = target_specs.get('profile', 'unknown')
+    if profile != 'unknown' and profile not in VIDEO_PROFILES.get(video_codec, {}):
+        return False
+    audio_codec = target_specs['audio_codec']
+    if audio_codec == 'unknown':
+        return True
+    if audio_codec not in AUDIO_ENCODERS:
+        return False
+    audio_profile = target_specs.get('audio_profile', 'unknown')
+    return audio_profile == 'unknown' or audio_codec not in AUDIO_PROFILES or audio_profile in AUDIO_PROFILES[audio_codec]
+
+def build_conform_command(input_file, output_file, target_specs, quality_settings, has_audio=True, threads=None):
+    """
+    建立將單一檔案重新編碼成目標規格的 ffmpeg 命令，使其能與其他檔案以 copy 模式合併
+
+    會對齊影片編碼、profile 與 level、解析度（等比縮放並補黑邊）、像素格式、幀率、時間基準，
+    以及音訊編碼、profile、取樣率與聲道數，讓串接後的參數集與其他檔案相容。
+
+    Args:
+        input_file (str): 輸入影片檔案路徑
+        output_file (str): 輸出影片檔案路徑
+        target_specs (dict): 目標規格字典
+        quality_settings (dict): 畫質設定（可含 preset，預設 slow）
+        has_audio (bool): 輸入檔案是否有音訊；沒有時補上靜音音軌
+        threads (int): 編碼器使用的執行緒數（可選，並行編碼時避免過度搶佔 CPU）
+
+    Returns:
+        list: ffmpeg 命令參數列表
+    """
+    width, height = target_specs['width'], target_specs['height']
+    video_filter = (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+    )
+    
+    cmd = ["ffmpeg", "-i", input_file]
+    target_audio = target_specs['audio_codec']
+    if target_audio != 'unknown' and not has_audio:
+        # 補上與目標相同取樣率的靜音音軌
+        layout = "mono" if target_specs['channels'] == '1' else "stereo"
+        cmd += ["-f", "lavfi", "-i", f"anullsrc=r={target_specs['sample_rate']}:cl={layout}", "-shortest"]
+        audio_map = "1:a:0"
+    else:
+        audio_map = "0:a:0"
+    
+    cmd += ["-map", "0:v:0"]
+    if target_audio != 'unknown':
+        cmd += ["-map", audio_map]
+    
+    # 硬體編碼器等 profile 的 preset 不適用於 x264/x265
+    preset = quality_settings.get('preset')
+    if preset not in X264_PRESETS:
+        preset = DEFAULT_PRESET
+    cmd += [
+        "-vf", video_filter,
+        "-c:v", VIDEO_ENCODERS[target_specs['video_codec']], "-preset", preset,
+        "-crf", str(quality_settings['crf']),
+        "-pix_fmt", target_specs['pix_fmt'],
+    ]
+    video_codec = target_specs['video_codec']
+    profile = VIDEO_PROFILES.get(video_codec, {}).get(target_specs.get('profile'))
+    if profile:
+        cmd += ["-profile:v", profile]
+    level = level_argument(video_codec, target_specs.get('level'))
+    if level:
+        # libx265 沒有 -level 選項，需透過 -x265-params 設定
+        cmd += ["-x265-params", f"level-idc={level}"] if video_codec == 'hevc' else ["-level", level]
+    if threads:
+        cmd += ["-threads", str(threads)]
+    if target_specs.get('frame_rate', 'unknown') not in ('unknown', '0/0'):
+        cmd += ["-r", target_specs['frame_rate']]
+    time_base = target_specs.get('time_base', 'unknown')
+    if time_base.startswith('1/'):
+        cmd += ["-video_track_timescale", time_base[2:]]
+    
+    if target_audio != 'unknown':
+        cmd += ["-c:a", AUDIO_ENCODERS[target_audio], "-b:a", quality_settings['audio_bitrate']]
+        audio_profile = AUDIO_PROFILES.get(target_audio, {}).get(target_specs.get('audio_profile'))
+        if audio_profile:
+            cmd += ["-profile:a", audio_profile]
+        if target_specs['sample_rate'] != 'unknown':
+            cmd += ["-ar", target_specs['sample_rate']]
+        if target_specs['channels'] != 'unknown':
+            cmd += ["-ac", target_specs['channels']]
+    else:
+        cmd += ["-an"]
+    
+    cmd += ["-y", output_file]
+    return cmd
+
 def build_force_merge_command(file_list_path, output_file):
     """
     建立強制合併的 ffmpeg 命令（使用 copy 模式）
@@ -237,4 +550,43 @@ def build_force_merge_command(file_list_path, output_file):
         output_file
     ]
     
-    return cmd 
\ No newline at end of file
+    return cmd
+
+def main():
+    parser = argparse.ArgumentParser(description="檢查目錄中影片的規格與相容性")
+    parser.add_argument("video_directory", help="包含影片檔案的目錄")
+    parser.add_argument("-p", "--pattern", default="*.mp4", help="檔案匹配模式 (預設: *.mp4)")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="text",
+                        help="輸出格式: text (預設)、json、jsonl (探測完成即輸出) 或 csv")
+    parser.add_argument("-j", "--jobs", type=int, help="並行 ffprobe 的工作數 (預設: CPU 核心數)")
+    parser.add_argument("--no-cache", action="store_true", help="不使用 ffprobe 持久化快取")
+    
+    add_trace_argument(parser)
+    args = parser.parse_args()
+    enable_trace(args.trace, "vid-specs")
+    set_cache_enabled(not args.no_cache)
+    
+    video_files = [path.name for path in list_media_files(args.video_directory, args.pattern)]
+    if not video_files:
+        print(f"❌ 在目錄 {args.video_directory} 中找不到符合 {args.pattern} 的檔案", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.format == "text":
+        result = check_video_compatibility(video_files, args.video_directory, args.jobs)
+        print(f"\n{result['message']}")
+    elif args.format == "jsonl":
+        # 每個檔案探測完成即輸出一行（此時尚未分組），最後輸出一行含分組的摘要
+        def emit(record):
+            write_jsonl(dict({key: value for key, value in record.items() if key != 'group'}, type="file"))
+        result = check_video_compatibility(video_files, args.video_directory, args.jobs, verbose=False, on_record=emit)
+        report = compatibility_report(result)
+        write_jsonl({'type': 'summary', 'compatible': report['compatible'], 'groups': report['groups']})
+    else:
+        result = check_video_compatibility(video_files, args.video_directory, args.jobs, verbose=False)
+        if args.format == "json":
+            write_json(compatibility_report(result))
+        else:
+            write_csv(result['records'], SPEC_RECORD_FIELDS)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,546 @@
+import os
+import sys
+import json
+import time
+import queue
+import ctypes
+import ctypes.util
+import select
+import struct
+import signal
+import argparse
+import threading
+from collections import deque
+from fnmatch import fnmatch
+from .convert_to_mp3 import convert_video_to_mp3
+from .merge_videos import incremental_merge, resolve_output_path
+from .add_subtitles import batch_merge_subtitles
+from .probe import set_cache_enabled
+from .encoder_profiles import add_profile_arguments, profile_from_args
+from .process import add_trace_argument, enable_trace
+
+# 監看的動作與其處理的檔案類型
+WATCH_ACTIONS = ('mp3', 'merge', 'subtitles')
+
+DEFAULT_SETTLE_SECONDS = 5.0
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_METRICS_INTERVAL = 60.0
+
+# inotify 事件旗標（linux/inotify.h）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+class InotifyWatcher:
+    """
+    以 inotify（透過 ctypes 呼叫 libc）監看目錄中新增或寫入的檔案，只適用於 Linux
+    """
+
+    def __init__(self, directories):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify 只支援 Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("libc 不支援 inotify")
+        self._libc = libc
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失敗")
+        self._directories = {}
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        for directory in directories:
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(self._fd)
+                raise OSError(errno, f"無法監看目錄 {directory}")
+            self._directories[wd] = directory
+
+    def poll(self, timeout):
+        """
+        等待檔案事件
+
+        Args:
+            timeout (float): 最長等待秒數
+
+        Returns:
+            set: 有變動的檔案路徑
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        paths = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, _, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name and wd in self._directories:
+                paths.add(os.path.join(self._directories[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self._fd)
+
+class PollingWatcher:
+    """
+    定期掃描目錄的監看方式（非 Linux 或 inotify 無法使用時的備援）
+    """
+
+    def __init__(self, directories, interval=DEFAULT_POLL_INTERVAL):
+        self._directories = list(directories)
+        self._interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for directory in self._directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        st = entry.stat()
+                        snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue
+        return snapshot
+
+    def poll(self, timeout):
+        """
+        等待並回傳新增或改變的檔案
+
+        Args:
+            timeout (float): 最長等待秒數
+
+        Returns:
+            set: 有變動的檔案路徑
+        """
+        time.sleep(min(timeout, self._interval))
+        snapshot = self._scan()
+        changed = {path for path, identity in snapshot.items() if self._snapshot.get(path) != identity}
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+def create_watcher(directories, use_polling=False, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    建立檔案監看器；優先使用 inotify，無法使用時改為定期掃描
+
+    Args:
+        directories (list): 監看的目錄
+        use_polling (bool): 強制使用定期掃描
+        poll_interval (float): 定期掃描的間隔秒數
+
+    Returns:
+        InotifyWatcher | PollingWatcher: 監看器
+    """
+    if not use_polling:
+        try:
+            return InotifyWatcher(directories)
+        except OSError as e:
+            print(f"⚠️  無法使用 inotify（{e}），改為每 {poll_interval:g} 秒掃描一次")
+    return PollingWatcher(directories, poll_interval)
+
+class StabilityTracker:
+    """
+    去抖動：檔案大小與修改時間在 settle 秒內都沒有變化，才視為寫入完成
+    """
+
+    def __init__(self, settle=DEFAULT_SETTLE_SECONDS):
+        self.settle = settle
+        self._pending = {}
+
+    def touch(self, path, now=None):
+        """記錄檔案有變動（重新開始計時）"""
+        now = time.monotonic() if now is None else now
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._pending.pop(path, None)
+            return
+        previous = self._pending.get(path)
+        identity = (st.st_size, st.st_mtime_ns)
+        if previous is None or previous[0] != identity:
+            self._pending[path] = (identity, now, previous[2] if previous else now)
+
+    def stable(self, now=None):
+        """
+        取出已穩定的檔案
+
+        Returns:
+            list: (檔案路徑, 第一次偵測到的時間) 列表
+        """
+        now = time.monotonic() if now is None else now
+        ready = []
+        for path in list(self._pending):
+            self.touch(path, now)
+            entry = self._pending.get(path)
+            if entry is not None and now - entry[1] >= self.settle:
+                ready.append((path, entry[2]))
+                del self._pending[path]
+        return ready
+
+    def __len__(self):
+        return len(self._pending)
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class WatchMetrics:
+    """
+    工作佇列的統計：佇列深度、執行中工作數、完成/失敗數與延遲分佈
+    """
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.in_flight = 0
+        self._wait = deque(maxlen=window)
+        self._run = deque(maxlen=window)
+        self._latency = deque(maxlen=window)
+
+    def record_submit(self):
+        with self._lock:
+            self.submitted += 1
+
+    def record_coalesced(self):
+        with self._lock:
+            self.coalesced += 1
+
+    def record_start(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def record_done(self, success, wait, run, latency):
+        with self._lock:
+            self.in_flight -= 1
+            if success:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self._wait.append(wait)
+            self._run.append(run)
+            self._latency.append(latency)
+
+    def snapshot(self, queue_depth):
+        """
+        取得目前的統計
+
+        Args:
+            queue_depth (int): 佇列中等待的工作數
+
+        Returns:
+            dict: 統計資料（延遲單位為秒；latency 為偵測到檔案到處理完成）
+        """
+        with self._lock:
+            data = {
+                'queue_depth': queue_depth,
+                'in_flight': self.in_flight,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'coalesced': self.coalesced,
+            }
+            for name, values in (('wait', self._wait), ('run', self._run), ('latency', self._latency)):
+                data[f'{name}_p50'] = _percentile(values, 0.5)
+                data[f'{name}_p95'] = _percentile(values, 0.95)
+                data[f'{name}_max'] = max(values) if values else None
+        return data
+
+class WorkQueue:
+    """
+    有上限的工作佇列，以固定數量的工作執行緒處理
+
+    相同 key 的工作在等待中時不會重複排入；執行中收到的新請求會在完成後由同一個工作執行緒
+    再執行一次（不重新排入佇列，佇列已滿時也不會阻塞）。合併的請求保留最早的偵測時間。
+    佇列已滿時 submit 會阻塞，形成背壓。
+    """
+
+    def __init__(self, jobs=1, maxsize=DEFAULT_QUEUE_SIZE):
+        self.metrics = WatchMetrics()
+        self._queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> 在佇列中等待的工作最早的偵測時間
+        self._running = {}  # key -> 執行中又收到的請求 (最早的偵測時間, 第一次請求時間)，沒有時為 None
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(max(1, jobs))]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def submit(self, key, func, detected_at=None):
+        """
+        排入工作
+
+        Args:
+            key (tuple): 工作識別（用於合併重複的請求）
+            func (callable): 無參數的處理函式，回傳是否成功
+            detected_at (float): 偵測到檔案的 time.monotonic() 時間
+        """
+        now = time.monotonic()
+        detected_at = detected_at or now
+        with self._lock:
+            if key in self._pending:
+                # 尚未開始執行，開始時就會處理到這次的變更
+                self._pending[key] = min(self._pending[key], detected_at)
+                self.metrics.record_coalesced()
+                return
+            if key in self._running:
+                rerun = self._running[key]
+                self._running[key] = (min(rerun[0], detected_at), rerun[1]) if rerun else (detected_at, now)
+                self.metrics.record_coalesced()
+                return
+            self._pending[key] = detected_at
+        self.metrics.record_submit()
+        self._queue.put((key, func, now))
+
+    def _run(self, key, func, enqueued_at, detected_at):
+        started = time.monotonic()
+        self.metrics.record_start()
+        try:
+            success = bool(func())
+        except Exception as e:
+            print(f"❌ 處理失敗 {key}: {e}")
+            success = False
+        finished = time.monotonic()
+        self.metrics.record_done(success, started - enqueued_at, finished - started, finished - detected_at)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            key, func, enqueued_at = item
+            with self._lock:
+                detected_at = self._pending.pop(key)
+                self._running[key] = None
+            while True:
+                self._run(key, func, enqueued_at, detected_at)
+                with self._lock:
+                    rerun = self._running[key]
+                    if rerun is None:
+                        del self._running[key]
+                        break
+                    self._running[key] = None
+                detected_at, enqueued_at = rerun
+            self._queue.task_done()
+
+    def close(self, wait=True):
+        """停止工作執行緒；wait 時會先處理完佇列中的工作"""
+        if wait:
+            self._queue.join()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+def write_metrics(path, metrics):
+    """以暫存檔加改名的方式寫出統計 JSON"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, indent=2)
+    os.replace(temp_path, path)
+
+def format_metrics(metrics):
+    """將統計轉為單行文字"""
+    def seconds(value):
+        return "-" if value is None else f"{value:.1f}s"
+    return (f"📊 佇列: {metrics['queue_depth']}  執行中: {metrics['in_flight']}  "
+            f"完成: {metrics['completed']}  失敗: {metrics['failed']}  "
+            f"延遲 p50/p95: {seconds(metrics['latency_p50'])}/{seconds(metrics['latency_p95'])}")
+
+def is_ignored(path):
+    """略過暫存檔、隱藏檔與合併產生的輸出檔案，避免處理自己的輸出"""
+    name = os.path.basename(path)
+    directory = os.path.dirname(path)
+    return (
+        name.startswith(".")
+        or ".part." in name
+        or name.endswith(".tmp")
+        or name.endswith("_merged.srt")
+        or name == os.path.basename(resolve_output_path(directory))
+    )
+
+def build_tasks(path, actions, pattern="*.mp4", output_directory=None, quality="2", copy_if_possible=False, jobs=None,
+                profile=None):
+    """
+    依檔案類型與動作產生要排入的工作
+
+    Args:
+        path (str): 已穩定的檔案路徑
+        actions (list): 啟用的動作（mp3、merge、subtitles）
+        pattern (str): 影片檔案匹配模式
+        output_directory (str): MP3 輸出目錄（可選）
+        quality (str): MP3 品質
+        copy_if_possible (bool): MP3 轉換時盡量直接複製音訊串流
+        jobs (int): 合併時的並行探測數
+        profile (EncoderProfile): 合併需要重新編碼時使用的編碼 profile（可選）
+
+    Returns:
+        list: (key, func) 列表
+    """
+    if is_ignored(path):
+        return []
+    name = os.path.basename(path)
+    directory = os.path.dirname(path)
+    tasks = []
+    if fnmatch(name, pattern):
+        if 'mp3' in actions:
+            output_file = None
+            if output_directory:
+                output_file = os.path.join(output_directory, os.path.splitext(name)[0] + ".mp3")
+            tasks.append((('mp3', path), lambda: convert_video_to_mp3(
+                path, output_file, quality, copy_if_possible=copy_if_possible)))
+        if 'merge' in actions:
+            # 同一目錄的合併請求會合併成一次增量合併
+            tasks.append((('merge', directory), lambda: incremental_merge(
+                directory, jobs=jobs, assume_yes=True, profile=profile)))
+    elif fnmatch(name, "*.srt") and 'subtitles' in actions and 'merge' not in actions:
+        # 增量合併本身會附加字幕，只有未啟用 merge 時才單獨合併字幕
+        tasks.append((('subtitles', directory), lambda: batch_merge_subtitles(directory, confirm_order=False)))
+    return tasks
+
+def watch(directories, actions=('mp3',), pattern="*.mp4", jobs=1, queue_size=DEFAULT_QUEUE_SIZE,
+          settle=DEFAULT_SETTLE_SECONDS, use_polling=False, poll_interval=DEFAULT_POLL_INTERVAL,
+          process_existing=False, output_directory=None, quality="2", copy_if_possible=False,
+          metrics_file=None, metrics_interval=DEFAULT_METRICS_INTERVAL, stop_event=None, profile=None):
+    """
+    持續監看目錄，將寫入完成的新檔案交給 MP3 轉換、增量合併或字幕合併處理
+
+    Args:
+        directories (list): 監看的目錄
+        actions (tuple): 啟用的動作（mp3、merge、subtitles）
+        pattern (str): 影片檔案匹配模式
+        jobs (int): 同時處理的工作數
+        queue_size (int): 工作佇列上限
+        settle (float): 檔案需維持不變的秒數
+        use_polling (bool): 強制使用定期掃描而不是 inotify
+        poll_interval (float): 定期掃描的間隔秒數
+        process_existing (bool): 啟動時也處理目錄中已存在的檔案
+        output_directory (str): MP3 輸出目錄（可選）
+        quality (str): MP3 品質
+        copy_if_possible (bool): MP3 轉換時盡量直接複製音訊串流
+        metrics_file (str): 定期寫出統計 JSON 的路徑（可選）
+        metrics_interval (float): 輸出統計的間隔秒數
+        stop_event (threading.Event): 設定後停止監看（可選，預設為 Ctrl+C / SIGTERM）
+        profile (EncoderProfile): 合併需要重新編碼時使用的編碼 profile（可選）
+
+    Returns:
+        dict: 停止時的統計
+    """
+    directories = [os.path.abspath(directory) for directory in directories]
+    for directory in directories:
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"目錄不存在: {directory}")
+    if output_directory:
+        os.makedirs(output_directory, exist_ok=True)
+
+    stop_event = stop_event or threading.Event()
+    watcher = create_watcher(directories, use_polling, poll_interval)
+    tracker = StabilityTracker(settle)
+    work_queue = WorkQueue(jobs, queue_size)
+
+    if process_existing:
+        for directory in directories:
+            for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+                if entry.is_file():
+                    tracker.touch(entry.path)
+
+    print(f"👀 開始監看 {len(directories)} 個目錄 ({type(watcher).__name__}, 動作: {', '.join(actions)}, 並行數: {jobs})")
+    for directory in directories:
+        print(f"  - {directory}")
+
+    def report():
+        metrics = work_queue.metrics.snapshot(work_queue.depth)
+        print(format_metrics(metrics))
+        if metrics_file:
+            write_metrics(metrics_file, metrics)
+        return metrics
+
+    next_report = time.monotonic() + metrics_interval
+    try:
+        while not stop_event.is_set():
+            timeout = min(1.0, settle / 2) if len(tracker) else 1.0
+            for path in watcher.poll(timeout):
+                tracker.touch(path)
+            for path, detected_at in tracker.stable():
+                for key, func in build_tasks(path, actions, pattern, output_directory, quality, copy_if_possible, jobs, profile):
+                    work_queue.submit(key, func, detected_at)
+            if time.monotonic() >= next_report:
+                report()
+                next_report = time.monotonic() + metrics_interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        print("\n🛑 停止監看，等待佇列中的工作完成...")
+        work_queue.close(wait=True)
+    return report()
+
+def main():
+    parser = argparse.ArgumentParser(description="監看目錄並自動處理新增的影片檔案")
+    parser.add_argument("directories", nargs="+", help="要監看的目錄")
+    parser.add_argument("-a", "--action", dest="actions", action="append", choices=WATCH_ACTIONS,
+                        help="新檔案的處理方式，可重複指定 (預設: mp3)")
+    parser.add_argument("-p", "--pattern", default="*.mp4", help="影片檔案匹配模式 (預設: *.mp4)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="同時處理的工作數 (預設: 1)")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"工作佇列上限，已滿時暫停接收新工作 (預設: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help=f"檔案需維持不變多少秒才視為寫入完成 (預設: {DEFAULT_SETTLE_SECONDS:g})")
+    parser.add_argument("--poll", action="store_true", help="使用定期掃描而不是 inotify")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f"定期掃描的間隔秒數 (預設: {DEFAULT_POLL_INTERVAL:g})")
+    parser.add_argument("--process-existing", action="store_true", help="啟動時也處理已存在的檔案")
+    parser.add_argument("-o", "--output-dir", help="MP3 輸出目錄")
+    parser.add_argument("-q", "--quality", default="2", help="MP3 品質 (0-9，預設: 2)")
+    parser.add_argument("--copy-if-possible", action="store_true", help="來源音訊相容時直接複製串流")
+    parser.add_argument("--metrics-file", help="定期寫出佇列統計 JSON 的路徑")
+    parser.add_argument("--metrics-interval", type=float, default=DEFAULT_METRICS_INTERVAL,
+                        help=f"輸出統計的間隔秒數 (預設: {DEFAULT_METRICS_INTERVAL:g})")
+    parser.add_argument("--no-cache", action="store_true", help="不使用 ffprobe 快取")
+    add_profile_arguments(parser)
+
+    add_trace_argument(parser)
+    args = parser.parse_args()
+    enable_trace(args.trace, "vid-watch")
+    profile = profile_from_args(parser, args)
+    set_cache_enabled(not args.no_cache)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+
+    try:
+        watch(args.directories, tuple(args.actions or ['mp3']), args.pattern, args.jobs, args.queue_size,
+              args.settle, args.poll, args.poll_interval, args.process_existing, args.output_dir,
+              args.quality, args.copy_if_possible, args.metrics_file, args.metrics_interval, stop_event,
+              profile)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+if __name__ == "__main__":
+    main()